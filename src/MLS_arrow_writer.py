@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_Arrow_Writer
+Description: Typed Parquet and Arrow IPC output of scraped rentals
+"""
+
+import os
+
+# Output formats written by MLS_Arrow_Writer and their file extensions
+ARROW_FORMATS = {'parquet': 'parquet',
+                 'arrow': 'arrow'}
+
+# File names of the tables, without extension
+UNIT_ATTRS_FILE_NAME = 'MLS_unit_attrs'
+ROOM_FILE_NAME = 'MLS_room'
+
+# Name of the index column, the id of the rental section which is its MLS#
+INDEX_NAME = 'Listing ID'
+
+"""
+Declared types of the columns, other scraped columns are strings
+int: whole number, a count like '5 + 1' is the sum of its terms
+float: decimal number
+date: date in month/day/year
+category: string of few distinct values, dictionary encoded
+"""
+UNIT_ATTRS_TYPES = {'DOM': 'int',
+                    'Rms': 'int',
+                    'Bedrooms': 'int',
+                    'Contract Date': 'date',
+                    'City': 'category',
+                    'Province': 'category',
+                    'Level': 'category'}
+ROOM_TYPES = {'Length': 'float',
+              'Width': 'float',
+              'Level': 'category'}
+
+# Normalization rules of the declared types
+NORMALIZATION_RULES = {'int': 'count',
+                       'float': 'float',
+                       'date': 'date'}
+
+# Compression and number of rows per row group of the files
+COMPRESSION = 'zstd'
+ROW_GROUP_SIZE = 128 * 1024
+
+"""
+Class: MLS_Arrow_Writer
+"""
+
+
+class MLS_Arrow_Writer:
+
+    def __init__(self):
+        """
+        Initialize the typed output of rental information.
+        pyarrow is an optional dependency, only needed by this output.
+
+        Raises
+        ------
+        ImportError
+            If pyarrow is not installed.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        import pyarrow
+        from MLS_normalizer import MLS_Normalizer
+
+        self.pa = pyarrow
+        self.normalizer = MLS_Normalizer()
+        self.arrow_types = {'int': pyarrow.int64(),
+                            'float': pyarrow.float64(),
+                            'date': pyarrow.date32(),
+                            'category': pyarrow.dictionary(pyarrow.int32(),
+                                                           pyarrow.string())}
+
+    def output_rental_information(self, MLS_output_df, directory, file_format):
+        """
+        Save the unit attributes and room attributes with declared types
+
+        Parameters
+        ----------
+        MLS_output_df : Dict
+            MLS_unit_attrs_df: Dataframe of unit attributes
+            MLS_room_df: Dataframe of room attributes
+        directory : Str
+            Directory of the output to be saved.
+        file_format : Str
+            parquet or arrow (Arrow IPC file).
+
+        Returns
+        -------
+        None.
+
+        """
+
+        tables = {UNIT_ATTRS_FILE_NAME: self.to_table(
+                      MLS_output_df['MLS_unit_attrs_df'], UNIT_ATTRS_TYPES),
+                  ROOM_FILE_NAME: self.to_table(
+                      MLS_output_df['MLS_room_df'], ROOM_TYPES)}
+
+        for file_name, table in tables.items():
+            self.write_table(table, directory, file_name, file_format)
+
+    def write_table(self, table, directory, file_name, file_format):
+        """
+        Save a table as parquet or Arrow IPC file
+
+        Parameters
+        ----------
+        table : pyarrow.Table
+            Table of the rental information.
+        directory : Str
+            Directory of the output to be saved.
+        file_name : Str
+            File name of the table, without extension.
+        file_format : Str
+            parquet or arrow (Arrow IPC file).
+
+        Returns
+        -------
+        None.
+
+        """
+
+        file_path = os.path.join(
+            directory, f'{file_name}.{ARROW_FORMATS[file_format]}')
+        if file_format == 'parquet':
+            self._write_parquet(table, file_path)
+        else:
+            self._write_arrow(table, file_path)
+
+    def to_table(self, df, column_types):
+        """
+        Convert a dataframe of scraped strings into an arrow table
+        with the declared types, column by column.
+        Values that cannot be converted are null. Columns already normalized
+        by MLS_Normalizer keep their type unless it is declared.
+
+        Parameters
+        ----------
+        df : pandas dataframe
+            Dataframe of unit attributes or room attributes.
+        column_types : Dict
+            Declared type of the columns, other columns are strings.
+
+        Returns
+        -------
+        pyarrow.Table
+            Table of the rental information, with the index as first column.
+
+        """
+
+        from pandas.api.types import is_string_dtype
+
+        df = df.rename_axis(INDEX_NAME)
+        fields = [self.pa.field(INDEX_NAME, self.pa.string())]
+
+        for column in df.columns:
+            column_type = column_types.get(column)
+            is_scraped = (df[column].dtype == object
+                          or is_string_dtype(df[column]))
+
+            if column_type is not None:
+                if is_scraped:
+                    df[column] = self._convert_column(df[column], column_type)
+                field_type = self.arrow_types[column_type]
+            elif is_scraped:
+                field_type = self.pa.string()
+            else:
+                field_type = self.pa.Array.from_pandas(df[column]).type
+
+            fields.append(self.pa.field(column, field_type))
+
+        return self.pa.Table.from_pandas(df, schema=self.pa.schema(fields),
+                                         preserve_index=True)
+
+    def _convert_column(self, column, column_type):
+        """
+        Convert a column of scraped strings into the declared type
+
+        Parameters
+        ----------
+        column : pandas series
+            Scraped strings.
+        column_type : Str
+            Declared type, one of int, float, date and category.
+
+        Returns
+        -------
+        pandas series
+            Converted column.
+
+        """
+
+        if column_type in NORMALIZATION_RULES:
+            return self.normalizer.convert_column(
+                column, NORMALIZATION_RULES[column_type])
+
+        return column.astype('category')
+
+    def _write_parquet(self, table, file_path):
+        """
+        Write a table as parquet
+
+        Parameters
+        ----------
+        table : pyarrow.Table
+            Table of the rental information.
+        file_path : Str
+            Path of the file.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, file_path, compression=COMPRESSION,
+                       row_group_size=ROW_GROUP_SIZE)
+
+    def _write_arrow(self, table, file_path):
+        """
+        Write a table as Arrow IPC file
+
+        Parameters
+        ----------
+        table : pyarrow.Table
+            Table of the rental information.
+        file_path : Str
+            Path of the file.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        options = self.pa.ipc.IpcWriteOptions(compression=COMPRESSION)
+        with self.pa.ipc.new_file(file_path, table.schema,
+                                  options=options) as writer:
+            writer.write_table(table, max_chunksize=ROW_GROUP_SIZE)
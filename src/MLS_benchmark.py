@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_Benchmark
+Description: End-to-end benchmark of the scraping stages on synthetic reports
+"""
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import freeze_support, get_context
+from MLS_scraper_module import (MLS_Scraper_Module, SCRAPER_VERSION,
+                                PARSER_BACKENDS, DEFAULT_PARSER,
+                                ENGINES, DEFAULT_ENGINE)
+from MLS_report_generator import MLS_Report_Generator
+from MLS_stage_profiler import get_peak_rss
+
+# Number of rental sections of the benchmarked reports
+DEFAULT_SIZES = [10, 1000, 10000, 100000]
+
+# Seed of the synthetic reports, the same seed gives the same reports
+DEFAULT_SEED = 0
+
+# Stages timed separately, in the order they run
+STAGES = ['read_html',
+          'get_all_rental',
+          '_convert_output_to_dataframe',
+          'output_rental_information']
+
+# Output formats of the output_rental_information stage
+OUTPUT_FORMATS = ['csv', 'json']
+
+# Bytes per megabyte of the html size
+MEGABYTE = 1024 * 1024
+
+# File name of a synthetic report in the work directory
+REPORT_FILE_NAME = 'MLS_report_{size}_{seed}.html'
+
+
+def run_stages(html_path, listing_count, parser=DEFAULT_PARSER,
+               engine=DEFAULT_ENGINE, output_format='csv'):
+    """
+    Scrape a report and time each stage.
+    Run in a new process for each report, so the peak memory only
+    belongs to that report.
+
+    Parameters
+    ----------
+    html_path : Str
+        Path of the MLS html.
+    listing_count : Int
+        Number of rental sections of the report.
+    parser : Str, optional
+        Parser backend of the soup engine.
+        The default is DEFAULT_PARSER.
+    engine : Str, optional
+        Extraction engine, one of ENGINES.
+        The default is DEFAULT_ENGINE.
+    output_format : Str, optional
+        Output format of output_rental_information, csv or json.
+        The default is 'csv'.
+
+    Returns
+    -------
+    Dict
+        Wall time, CPU time, throughput and peak memory of each stage,
+        and the number of succeeded and failed rentals.
+
+    """
+
+    # Rentals are always scraped, the cache would hide the scraping time
+    scraper = MLS_Scraper_Module(parser=parser, cache_dir=None, engine=engine)
+    as_df = output_format == 'csv'
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        stage_calls = {
+            'read_html': lambda: scraper.read_html(html_path),
+            'get_all_rental': scraper.get_all_rental,
+            '_convert_output_to_dataframe': scraper._convert_output_to_dataframe,
+            'output_rental_information': lambda: scraper.output_rental_information(
+                output_dir, as_df)}
+
+        stages = {}
+        for stage in STAGES:
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+
+            stage_calls[stage]()
+
+            wall_time = time.perf_counter() - wall_start
+            cpu_time = time.process_time() - cpu_start
+            stages[stage] = {
+                'wall_time': wall_time,
+                'cpu_time': cpu_time,
+                'listings_per_second': listing_count / wall_time if wall_time else None,
+                # High-water mark of the process once the stage is done
+                'peak_rss_mb': get_peak_rss()}
+
+    scraping_status = scraper.get_rental_scraping_status()
+
+    return {'stages': stages,
+            'success': len(scraping_status['success']),
+            'failure': len(scraping_status['failure']),
+            'peak_rss_mb': get_peak_rss()}
+
+
+"""
+Class: MLS_Benchmark
+"""
+
+
+class MLS_Benchmark:
+
+    def __init__(self, sizes=DEFAULT_SIZES, work_dir=None, seed=DEFAULT_SEED,
+                 parser=DEFAULT_PARSER, engine=DEFAULT_ENGINE,
+                 output_format='csv'):
+        """
+        Initialize the benchmark of the scraping stages
+
+        Parameters
+        ----------
+        sizes : List, optional
+            Number of rental sections of each report.
+            The default is DEFAULT_SIZES.
+        work_dir : Str, optional
+            Directory of the synthetic reports. Reports already generated
+            with the same size and seed are reused.
+            If it is None, the reports are removed after the benchmark.
+            The default is None.
+        seed : Int, optional
+            Seed of the synthetic reports.
+            The default is DEFAULT_SEED.
+        parser : Str, optional
+            Parser backend of the soup engine.
+            The default is DEFAULT_PARSER.
+        engine : Str, optional
+            Extraction engine, one of ENGINES.
+            The default is DEFAULT_ENGINE.
+        output_format : Str, optional
+            Output format of output_rental_information, csv or json.
+            The default is 'csv'.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.sizes = sizes
+        self.work_dir = work_dir
+        self.seed = seed
+        self.parser = parser
+        self.engine = engine
+        self.output_format = output_format
+
+    def run(self):
+        """
+        Generate a report of each size and time the stages on it
+
+        Returns
+        -------
+        Dict
+            Settings and environment of the benchmark, and the results
+            of each report size.
+
+        """
+
+        if self.work_dir is None:
+            with tempfile.TemporaryDirectory() as work_dir:
+                results = [self.run_size(size, work_dir) for size in self.sizes]
+        else:
+            os.makedirs(self.work_dir, exist_ok=True)
+            results = [self.run_size(size, self.work_dir) for size in self.sizes]
+
+        return {'scraper_version': SCRAPER_VERSION,
+                'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'parser': self.parser,
+                'engine': self.engine,
+                'output_format': self.output_format,
+                'seed': self.seed,
+                'results': results}
+
+    def run_size(self, size, work_dir):
+        """
+        Time the stages on a report of the given size
+
+        Parameters
+        ----------
+        size : Int
+            Number of rental sections of the report.
+        work_dir : Str
+            Directory of the synthetic reports.
+
+        Returns
+        -------
+        Dict
+            Size of the report, and the results of run_stages.
+
+        """
+
+        html_path = os.path.join(work_dir, REPORT_FILE_NAME.format(
+            size=size, seed=self.seed))
+        if not os.path.exists(html_path):
+            MLS_Report_Generator(seed=self.seed).write_report(html_path, size)
+
+        # New process for each report, so its peak memory is measured alone
+        with ProcessPoolExecutor(max_workers=1,
+                                 mp_context=get_context('spawn')) as executor:
+            result = executor.submit(run_stages, html_path, size, self.parser,
+                                     self.engine, self.output_format).result()
+
+        return {'listings': size,
+                'html_mb': os.path.getsize(html_path) / MEGABYTE,
+                **result}
+
+
+def arguement_parsing():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the scraping stages on synthetic MLS reports')
+    parser.add_argument('output',
+                        type=str,
+                        help='Output path of the benchmark results in json')
+    parser.add_argument('--sizes',
+                        type=int,
+                        nargs='+',
+                        default=DEFAULT_SIZES,
+                        help='Number of rental sections of each report')
+    parser.add_argument('--work-dir',
+                        dest='work_dir',
+                        type=str,
+                        default=None,
+                        help='Directory of the synthetic reports, reports '
+                        'already generated are reused')
+    parser.add_argument('--seed',
+                        type=int,
+                        default=DEFAULT_SEED,
+                        help='Seed of the synthetic reports')
+    parser.add_argument('--parser',
+                        choices=PARSER_BACKENDS,
+                        default=DEFAULT_PARSER,
+                        help='Parser backend of the html')
+    parser.add_argument('--engine',
+                        choices=ENGINES,
+                        default=DEFAULT_ENGINE,
+                        help='Extraction engine')
+    parser.add_argument('--format',
+                        dest='output_format',
+                        choices=OUTPUT_FORMATS,
+                        default='csv',
+                        help='Output format of output_rental_information')
+
+    return parser.parse_args()
+
+
+def main():
+    args = arguement_parsing()
+
+    benchmark = MLS_Benchmark(args.sizes, args.work_dir, args.seed,
+                              args.parser, args.engine, args.output_format)
+    results = benchmark.run()
+
+    with open(args.output, 'w') as fp:
+        json.dump(results, fp, indent=2)
+
+    for result in results['results']:
+        peak_rss = result['peak_rss_mb']
+        print(f"{result['listings']} listings, {result['success']} succeeded, "
+              f"peak RSS {'n/a' if peak_rss is None else f'{peak_rss:.0f} MB'}")
+        for stage, timing in result['stages'].items():
+            print(f"  {stage}: {timing['wall_time']:.3f} s, "
+                  f"{timing['listings_per_second'] or 0:.0f} listings/s")
+
+
+if __name__ == "__main__":
+    freeze_support()
+    main()
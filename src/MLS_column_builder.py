@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_Column_Builder
+Description: Column buffers of scraped rentals, built into dataframes at once
+"""
+
+"""
+Class: MLS_Schema_Registry
+"""
+
+
+class MLS_Schema_Registry:
+
+    def __init__(self, leading_columns=()):
+        """
+        Initialize the columns of a table and their value buffers.
+        Columns are registered in the order they are first seen, labels only
+        found on some rentals are empty for the other rentals.
+
+        Parameters
+        ----------
+        leading_columns : Iterable, optional
+            Columns registered before any row, e.g. Room Index.
+            The default is ().
+
+        Returns
+        -------
+        None.
+
+        """
+
+        # Value buffer of each column, in the order of registration
+        self.columns = {}
+
+        # Number of rows in the buffers
+        self.row_count = 0
+
+        for column in leading_columns:
+            self.register(column)
+
+    def register(self, column):
+        """
+        Register a column if it is new, earlier rows are empty in it
+
+        Parameters
+        ----------
+        column : Str
+            Name of the column.
+
+        Returns
+        -------
+        List
+            Value buffer of the column.
+
+        """
+        if column not in self.columns:
+            self.columns[column] = [None] * self.row_count
+        return self.columns[column]
+
+    def append_row(self, row):
+        """
+        Append a row to the buffers
+
+        Parameters
+        ----------
+        row : Dict
+            Value of each column of the row.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        for column in row:
+            self.register(column)
+
+        for column, values in self.columns.items():
+            values.append(row.get(column))
+
+        self.row_count += 1
+
+
+"""
+Class: MLS_Column_Builder
+"""
+
+
+class MLS_Column_Builder:
+
+    def __init__(self, rentals=None):
+        """
+        Initialize the column buffers of unit attributes and room attributes
+
+        Parameters
+        ----------
+        rentals : MLS_Rental_Store, optional
+            Store keeping the rentals, e.g. MLS_Rental_Store, whose values
+            are then shared by the column buffers.
+            If it is None, the rentals are kept in a dictionary.
+            The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        # Unit attributes and room attributes of each rental,
+        # kept to rebuild the columns if a rental is replaced
+        self.rentals = {} if rentals is None else rentals
+        self.replaced = False
+
+        self._reset_columns()
+
+    def _reset_columns(self):
+        """
+        Empty the column buffers
+
+        Returns
+        -------
+        None.
+
+        """
+
+        # Unit attributes, a row per rental
+        self.unit_schema = MLS_Schema_Registry()
+
+        # Room attributes, a row per room, Room Index first as in the csv
+        self.room_schema = MLS_Schema_Registry(['Room Index'])
+        self.room_owners = []
+
+    def add_rental(self, MLS_num, attribute_dict, room_table):
+        """
+        Add the attributes of a rental to the column buffers.
+        A rental of a MLS number already added replaces the previous one
+        and keeps its position, the same as updating a dictionary.
+
+        Parameters
+        ----------
+        MLS_num : Str
+            MLS number of the rental.
+        attribute_dict : Dict
+            Unit attributes of rental.
+        room_table : Dict
+            Room attributes of rental.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        # Columns are rebuilt before the next dataframe, as labels only found
+        # on the replaced rental are not part of the output any more
+        if MLS_num in self.rentals:
+            self.replaced = True
+
+        self.rentals[MLS_num] = (attribute_dict, room_table)
+
+        # Buffers take the values as kept by the rentals
+        if not self.replaced:
+            self._append_rental(MLS_num, *self.rentals[MLS_num])
+
+    def _append_rental(self, MLS_num, attribute_dict, room_table):
+        """
+        Append the attributes of a rental to the column buffers
+
+        Parameters
+        ----------
+        MLS_num : Str
+            MLS number of the rental.
+        attribute_dict : Dict
+            Unit attributes of rental.
+        room_table : Dict
+            Room attributes of rental.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.unit_schema.append_row(attribute_dict)
+
+        for room_index, room_attrs in room_table.items():
+            self.room_schema.append_row({'Room Index': room_index, **room_attrs})
+            self.room_owners.append(MLS_num)
+
+    def _rebuild_columns(self):
+        """
+        Rebuild the column buffers from the latest rentals if a rental
+        has been replaced
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if not self.replaced:
+            return
+
+        self._reset_columns()
+        for MLS_num, (attribute_dict, room_table) in self.rentals.items():
+            self._append_rental(MLS_num, attribute_dict, room_table)
+        self.replaced = False
+
+    def get_unit_attrs_columns(self):
+        """
+        Return the columns of unit attributes, indexed by MLS number
+
+        Returns
+        -------
+        Tuple
+            MLS number of each row, and value list of each column.
+
+        """
+        self._rebuild_columns()
+        return list(self.rentals), self.unit_schema.columns
+
+    def get_room_columns(self):
+        """
+        Return the columns of room attributes, indexed by MLS number
+        with a row per room
+
+        Returns
+        -------
+        Tuple
+            MLS number of each row, and value list of each column.
+
+        """
+        self._rebuild_columns()
+        return self.room_owners, self.room_schema.columns
+
+    def get_unit_attrs_df(self):
+        """
+        Build the dataframe of unit attributes, indexed by MLS number
+
+        Returns
+        -------
+        pandas dataframe
+            Dataframe of unit attributes.
+
+        """
+
+        # pandas is only imported by the tabular outputs that need it
+        import pandas as pd
+
+        index, columns = self.get_unit_attrs_columns()
+        return pd.DataFrame(columns, index=index)
+
+    def get_room_df(self):
+        """
+        Build the dataframe of room attributes, indexed by MLS number
+        with a row per room
+
+        Returns
+        -------
+        pandas dataframe
+            Dataframe of room attributes.
+
+        """
+
+        import pandas as pd
+
+        index, columns = self.get_room_columns()
+        return pd.DataFrame(columns, index=index)
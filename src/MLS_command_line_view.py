@@ -8,6 +8,8 @@ Update Date: 17/07/2022
 @author: hinwm
 """
 
+import json
+
 """
 Class: MLS_Command_Line_View
 """
@@ -25,7 +27,42 @@ class MLS_Command_Line_View:
         """
         self.param_alias = {'input': 'Input file path',
                             'output': 'Output directory',
-                            'tabular': 'Output as tabular format'}
+                            'tabular': 'Output as tabular format',
+                            'format': 'Output format',
+                            'normalize': 'Normalize tabular output',
+                            'engine': 'Extraction engine',
+                            'template': 'Extraction templates',
+                            'parser': 'Parser backend',
+                            'listings_only': 'Only parse rental sections',
+                            'chunk_size': 'Chunk size of html reading',
+                            'workers': 'Number of worker processes',
+                            'cache_dir': 'Cache directory',
+                            'no_cache': 'Cache disabled',
+                            'cache_size': 'Cache size cap (MB)',
+                            'diff_against': 'Previous output directory',
+                            'profile': 'Profile statistics file',
+                            'metrics_json': 'Metrics file',
+                            'derived_metrics': 'Derived metrics output',
+                            'folder': 'Watched folder',
+                            'debounce': 'Debounce (s)',
+                            'poll_interval': 'Poll interval (s)',
+                            'polling': 'Polling forced',
+                            'host': 'Host',
+                            'port': 'Port',
+                            'max_concurrency': 'Concurrency cap',
+                            'max_body_size': 'Body size limit (MB)',
+                            'MLS_numbers': 'MLS numbers',
+                            'where': 'Conditions',
+                            'room': 'Room conditions',
+                            'order_by': 'Sorted by',
+                            'descending': 'Descending order',
+                            'limit': 'Rentals shown',
+                            'fields': 'Attributes shown',
+                            'rebuild': 'Rebuild indexes',
+                            'snapshots': 'Snapshot directories',
+                            'fan_in': 'Merge fan-in',
+                            'run_size': 'Run size',
+                            'temp_dir': 'Temporary directory'}
         
     def initialization(self, args):
         """
@@ -81,6 +118,26 @@ class MLS_Command_Line_View:
             if value is not None:
                 print(f"{self.param_alias[param]}: {value}")
                 
+    def parser_fallback_view(self, requested_parser, parser):
+        """
+        Display warning when the requested parser backend is not installed
+
+        Parameters
+        ----------
+        requested_parser : Str
+            Parser backend requested by the user.
+        parser : Str
+            Parser backend used instead.
+
+        Returns
+        -------
+        None.
+
+        """
+        print(f"Warning: {requested_parser} is not installed")
+        print(f"{parser} is used to read the MLS website instead")
+        print("")
+        
     def read_html_view(self, func):
         """
         Decorator to display information in the view during read_html()
@@ -97,17 +154,20 @@ class MLS_Command_Line_View:
 
         """
         
-        def wrapper():
+        def wrapper(*args, **kwargs):
             print(f"Reading MLS website from {self.param_alias['input']}...")
             try:
-                func
-                print("MLS website is loaded successfully")
-            except:
+                result = func(*args, **kwargs)
+            except Exception:
                 print("Issue arised in loading MLS website")
                 print("Please check if it is in valid format")
+                print("")
+                raise
+            print("MLS website is loaded successfully")
             print("")
+            return result
                 
-        return wrapper()
+        return wrapper
     
     def error_file_not_exist(self, path):
         """
@@ -127,6 +187,26 @@ class MLS_Command_Line_View:
         print("Please check if the path is correct")
         print("")
         
+    def error_missing_dependency(self, package, feature):
+        """
+        Display error message when an optional dependency is not installed
+
+        Parameters
+        ----------
+        package : Str
+            Package that is not installed.
+        feature : Str
+            Feature requiring the package.
+
+        Returns
+        -------
+        None.
+
+        """
+        print(f"Error: {package} is required by {feature} but not installed")
+        print(f"Please install it with pip install {package}")
+        print("")
+        
     def get_all_rental_view(self, func):
         """
         Decorator to display information in the view during get_all_rental()
@@ -143,19 +223,23 @@ class MLS_Command_Line_View:
 
         """
         
-        def wrapper():
+        def wrapper(*args, **kwargs):
             print("Scraping rental information from website...")
             try:
-                func
-                print("Rental information is collected")
-            except:
+                result = func(*args, **kwargs)
+            except Exception:
                 print("Issue arised in scraping")
                 print("Please check if it is in valid format")
+                print("")
+                raise
+            print("Rental information is collected")
             print("")
+            return result
                 
-        return wrapper()
+        return wrapper
         
-    def scraping_summary_view(self, scraping_result):
+    def scraping_summary_view(self, scraping_result, file_scraping_result=None,
+                              cache_status=None, template_status=None):
         """
         Display summary of success and failure cases
 
@@ -163,6 +247,16 @@ class MLS_Command_Line_View:
         ----------
         scraping_result : Dict
             Dictionary of success and failure cases from MLS_scraper.
+        file_scraping_result : Dict, optional
+            Dictionary of success and failure cases of each html file
+            in batch mode, None if the file cannot be read.
+            The default is None.
+        cache_status : Dict, optional
+            Number of cache hit and miss, None if there is no cache.
+            The default is None.
+        template_status : Dict, optional
+            Number of extraction template hit and miss, None if templates
+            are not used. The default is None.
 
         Returns
         -------
@@ -171,8 +265,116 @@ class MLS_Command_Line_View:
         """
         
         print("Summary:")
+        
+        if file_scraping_result is not None:
+            for html_path, file_result in file_scraping_result.items():
+                if file_result is None:
+                    print(f"{html_path}: Issue arised in loading MLS website")
+                else:
+                    print(f"{html_path}: "
+                          f"Succeed: {len(file_result['success'])}, "
+                          f"Failure: {len(file_result['failure'])}")
+            print("")
+            print("Total:")
+        
         print(f"Succeed: {len(scraping_result['success'])}")
         print(f"Failure: {len(scraping_result['failure'])}")
+        
+        if cache_status is not None:
+            print(f"Cache hit: {cache_status['hit']}")
+            print(f"Cache miss: {cache_status['miss']}")
+        
+        if template_status is not None:
+            total = template_status['hit'] + template_status['miss']
+            hit_rate = template_status['hit'] / total if total else 0.0
+            print(f"Template hit: {template_status['hit']} / {total} "
+                  f"({hit_rate:.1%})")
+        print("")
+        
+    def diff_summary_view(self, diff_summary):
+        """
+        Display number of added, changed and removed rentals
+
+        Parameters
+        ----------
+        diff_summary : Dict
+            Number of added, changed and removed rentals.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        print("Compared with previous output:")
+        print(f"Added: {diff_summary['added']}")
+        print(f"Changed: {diff_summary['changed']}")
+        print(f"Removed: {diff_summary['removed']}")
+        print("")
+        
+    def jsonl_output_view(self, rental_count):
+        """
+        Display the number of rentals written to the json lines output
+
+        Parameters
+        ----------
+        rental_count : Int
+            Number of rentals written.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        print(f"{rental_count} rentals were written as json lines")
+        print("")
+        
+    def write_status_view(self, write_status):
+        """
+        Display the number of rentals written to the database
+
+        Parameters
+        ----------
+        write_status : Dict
+            Number of rentals, rooms and unchanged rentals.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        print("Database updated:")
+        print(f"Rentals written: {write_status['units']}")
+        print(f"Rooms written: {write_status['rooms']}")
+        print(f"Rentals unchanged: {write_status['unchanged']}")
+        print("")
+        
+    def normalization_failure_view(self, failure_count):
+        """
+        Display the number of values that failed to be normalized
+
+        Parameters
+        ----------
+        failure_count : Dict
+            Number of values that failed to be normalized in each column.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        failed_columns = {column: count for column, count in failure_count.items()
+                          if count > 0}
+        
+        if not failed_columns:
+            print("All values were normalized")
+        else:
+            print("Values kept empty as they cannot be normalized:")
+            for column, count in failed_columns.items():
+                print(f"{column}: {count}")
         print("")
         
     def output_rental_information_view(self, func):
@@ -192,15 +394,320 @@ class MLS_Command_Line_View:
 
         """
         
-        def wrapper():
-            print("Output rental information to {self.param_alias['output']}...")
+        def wrapper(*args, **kwargs):
+            print(f"Output rental information to {self.param_alias['output']}...")
             try:
-                func
-                print("Unit and room attributes were saved")
-            except:
-                print("Issue arised in scraping")
+                result = func(*args, **kwargs)
+            except Exception:
+                print("Issue arised in saving the output")
                 print("Please check the directory of file output")
+                print("")
+                raise
+            print("Unit and room attributes were saved")
             print("")
+            return result
+        
+        return wrapper
+        
+    def stage_metrics_view(self, stage_metrics, slowest_listings,
+                           failed_listings=(0, 0.0)):
+        """
+        Display the time and peak memory of each stage,
+        the slowest rentals to extract and the time spent on failed rentals
+
+        Parameters
+        ----------
+        stage_metrics : Dict
+            Wall time, CPU time and peak memory of each stage.
+        slowest_listings : List
+            Tuples of MLS number and extraction time of the succeeded
+            rentals, slowest first.
+        failed_listings : Tuple, optional
+            Number of failed rentals and their extraction time.
+            The default is (0, 0.0).
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        print("Timing:")
+        for stage, metrics in stage_metrics.items():
+            line = (f"{stage}: {metrics['wall_time']:.3f} s "
+                    f"(CPU {metrics['cpu_time']:.3f} s)")
+            if metrics['peak_rss_mb'] is not None:
+                line += f", peak memory {metrics['peak_rss_mb']:.0f} MB"
+            print(line)
+        
+        if slowest_listings:
+            print("Slowest rentals to extract:")
+            for MLS_num, elapsed in slowest_listings:
+                print(f"{MLS_num}: {elapsed * 1000:.1f} ms")
+        
+        failed_count, failed_time = failed_listings
+        if failed_count:
+            print(f"Failed rentals: {failed_count}, "
+                  f"{failed_time * 1000:.1f} ms in total")
+        print("")
+        
+    def watch_start_view(self, folder, mechanism):
+        """
+        Display the start of the watch mode
+
+        Parameters
+        ----------
+        folder : Str
+            Watched folder.
+        mechanism : Str
+            How the folder is watched, inotify or polling.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        print(f"Watching {folder} by {mechanism}...")
+        print("Press Ctrl+C to stop")
+        print("")
+        
+    def watch_file_view(self, html_path, scraping_result):
+        """
+        Display the result of a html file scraped in the watch mode
+
+        Parameters
+        ----------
+        html_path : Str
+            Path of the MLS html.
+        scraping_result : Dict
+            Dictionary of success and failure cases,
+            None if the file cannot be read.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        if scraping_result is None:
+            print(f"{html_path}: Issue arised in loading MLS website")
+        else:
+            print(f"{html_path}: "
+                  f"Succeed: {len(scraping_result['success'])}, "
+                  f"Failure: {len(scraping_result['failure'])}")
+        
+    def watch_stop_view(self, file_count):
+        """
+        Display the end of the watch mode
+
+        Parameters
+        ----------
+        file_count : Int
+            Number of html files scraped.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        print("")
+        print(f"Stopped watching, {file_count} files were scraped")
+        
+    def serve_start_view(self, url, workers):
+        """
+        Display the start of the HTTP service
+
+        Parameters
+        ----------
+        url : Str
+            Url the html is posted to.
+        workers : Int
+            Number of worker processes.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        print(f"Serving {url} with {workers} workers...")
+        print("Press Ctrl+C to stop")
+        print("")
+        
+    def serve_stop_view(self, request_count):
+        """
+        Display the end of the HTTP service
+
+        Parameters
+        ----------
+        request_count : Dict
+            Number of requests answered by status code.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        print("")
+        print(f"Stopped serving, {sum(request_count.values())} requests "
+              "were answered")
+        for status, count in sorted(request_count.items()):
+            print(f"{status}: {count}")
+        
+    def error_not_indexable(self, path):
+        """
+        Display error message of a html that cannot be indexed
+
+        Parameters
+        ----------
+        path : Str
+            Path of the html.
+
+        Returns
+        -------
+        None.
+
+        """
+        print(f"Error: {path} is compressed or archived")
+        print("Only plain html can be indexed, please extract it first")
+        print("")
+        
+    def listing_view(self, MLS_num, rental):
+        """
+        Display a rental looked up by its MLS number
+
+        Parameters
+        ----------
+        MLS_num : Str
+            MLS number of the rental.
+        rental : Tuple or None
+            Unit attributes and room attributes of the rental, None if it
+            cannot be found.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        if rental is None:
+            print(f"MLS#:{MLS_num} cannot be found")
+            print("")
+            return
+        
+        attribute_dict, room_table = rental
+        print(f"MLS#:{MLS_num}")
+        print(json.dumps({'unit_attributes': attribute_dict,
+                          'rooms': room_table},
+                         indent=2, ensure_ascii=False))
+        print("")
+        
+    def query_index_view(self, built, rental_count, seconds):
+        """
+        Display the indexes of the queries
+
+        Parameters
+        ----------
+        built : Bool
+            Whether the indexes were built, instead of loaded.
+        rental_count : Int
+            Number of indexed rentals.
+        seconds : Float
+            Time of building or loading the indexes.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        action = "Built" if built else "Loaded"
+        print(f"{action} indexes of {rental_count} rentals in "
+              f"{seconds * 1000:.0f} ms")
+        print("")
+        
+    def error_query_view(self, error):
+        """
+        Display error message of a query that cannot be answered
+
+        Parameters
+        ----------
+        error : ValueError
+            Reason the query cannot be answered.
+
+        Returns
+        -------
+        None.
+
+        """
+        print(f"Error: {error}")
+        print("")
+        
+    def query_result_view(self, MLS_numbers, values, fields, match_count,
+                          seconds):
+        """
+        Display the rentals matching a query
+
+        Parameters
+        ----------
+        MLS_numbers : List
+            MLS numbers of the rentals shown.
+        values : List
+            Dictionary of the attributes shown of each rental.
+        fields : List
+            Attributes shown.
+        match_count : Int
+            Number of rentals matching the query.
+        seconds : Float
+            Time of answering the query.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        print(f"{match_count} rentals matched in {seconds * 1000:.2f} ms")
+        print("")
+        
+        rows = [['MLS#', *fields]]
+        rows += [[MLS_num, *[value.get(field) or '' for field in fields]]
+                 for MLS_num, value in zip(MLS_numbers, values)]
+        widths = [max(len(row[column]) for row in rows)
+                  for column in range(len(rows[0]))]
+        for row in rows:
+            print("  ".join(cell.ljust(width)
+                            for cell, width in zip(row, widths)).rstrip())
+        
+        if match_count > len(MLS_numbers):
+            print(f"... {match_count - len(MLS_numbers)} more")
+        print("")
+        
+    def merge_summary_view(self, merge_status):
+        """
+        Display the summary of the merge of outputs
+
+        Parameters
+        ----------
+        merge_status : Dict
+            Number of snapshots, records read, runs written, merge passes
+            and rentals merged.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        print(f"Merged {merge_status['records']} records of "
+              f"{merge_status['snapshots']} snapshots into "
+              f"{merge_status['rentals']} rentals")
+        print(f"Runs: {merge_status['runs']}, "
+              f"Merge passes: {merge_status['passes']}")
+        print("")
         
     def ending(self):
         """
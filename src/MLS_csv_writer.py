@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_CSV_Writer
+Description: Csv output of scraped rentals with the standard library
+"""
+
+import csv
+import os
+
+# File names of the tables, without extension, the same as the dataframes
+UNIT_ATTRS_FILE_NAME = 'MLS_unit_attrs_df'
+ROOM_FILE_NAME = 'MLS_room_df'
+
+"""
+Class: MLS_CSV_Writer
+"""
+
+
+class MLS_CSV_Writer:
+
+    def __init__(self):
+        """
+        Initialize the csv output of rental information.
+        The files are the same, byte for byte, as the dataframes saved by
+        pandas to_csv, without building the dataframes or importing pandas.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        # Dialect of pandas to_csv: minimal quoting and the line ending
+        # of the platform
+        self.line_terminator = os.linesep
+
+    def output_rental_information(self, column_builder, directory):
+        """
+        Save the unit attributes and room attributes
+
+        Parameters
+        ----------
+        column_builder : MLS_Column_Builder
+            Column buffers of the scraped rentals.
+        directory : Str
+            Directory of the output to be saved.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        tables = {UNIT_ATTRS_FILE_NAME: column_builder.get_unit_attrs_columns(),
+                  ROOM_FILE_NAME: column_builder.get_room_columns()}
+
+        for file_name, (index, columns) in tables.items():
+            self.write_table(os.path.join(directory, file_name + '.csv'),
+                             index, columns)
+
+    def write_table(self, file_path, index, columns):
+        """
+        Save a table as csv, with the index as first column without header
+
+        Parameters
+        ----------
+        file_path : Str
+            Path of the csv file.
+        index : List
+            Index of each row, e.g. MLS number.
+        columns : Dict
+            Value list of each column, None for empty values.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        fp, writer = self.open_table(file_path, columns)
+        with fp:
+            # Empty values are written as empty fields, like missing
+            # values of a dataframe
+            writer.writerows(
+                [label, *['' if value is None else value for value in row]]
+                for label, *row in zip(index, *columns.values()))
+
+    def open_table(self, file_path, columns):
+        """
+        Open a csv file and write its header, so rows can be written one
+        at a time, e.g. while they are merged
+
+        Parameters
+        ----------
+        file_path : Str
+            Path of the csv file.
+        columns : Iterable
+            Name of the columns after the index.
+
+        Returns
+        -------
+        fp : File object
+            Csv file, to be closed once all the rows are written.
+        writer : csv.writer
+            Writer of the rows, the index as first field.
+
+        """
+
+        fp = open(file_path, 'w', newline='', encoding='utf-8')
+        writer = csv.writer(fp, lineterminator=self.line_terminator)
+        writer.writerow(['', *columns])
+        return fp, writer
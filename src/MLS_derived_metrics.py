@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_Derived_Metrics
+Description: Vectorized per-rental metrics derived from the unit attributes and room attributes
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from MLS_normalizer import MLS_Normalizer
+
+# File name of the derived metrics, without suffix and extension
+DERIVED_METRICS_FILE_NAME = 'MLS_derived_metrics'
+
+# Room names of a bedroom, e.g. Prim Bdrm, 2nd Br, Bedroom
+BEDROOM_PATTERN = r'(?i)\b(?:bdrm|br|bedroom)\b'
+
+# Derived metrics in their order
+DERIVED_METRICS = ['Total Room Area',
+                   'Measured Rooms',
+                   'Largest Bedroom Area',
+                   'Area per Room',
+                   'Price per Sqft',
+                   'Price per Bedroom']
+
+"""
+Class: MLS_Derived_Metrics
+"""
+
+
+class MLS_Derived_Metrics:
+
+    def __init__(self):
+        """
+        Initialize the derived metrics of the rentals.
+        Each column is parsed once with the rules of MLS_Normalizer, and the
+        rooms are aggregated by MLS# with grouped operations, never rental
+        by rental. Room areas are in the unit of Length and Width.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.normalizer = MLS_Normalizer()
+
+    def _get_numbers(self, df, column, rule):
+        """
+        Parse a column of scraped strings into numbers
+
+        Parameters
+        ----------
+        df : pandas dataframe
+            Dataframe of unit attributes or room attributes.
+        column : Str
+            Name of the column.
+        rule : Str
+            Normalization rule of the column, e.g. price or float.
+
+        Returns
+        -------
+        numpy array or pandas dataframe
+            Number of each row, nan if it is missing or cannot be parsed,
+            or the numbers of each part of the column if it is split.
+
+        """
+
+        if column not in df.columns:
+            return np.full(len(df), np.nan)
+
+        values = self.normalizer.convert_column(df[column], rule)
+
+        if isinstance(values, pd.DataFrame):
+            return values.astype('float64')
+        return values.to_numpy(dtype='float64', na_value=np.nan)
+
+    def _get_sqft(self, unit_attrs_df):
+        """
+        Get the square footage of each rental from its Apx Sqft range,
+        the middle of the range, or its bound if the range is open
+
+        Parameters
+        ----------
+        unit_attrs_df : pandas dataframe
+            Dataframe of unit attributes.
+
+        Returns
+        -------
+        numpy array
+            Square footage of each rental, nan if it is unknown.
+
+        """
+
+        if 'Apx Sqft' not in unit_attrs_df.columns:
+            return np.full(len(unit_attrs_df), np.nan)
+
+        bounds = self._get_numbers(unit_attrs_df, 'Apx Sqft', 'range')
+        low = bounds['Low'].to_numpy()
+        high = bounds['High'].to_numpy()
+
+        return np.where(np.isnan(high), low,
+                        np.where(np.isnan(low), high, (low + high) / 2))
+
+    def _divide(self, numerator, denominator):
+        """
+        Divide the metrics, nan if the denominator is not positive
+
+        Parameters
+        ----------
+        numerator : numpy array
+            Numerator of each rental.
+        denominator : numpy array
+            Denominator of each rental.
+
+        Returns
+        -------
+        numpy array
+            Ratio of each rental.
+
+        """
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(denominator > 0, numerator / denominator, np.nan)
+
+    def get_room_metrics(self, room_df):
+        """
+        Aggregate the area of the rooms of each rental
+
+        Parameters
+        ----------
+        room_df : pandas dataframe
+            Dataframe of room attributes, indexed by MLS number
+            with a row per room.
+
+        Returns
+        -------
+        pandas dataframe
+            Total Room Area, Measured Rooms and Largest Bedroom Area
+            of each MLS number with rooms.
+
+        """
+
+        area = (self._get_numbers(room_df, 'Length', 'float')
+                * self._get_numbers(room_df, 'Width', 'float'))
+
+        if 'Room' in room_df.columns:
+            is_bedroom = room_df['Room'].astype('string').str.contains(
+                BEDROOM_PATTERN, regex=True).fillna(False).to_numpy(dtype=bool)
+        else:
+            is_bedroom = np.zeros(len(room_df), dtype=bool)
+
+        # A single hash grouping by MLS number for all the aggregations
+        rooms = pd.DataFrame({'Total Room Area': area,
+                              'Measured Rooms': ~np.isnan(area),
+                              'Largest Bedroom Area': np.where(is_bedroom,
+                                                               area, np.nan)},
+                             index=room_df.index)
+        grouped = rooms.groupby(level=0, sort=False)
+
+        return pd.DataFrame({
+            'Total Room Area': grouped['Total Room Area'].sum(min_count=1),
+            'Measured Rooms': grouped['Measured Rooms'].sum(),
+            'Largest Bedroom Area': grouped['Largest Bedroom Area'].max()})
+
+    def compute(self, unit_attrs_df, room_df):
+        """
+        Compute the derived metrics of each rental
+
+        Parameters
+        ----------
+        unit_attrs_df : pandas dataframe
+            Dataframe of unit attributes, indexed by MLS number.
+        room_df : pandas dataframe
+            Dataframe of room attributes, indexed by MLS number
+            with a row per room.
+
+        Returns
+        -------
+        metrics_df : pandas dataframe
+            DERIVED_METRICS of each rental, indexed by MLS number as
+            unit_attrs_df. Metrics are missing if their attributes are.
+
+        """
+
+        # Joined back to the rentals by MLS number
+        room_metrics = self.get_room_metrics(room_df).reindex(unit_attrs_df.index)
+        total_area = room_metrics['Total Room Area'].to_numpy(dtype='float64')
+        measured_rooms = room_metrics['Measured Rooms'].fillna(0).to_numpy(
+            dtype='int64')
+
+        price = self._get_numbers(unit_attrs_df, 'List', 'price')
+        bedrooms = self._get_numbers(unit_attrs_df, 'Bedrooms', 'count')
+
+        metrics_df = pd.DataFrame({
+            'Total Room Area': total_area,
+            'Measured Rooms': measured_rooms,
+            'Largest Bedroom Area': room_metrics['Largest Bedroom Area'].to_numpy(
+                dtype='float64'),
+            # Average of the measured rooms, Rms also counts the others
+            'Area per Room': self._divide(total_area, measured_rooms),
+            'Price per Sqft': self._divide(price, self._get_sqft(unit_attrs_df)),
+            'Price per Bedroom': self._divide(price, bedrooms)},
+            index=unit_attrs_df.index)
+
+        return metrics_df[DERIVED_METRICS]
+
+    def output_derived_metrics(self, metrics_df, directory, file_format=None):
+        """
+        Save the derived metrics next to the unit attributes and room attributes
+
+        Parameters
+        ----------
+        metrics_df : pandas dataframe
+            Derived metrics of each rental.
+        directory : Str
+            Directory of the output to be saved.
+        file_format : Str, optional
+            json, parquet or arrow (pyarrow is required), otherwise csv.
+            The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if file_format in ['parquet', 'arrow']:
+            from MLS_arrow_writer import MLS_Arrow_Writer
+            writer = MLS_Arrow_Writer()
+            writer.write_table(writer.to_table(metrics_df, {}), directory,
+                               DERIVED_METRICS_FILE_NAME, file_format)
+        elif file_format == 'json':
+            metrics_df.to_json(os.path.join(
+                directory, DERIVED_METRICS_FILE_NAME + '_dict.json'),
+                orient='index')
+        else:
+            metrics_df.to_csv(os.path.join(
+                directory, DERIVED_METRICS_FILE_NAME + '_df.csv'))
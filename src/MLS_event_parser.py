@@ -0,0 +1,513 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_Event_Parser
+Description: Single-pass event-driven extraction of MLS html without a DOM
+"""
+
+from html.parser import HTMLParser
+import json
+import re
+
+# Class of the div containing the information of a rental
+LISTING_CLASS = re.compile("^link-item status-")
+
+# Class and style of the blocks read by MLS_Scraper_Module
+FORMGROUP_CLASS = re.compile("^formitem formgroup")
+FORMGROUP_STYLE = re.compile(r"^width:\d+[px|\%]")
+VERTICAL_CLASS = "formitem formgroup vertical"
+HORIZONTAL_CLASS = "formitem formgroup horizontal"
+ADDRESS_STYLE = "width:325px"
+BOLD_STYLE = "font-weight:bold"
+
+# Elements without end tag
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                 'keygen', 'link', 'menuitem', 'meta', 'param', 'source',
+                 'track', 'wbr', 'basefont', 'bgsound', 'command', 'frame',
+                 'image', 'isindex', 'nextid', 'spacer'}
+
+# Elements whose text is not part of the text of their parents
+NON_TEXT_ELEMENTS = {'script', 'style', 'template'}
+
+# Label value of a label without next sibling
+MISSING = None
+
+"""
+Class: MLS_Event_Parser
+"""
+
+
+class MLS_Event_Parser(HTMLParser):
+
+    def __init__(self):
+        """
+        Initialize the event-driven parser of MLS html.
+        Only the blocks, labels and values read by MLS_Scraper_Module are kept,
+        no tree of the html is built.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        super().__init__(convert_charrefs=True)
+
+        # Open elements, from the root to the current element
+        self.stack = []
+
+        # Rental section being parsed
+        self.listing = None
+
+        # Rental sections completed and not yet returned by parse()
+        self.listings = []
+
+        # Text buffers of the open elements whose text is needed
+        self.text_buffers = []
+
+        # Depth of open elements whose text is ignored
+        self.non_text_depth = 0
+
+    def parse(self, html_chunks):
+        """
+        Parse html chunk by chunk and return the rental sections as they end
+
+        Parameters
+        ----------
+        html_chunks : Iterable
+            Html text in chunks.
+
+        Yields
+        ------
+        listing : MLS_Listing_Record
+            Blocks, labels and values of a rental section.
+
+        """
+
+        for html_chunk in html_chunks:
+            self.feed(html_chunk)
+            yield from self._pop_listings()
+
+        self.close()
+        yield from self._pop_listings()
+
+    def _pop_listings(self):
+        """
+        Return the completed rental sections
+
+        Returns
+        -------
+        listings : List
+            MLS_Listing_Record of the completed rental sections.
+
+        """
+        listings, self.listings = self.listings, []
+        return listings
+
+    def handle_starttag(self, tag, attrs):
+        """
+        Open an element
+
+        Parameters
+        ----------
+        tag : Str
+            Name of the element.
+        attrs : List
+            Name and value of the attributes.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        attrs = {name: '' if value is None else value for name, value in attrs}
+        parent = self.stack[-1] if self.stack else None
+        element = _Element(tag)
+
+        if self.listing is not None:
+            self._start_listing_element(element, parent, attrs)
+        elif tag == 'div' and LISTING_CLASS.search(
+                ' '.join(attrs.get('class', '').split())):
+            self.listing = MLS_Listing_Record(attrs)
+            element.is_listing = True
+
+        if tag in NON_TEXT_ELEMENTS:
+            self.non_text_depth += 1
+
+        self.stack.append(element)
+
+        if tag in VOID_ELEMENTS:
+            self._close_element(self.stack.pop())
+
+    def handle_startendtag(self, tag, attrs):
+        """
+        Open and close an element written as <tag/>
+
+        Parameters
+        ----------
+        tag : Str
+            Name of the element.
+        attrs : List
+            Name and value of the attributes.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        """
+        Close the most recent open element of the same name,
+        and every element opened after it
+
+        Parameters
+        ----------
+        tag : Str
+            Name of the element.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        for position in range(len(self.stack) - 1, -1, -1):
+            if self.stack[position].tag == tag:
+                break
+        else:
+            # End tag without start tag is ignored
+            return
+
+        while len(self.stack) > position:
+            self._close_element(self.stack.pop())
+
+    def handle_data(self, data):
+        """
+        Add text to the open elements whose text is needed
+
+        Parameters
+        ----------
+        data : Str
+            Text of the html.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if self.non_text_depth == 0:
+            for text_buffer in self.text_buffers:
+                text_buffer.append(data)
+
+    def _start_listing_element(self, element, parent, attrs):
+        """
+        Record an element opened inside a rental section
+
+        Parameters
+        ----------
+        element : _Element
+            Element opened.
+        parent : _Element
+            Parent of the element.
+        attrs : Dict
+            Attributes of the element.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        listing = self.listing
+        tag = element.tag
+
+        # The first element after a label gives the value of the label
+        if parent.pending_label is not None:
+            element.label_of = parent.pending_label
+            parent.pending_label = None
+            self._start_text(element)
+
+        # Blocks of the rental, in the order of their start tags
+        if tag == 'div':
+            div_class = ' '.join(attrs.get('class', '').split())
+            if FORMGROUP_CLASS.search(div_class):
+                block = _Block(div_class, attrs.get('style'))
+                listing.blocks.append(block)
+                element.block = block
+                listing.open_blocks.append(block)
+
+        elif tag == 'label':
+            label = _Label()
+            element.label = label
+            for block in listing.open_blocks:
+                block.labels.append(label)
+            self._start_text(element)
+
+        elif tag == 'span' and 'value' in attrs.get('class', '').split():
+            span = _Span(attrs.get('style') == BOLD_STYLE)
+            element.span = span
+            for block in listing.open_blocks:
+                block.spans.append(span)
+            self._start_text(element)
+
+    def _start_text(self, element):
+        """
+        Start to collect the text of an element
+
+        Parameters
+        ----------
+        element : _Element
+            Element whose text is needed.
+
+        Returns
+        -------
+        None.
+
+        """
+        if element.text_buffer is None:
+            element.text_buffer = []
+            self.text_buffers.append(element.text_buffer)
+
+    def _close_element(self, element):
+        """
+        Close an element and save the text collected for it
+
+        Parameters
+        ----------
+        element : _Element
+            Element closed.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if element.tag in NON_TEXT_ELEMENTS:
+            self.non_text_depth -= 1
+
+        if element.text_buffer is not None:
+            # Removed by identity, an enclosing buffer may hold the same text
+            for position in range(len(self.text_buffers) - 1, -1, -1):
+                if self.text_buffers[position] is element.text_buffer:
+                    del self.text_buffers[position]
+                    break
+            text = ''.join(element.text_buffer)
+
+            if element.label_of is not None:
+                element.label_of.value = text
+            if element.label is not None:
+                element.label.text = text
+            if element.span is not None:
+                element.span.text = text
+
+        # The value of the label is the next element under the same parent
+        if element.label is not None and self.stack:
+            self.stack[-1].pending_label = element.label
+
+        if element.block is not None:
+            self.listing.open_blocks.remove(element.block)
+
+        if element.is_listing:
+            self.listing.open_blocks = []
+            self.listings.append(self.listing)
+            self.listing = None
+
+
+"""
+Class: MLS_Listing_Record
+"""
+
+
+class MLS_Listing_Record:
+
+    def __init__(self, attrs):
+        """
+        Initialize the record of a rental section
+
+        Parameters
+        ----------
+        attrs : Dict
+            Attributes of the div of the rental section.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        # Attributes of the rental section, id is the MLS number
+        self.attrs = attrs
+
+        # Blocks of the rental in the order of their start tags
+        self.blocks = []
+
+        # Blocks open while parsing
+        self.open_blocks = []
+
+    def __str__(self):
+        """
+        Serialize everything read from the rental section,
+        e.g. as the key of the cache
+
+        Returns
+        -------
+        Str
+            Attributes, blocks, labels and values of the rental section.
+
+        """
+        return json.dumps([self.attrs,
+                           [[block.div_class, block.style,
+                             [[label.text, label.value] for label in block.labels],
+                             [[span.text, span.bold] for span in block.spans]]
+                            for block in self.blocks]])
+
+    def get_rental_information(self, address_variable, room_attribute_variable):
+        """
+        Get rental information of the rental section, in the same way as
+        MLS_Scraper_Module.get_rental_information()
+
+        Parameters
+        ----------
+        address_variable : List
+            Variable name of the address.
+        room_attribute_variable : List
+            Variable name of the room table.
+
+        Raises
+        ------
+        ValueError
+            If a label has no value.
+        IndexError
+            If the address or room table is incomplete.
+
+        Returns
+        -------
+        attribute_dict : Dict
+            Unit attributes of rental.
+        room_table : Dict
+            Room attributes of rental.
+
+        """
+
+        attribute_dict = {}
+
+        # address of rental
+        for block in self.blocks:
+            if block.div_class == VERTICAL_CLASS and block.style == ADDRESS_STYLE:
+                location_query = [span for span in block.spans if span.bold]
+                for count, value in enumerate(address_variable):
+                    attribute_dict[value] = location_query[count].text
+
+        # rental attribute
+        for block in self.blocks:
+            if block.style is not None and FORMGROUP_STYLE.search(block.style):
+                self._add_label_value_pair(attribute_dict, block)
+
+        # rental remarks
+        vertical_blocks = [block for block in self.blocks
+                           if block.div_class == VERTICAL_CLASS]
+        for block in vertical_blocks[-2:]:
+            self._add_label_value_pair(attribute_dict, block)
+
+        # room information
+        room_rows = [block for block in self.blocks
+                     if block.div_class == HORIZONTAL_CLASS]
+        number_of_room = int(room_rows[-2].spans[0].text)
+
+        room_dict = {}
+        for row in room_rows[(-2 - number_of_room + 1):-1]:
+            room_query = row.spans
+            idx = room_query[0].text
+            room_dict[idx] = {}
+            for count, value in enumerate(room_attribute_variable):
+                if count == 0:
+                    continue
+                room_dict[idx][value] = room_query[count].text
+
+        return attribute_dict, room_dict
+
+    def _add_label_value_pair(self, attribute_dict, block):
+        """
+        Add the label-value pairs of a block to the unit attributes
+
+        Parameters
+        ----------
+        attribute_dict : Dict
+            Unit attributes of rental.
+        block : _Block
+            Block of the rental section.
+
+        Raises
+        ------
+        ValueError
+            If a label has no value.
+
+        Returns
+        -------
+        None.
+
+        """
+        for label in block.labels:
+            if label.value is MISSING:
+                raise ValueError(f'Label {label.text} has no value')
+            attribute_dict[label.text[:-1]] = label.value   # remove the colon
+
+
+class _Element:
+    """
+    Open element of the html
+    """
+    __slots__ = ('tag', 'pending_label', 'label_of', 'text_buffer',
+                 'block', 'label', 'span', 'is_listing')
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.pending_label = None
+        self.label_of = None
+        self.text_buffer = None
+        self.block = None
+        self.label = None
+        self.span = None
+        self.is_listing = False
+
+
+class _Block:
+    """
+    Div of class formitem formgroup with the labels and values inside
+    """
+    __slots__ = ('div_class', 'style', 'labels', 'spans')
+
+    def __init__(self, div_class, style):
+        self.div_class = div_class
+        self.style = style
+        self.labels = []
+        self.spans = []
+
+
+class _Label:
+    """
+    Label and the text of its next sibling
+    """
+    __slots__ = ('text', 'value')
+
+    def __init__(self):
+        self.text = ''
+        self.value = MISSING
+
+
+class _Span:
+    """
+    Span of class value
+    """
+    __slots__ = ('text', 'bold')
+
+    def __init__(self, bold):
+        self.text = ''
+        self.bold = bold
@@ -0,0 +1,540 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_Extraction_Template
+Description: Positional extraction templates of rental sections learned from the first rental of each status
+"""
+
+import re
+from MLS_event_parser import (FORMGROUP_CLASS, FORMGROUP_STYLE, VERTICAL_CLASS,
+                              HORIZONTAL_CLASS, ADDRESS_STYLE, BOLD_STYLE)
+
+# Class of a rental section giving its status, e.g. status-new
+STATUS_CLASS = re.compile("^status-")
+
+# Rentals of a status a template is learned from before giving up on it
+LEARN_ATTEMPTS = 5
+
+
+def get_status_type(MLS_info_section):
+    """
+    Get the status type of a rental section from its class
+
+    Parameters
+    ----------
+    MLS_info_section : bs4.element.Tag
+        Html text of a particular MLS information section.
+
+    Returns
+    -------
+    Str or None
+        Status class of the section, e.g. status-new, None if it has none.
+
+    """
+    for value in MLS_info_section.get('class', []):
+        if STATUS_CLASS.match(value):
+            return value
+    return None
+
+
+def get_tag_children(element):
+    """
+    Get the child elements of an element, without its text and comments
+
+    Parameters
+    ----------
+    element : bs4.element.Tag
+        Html element.
+
+    Returns
+    -------
+    List
+        Child elements in their order.
+
+    """
+    return [child for child in element.contents if child.name is not None]
+
+
+def get_path(element, MLS_info_section):
+    """
+    Get the position of an element in a rental section
+
+    Parameters
+    ----------
+    element : bs4.element.Tag
+        Html element inside the section.
+    MLS_info_section : bs4.element.Tag
+        Html text of a particular MLS information section.
+
+    Returns
+    -------
+    Tuple
+        Index of the element among the child elements of its parent,
+        from the child of the section down to the element.
+
+    """
+
+    path = []
+    while element is not MLS_info_section:
+        parent = element.parent
+        path.append(next(index for index, child
+                         in enumerate(get_tag_children(parent))
+                         if child is element))
+        element = parent
+    return tuple(reversed(path))
+
+
+"""
+Class: MLS_Extraction_Template
+"""
+
+
+class MLS_Extraction_Template:
+
+    def __init__(self, address_slots, label_slots, label_checks, label_count,
+                 room_slots, last_row_path, node_sizes, address_variable,
+                 room_attribute_variable):
+        """
+        Initialize the positional template of a rental section layout.
+        Positions are paths of child indices from the section, so the
+        elements are reached directly instead of searched for.
+
+        Parameters
+        ----------
+        address_slots : List
+            Address variable and path of its bold value.
+        label_slots : List
+            Unit attribute and path of the label giving its value,
+            in the order of the attributes.
+        label_checks : List
+            Text and path of each label read by the generic path.
+        label_count : Int
+            Number of labels of the section.
+        room_slots : Tuple
+            Path of the element holding the room rows, index of the first
+            row in it, number of its child elements after the last row and
+            path from each of its children to the row.
+        last_row_path : Tuple
+            Path of the last horizontal block, after the room rows.
+        node_sizes : Dict
+            Number of child elements of each element on the paths, checked
+            before the template is applied.
+        address_variable : List
+            Variable name of the address.
+        room_attribute_variable : List
+            Variable name of the room table.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.address_slots = address_slots
+        self.label_slots = label_slots
+        self.label_checks = label_checks
+        self.label_count = label_count
+        self.room_slots = room_slots
+        self.last_row_path = last_row_path
+        self.address_variable = address_variable
+        self.room_attribute_variable = room_attribute_variable
+
+        # Parents before their children
+        self.node_sizes = sorted(node_sizes.items())
+
+    @classmethod
+    def learn(cls, MLS_info_section, address_variable, room_attribute_variable):
+        """
+        Learn the template of a rental section, finding its blocks, labels
+        and room rows the same way as MLS_Scraper_Module
+
+        Parameters
+        ----------
+        MLS_info_section : bs4.element.Tag
+            Html text of a rental section scraped successfully.
+        address_variable : List
+            Variable name of the address.
+        room_attribute_variable : List
+            Variable name of the room table.
+
+        Returns
+        -------
+        MLS_Extraction_Template or None
+            Template of the section, None if the room rows are not next to
+            each other or hold labels of the unit attributes.
+
+        """
+
+        # Bold values of the address, the last block wins
+        address_slots = {}
+        for lab in MLS_info_section.find_all("div", {"class": VERTICAL_CLASS,
+                                                     "style": ADDRESS_STYLE}):
+            location_query = lab.find_all("span", {"class": "value",
+                                                   "style": BOLD_STYLE})
+            for count, value in enumerate(address_variable):
+                address_slots[value] = location_query[count]
+
+        # Labels of the unit attributes and remarks, the last label wins
+        # while the attribute keeps the position of the first one
+        label_slots = {}
+        labels = {}
+        blocks = MLS_info_section.find_all("div", {"class": FORMGROUP_CLASS,
+                                                   "style": FORMGROUP_STYLE})
+        blocks += MLS_info_section.find_all("div", {"class": VERTICAL_CLASS})[-2:]
+        for block in blocks:
+            for lab in block.find_all("label"):
+                label_slots[lab.text[:-1]] = lab
+                labels[id(lab)] = lab
+
+        # Room rows, before the last horizontal block
+        horizontal_rows = MLS_info_section.find_all("div",
+                                                    {"class": HORIZONTAL_CLASS})
+        number_of_room = int(horizontal_rows[-2].find("span",
+                                                      {"class": "value"}).text)
+        if number_of_room < 1:
+            return None
+        room_rows = horizontal_rows[(-2 - number_of_room + 1):-1]
+
+        row_paths = [get_path(row, MLS_info_section) for row in room_rows]
+        # Rows are the children of the deepest element holding all of them
+        container_path, row_suffix = None, None
+        for depth in reversed(range(len(row_paths[0]))):
+            if all(path[:depth] == row_paths[0][:depth]
+                   and path[depth + 1:] == row_paths[0][depth + 1:]
+                   and path[depth] == row_paths[0][depth] + count
+                   for count, path in enumerate(row_paths)):
+                container_path = row_paths[0][:depth]
+                row_suffix = row_paths[0][depth + 1:]
+                first_row = row_paths[0][depth]
+                break
+        if container_path is None:
+            return None
+
+        container = MLS_info_section
+        for index in container_path:
+            container = get_tag_children(container)[index]
+        room_tail = len(get_tag_children(container)) - first_row - number_of_room
+
+        # Paths of the values and of the last horizontal block
+        address_paths = [(value, get_path(span, MLS_info_section))
+                         for value, span in address_slots.items()]
+        label_paths = [(label, get_path(lab, MLS_info_section))
+                       for label, lab in label_slots.items()]
+        label_checks = [(lab.text, get_path(lab, MLS_info_section))
+                        for lab in labels.values()]
+        last_row_path = get_path(horizontal_rows[-1], MLS_info_section)
+
+        paths = [path for _, path in address_paths]
+        paths += [path for _, path in label_checks]
+        paths += [last_row_path, container_path]
+
+        # Child elements of the container change with the number of rooms
+        node_sizes = {}
+        for path in paths:
+            if path[:len(container_path)] == container_path and path != container_path:
+                return None
+            element = MLS_info_section
+            for depth, index in enumerate(path):
+                children = get_tag_children(element)
+                if path[:depth] != container_path:
+                    node_sizes[path[:depth]] = len(children)
+                element = children[index]
+
+        return cls(address_paths, label_paths, label_checks,
+                   len(MLS_info_section.find_all("label")),
+                   (container_path, first_row, room_tail, row_suffix),
+                   last_row_path, node_sizes, address_variable,
+                   room_attribute_variable)
+
+    def _get_rows(self, container):
+        """
+        Get the room rows of the room container
+
+        Parameters
+        ----------
+        container : bs4.element.Tag
+            Element holding the room rows.
+
+        Returns
+        -------
+        List or None
+            Room rows, None if the rows differ from the template.
+
+        """
+
+        container_path, first_row, room_tail, row_suffix = self.room_slots
+        children = get_tag_children(container)
+
+        rows = []
+        for row in children[first_row:len(children) - room_tail]:
+            for index in row_suffix:
+                row_children = get_tag_children(row)
+                if index >= len(row_children):
+                    return None
+                row = row_children[index]
+            if (row.name != 'div'
+                    or ' '.join(row.get('class', [])) != HORIZONTAL_CLASS):
+                return None
+            rows.append(row)
+
+        return rows
+
+    def apply(self, MLS_info_section):
+        """
+        Read the rental information of a rental section with the template.
+        The elements on the paths are checked to be those of the template,
+        e.g. the same labels and the same number of child elements.
+
+        Parameters
+        ----------
+        MLS_info_section : bs4.element.Tag
+            Html text of a particular MLS information section.
+
+        Returns
+        -------
+        Tuple or None
+            Unit attributes and room attributes of the rental, None if the
+            section does not have the layout of the template.
+
+        """
+
+        # Elements on the paths, checked from the section downwards
+        nodes = {(): MLS_info_section}
+        for path, size in self.node_sizes:
+            element = nodes.get(path)
+            if element is None:
+                element = get_tag_children(nodes[path[:-1]])[path[-1]]
+                nodes[path] = element
+            children = get_tag_children(element)
+            if len(children) != size:
+                return None
+            for index, child in enumerate(children):
+                nodes[path + (index,)] = child
+
+        try:
+            attribute_dict = {}
+            for value, path in self.address_slots:
+                span = nodes[path]
+                if (span.name != 'span' or span.get('style') != BOLD_STYLE
+                        or 'value' not in span.get('class', [])):
+                    return None
+                attribute_dict[value] = span.text
+
+            # Same labels, and no other label the generic path would read
+            for text, path in self.label_checks:
+                lab = nodes[path]
+                if lab.name != 'label' or lab.text != text:
+                    return None
+            if len(MLS_info_section.find_all("label")) != self.label_count:
+                return None
+
+            for label, path in self.label_slots:
+                attribute_dict[label] = nodes[path].find_next_sibling().text
+
+            last_row = nodes[self.last_row_path]
+            if ' '.join(last_row.get('class', [])) != HORIZONTAL_CLASS:
+                return None
+
+            rows = self._get_rows(nodes[self.room_slots[0]])
+            if not rows or int(rows[-1].find(
+                    "span", {"class": "value"}).text) != len(rows):
+                return None
+
+            room_table = {}
+            for row in rows:
+                room_query = row.find_all("span", {"class": "value"})
+                room_table[room_query[0].text] = {
+                    value: room_query[count].text
+                    for count, value in enumerate(self.room_attribute_variable)
+                    if count > 0}
+        except (AttributeError, IndexError, KeyError, ValueError):
+            return None
+
+        return attribute_dict, room_table
+
+
+"""
+Class: MLS_Template_Extractor
+"""
+
+
+class MLS_Template_Extractor:
+
+    def __init__(self, address_variable, room_attribute_variable):
+        """
+        Initialize the extractor of rental sections by templates.
+        A template is learned from the first rental of each status type
+        scraped by the generic path, and applied to the following rentals
+        of the status. If it cannot be learned, it is learned again from
+        the next rentals of the status, up to LEARN_ATTEMPTS rentals.
+        Rentals of another layout fall back to the generic path one by one.
+
+        Parameters
+        ----------
+        address_variable : List
+            Variable name of the address.
+        room_attribute_variable : List
+            Variable name of the room table.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.address_variable = address_variable
+        self.room_attribute_variable = room_attribute_variable
+
+        # Template of each status type, only once it is learned
+        self.templates = {}
+
+        # Number of rentals of each status type a template was learned from
+        self.learn_attempts = {}
+
+        # Number of rentals read by a template, or by the generic path
+        self.template_status = {'hit': 0, 'miss': 0}
+
+    def extract(self, MLS_info_section, get_rental_information):
+        """
+        Read the rental information of a rental section
+
+        Parameters
+        ----------
+        MLS_info_section : bs4.element.Tag
+            Html text of a particular MLS information section.
+        get_rental_information : function
+            Generic path, returning the unit attributes and room attributes
+            of a section or raising if they cannot be found.
+
+        Returns
+        -------
+        attribute_dict : Dict
+            Unit attributes of rental.
+        room_table : Dict
+            Room attributes of rental.
+
+        """
+
+        status_type = get_status_type(MLS_info_section)
+        template = self.templates.get(status_type)
+
+        if template is not None:
+            rental = template.apply(MLS_info_section)
+            if rental is not None:
+                self.template_status['hit'] += 1
+                return rental
+
+        self.template_status['miss'] += 1
+        rental = get_rental_information(MLS_info_section)
+
+        attempts = self.learn_attempts.get(status_type, 0)
+        if template is None and attempts < LEARN_ATTEMPTS:
+            self.learn_attempts[status_type] = attempts + 1
+            template = self._learn(MLS_info_section, rental)
+            if template is not None:
+                self.templates[status_type] = template
+
+        return rental
+
+    def _learn(self, MLS_info_section, rental):
+        """
+        Learn the template of a rental section, kept only if it reads the
+        section the same as the generic path
+
+        Parameters
+        ----------
+        MLS_info_section : bs4.element.Tag
+            Html text of a particular MLS information section.
+        rental : Tuple
+            Unit attributes and room attributes read by the generic path.
+
+        Returns
+        -------
+        MLS_Extraction_Template or None
+            Template of the section, None if it cannot be learned.
+
+        """
+
+        try:
+            template = MLS_Extraction_Template.learn(
+                MLS_info_section, self.address_variable,
+                self.room_attribute_variable)
+        except (AttributeError, IndexError, ValueError):
+            return None
+
+        if template is None or not self._is_same_rental(
+                template.apply(MLS_info_section), rental):
+            return None
+        return template
+
+    def _is_same_rental(self, rental, other_rental):
+        """
+        Check if two rentals have the same attributes in the same order.
+        Dictionary comparison ignores the order, which is the order of the
+        columns in the output.
+
+        Parameters
+        ----------
+        rental : Tuple or None
+            Unit attributes and room attributes of a rental.
+        other_rental : Tuple
+            Unit attributes and room attributes of a rental.
+
+        Returns
+        -------
+        Bool
+            True if the rentals are the same.
+
+        """
+
+        if rental is None:
+            return False
+
+        attribute_dict, room_table = rental
+        other_attribute_dict, other_room_table = other_rental
+
+        return (list(attribute_dict.items()) == list(other_attribute_dict.items())
+                and [(room_index, list(room_attrs.items()))
+                     for room_index, room_attrs in room_table.items()]
+                == [(room_index, list(room_attrs.items()))
+                    for room_index, room_attrs in other_room_table.items()])
+
+    def get_template_status(self):
+        """
+        Return the number of rentals read by a template or the generic path
+
+        Returns
+        -------
+        Dict
+            Number of template hit and miss.
+
+        """
+        return dict(self.template_status)
+
+    def add_template_status(self, template_status):
+        """
+        Add the number of template hit and miss of another extractor,
+        e.g. of a worker process
+
+        Parameters
+        ----------
+        template_status : Dict
+            Number of template hit and miss.
+
+        Returns
+        -------
+        None.
+
+        """
+        for status, count in template_status.items():
+            self.template_status[status] += count
+
+    def reset_template_status(self):
+        """
+        Forget the number of template hit and miss, the templates are kept
+
+        Returns
+        -------
+        None.
+
+        """
+        self.template_status = {'hit': 0, 'miss': 0}
@@ -0,0 +1,453 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_Folder_Watcher
+Description: Watch a folder for new or modified MLS html files
+"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import time
+from fnmatch import fnmatch
+from MLS_html_source import HTML_FILE_PATTERNS
+
+# Seconds a file must stay unchanged before it is processed,
+# so files still being written are not read half way
+DEFAULT_DEBOUNCE = 2.0
+
+# Seconds between two scans of the folder without inotify
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Suffix of the json of the processed files, next to the output file
+STATE_FILE_SUFFIX = '.watch_state.json'
+
+"""
+inotify events of a file created, written or moved in, see inotify(7)
+IN_Q_OVERFLOW means events were lost and the folder is scanned again
+"""
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# Header of an inotify event: watch descriptor, mask, cookie, name length
+EVENT_HEADER = struct.Struct('iIII')
+
+# Bytes read from the inotify descriptor at a time
+EVENT_BUFFER_SIZE = 64 * 1024
+
+"""
+Class: MLS_Inotify_Source
+"""
+
+
+class MLS_Inotify_Source:
+
+    def __init__(self, folder):
+        """
+        Watch a folder with inotify of Linux, through ctypes
+
+        Parameters
+        ----------
+        folder : Str
+            Folder to be watched.
+
+        Raises
+        ------
+        OSError
+            If inotify is not available, e.g. not on Linux.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if not sys.platform.startswith('linux'):
+            raise OSError('inotify is only available on Linux')
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6',
+                           use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError('inotify is not supported by the C library')
+
+        self.folder = folder
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f'inotify_add_watch failed on {folder}')
+
+    def wait(self, timeout):
+        """
+        Wait for the files of the folder to change
+
+        Parameters
+        ----------
+        timeout : Float
+            Maximum number of seconds to wait.
+
+        Returns
+        -------
+        List or None
+            Paths of the changed files, None if events were lost
+            and the whole folder has to be scanned.
+
+        """
+
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            buffer = os.read(self.fd, EVENT_BUFFER_SIZE)
+        except BlockingIOError:
+            return []
+
+        paths = []
+        offset = 0
+        while offset < len(buffer):
+            _, mask, _, name_length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset:offset + name_length].rstrip(b'\0')
+            offset += name_length
+
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if name:
+                paths.append(os.path.join(self.folder, os.fsdecode(name)))
+
+        return paths
+
+    def close(self):
+        """
+        Stop watching the folder
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.fd is None:
+            return
+
+        os.close(self.fd)
+        self.fd = None
+
+
+"""
+Class: MLS_Polling_Source
+"""
+
+
+class MLS_Polling_Source:
+
+    def __init__(self, folder, poll_interval=DEFAULT_POLL_INTERVAL):
+        """
+        Watch a folder by scanning it at a regular interval, e.g. for network
+        shares where inotify does not see the files written by other machines
+
+        Parameters
+        ----------
+        folder : Str
+            Folder to be watched.
+        poll_interval : Float, optional
+            Seconds between two scans.
+            The default is DEFAULT_POLL_INTERVAL.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.folder = folder
+        self.poll_interval = poll_interval
+
+    def wait(self, timeout):
+        """
+        Wait until the next scan of the folder
+
+        Parameters
+        ----------
+        timeout : Float
+            Maximum number of seconds to wait.
+
+        Returns
+        -------
+        None
+            The whole folder has to be scanned.
+
+        """
+        time.sleep(min(timeout, self.poll_interval))
+        return None
+
+    def close(self):
+        """
+        Stop watching the folder, nothing to release
+
+        Returns
+        -------
+        None.
+
+        """
+
+
+"""
+Class: MLS_Folder_Watcher
+"""
+
+
+class MLS_Folder_Watcher:
+
+    def __init__(self, folder, state_path, debounce=DEFAULT_DEBOUNCE,
+                 poll_interval=DEFAULT_POLL_INTERVAL, polling=False):
+        """
+        Initialize the watcher of a folder of MLS html files.
+        Each version of a file, identified by its size and modification time,
+        is processed once, also across restarts of the watcher.
+
+        Parameters
+        ----------
+        folder : Str
+            Folder to be watched.
+        state_path : Str
+            Path of the json of the processed files.
+        debounce : Float, optional
+            Seconds a file must stay unchanged before it is processed.
+            The default is DEFAULT_DEBOUNCE.
+        poll_interval : Float, optional
+            Seconds between two scans of the folder without inotify.
+            The default is DEFAULT_POLL_INTERVAL.
+        polling : Bool, optional
+            Whether the folder is scanned even if inotify is available.
+            The default is False.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.folder = folder
+        self.state_path = state_path
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+
+        self.source = None
+        if not polling:
+            try:
+                self.source = MLS_Inotify_Source(folder)
+            except OSError:
+                self.source = None
+        if self.source is None:
+            self.source = MLS_Polling_Source(folder, poll_interval)
+
+        # Size and modification time of the processed files
+        self.processed = self._load_state()
+
+        # Files waiting to stay unchanged: path to (signature, time of change)
+        self.pending = {}
+
+    def get_mechanism(self):
+        """
+        Return how the folder is watched
+
+        Returns
+        -------
+        Str
+            inotify or polling.
+
+        """
+        if isinstance(self.source, MLS_Inotify_Source):
+            return 'inotify'
+        return 'polling'
+
+    def _load_state(self):
+        """
+        Load the processed files of a previous run
+
+        Returns
+        -------
+        Dict
+            Signature of each processed file.
+
+        """
+
+        if not os.path.exists(self.state_path):
+            return {}
+
+        with open(self.state_path) as fp:
+            return {path: tuple(signature)
+                    for path, signature in json.load(fp).items()}
+
+    def _save_state(self):
+        """
+        Save the processed files, replacing the previous state at once
+
+        Returns
+        -------
+        None.
+
+        """
+
+        temp_path = self.state_path + '.tmp'
+        with open(temp_path, 'w') as fp:
+            json.dump(self.processed, fp)
+        os.replace(temp_path, self.state_path)
+
+    def _get_signature(self, path):
+        """
+        Return the size and modification time of a file
+
+        Parameters
+        ----------
+        path : Str
+            Path of the file.
+
+        Returns
+        -------
+        Tuple or None
+            Size and modification time in nanoseconds,
+            None if the file does not exist any more.
+
+        """
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _is_html(self, path):
+        """
+        Whether a path is a MLS html file
+
+        Parameters
+        ----------
+        path : Str
+            Path of the file.
+
+        Returns
+        -------
+        Bool
+            True if the file name matches HTML_FILE_PATTERNS.
+
+        """
+        name = os.path.basename(path).lower()
+        return any(fnmatch(name, pattern) for pattern in HTML_FILE_PATTERNS)
+
+    def _scan_folder(self):
+        """
+        List the MLS html files of the folder
+
+        Returns
+        -------
+        List
+            Paths of the html files.
+
+        """
+        with os.scandir(self.folder) as entries:
+            return [os.path.join(self.folder, entry.name) for entry in entries
+                    if entry.is_file() and self._is_html(entry.name)]
+
+    def _mark_changed(self, paths):
+        """
+        Mark files as changed, they are processed once unchanged for the
+        debounce period. Files of a version already processed are ignored.
+
+        Parameters
+        ----------
+        paths : Iterable
+            Paths of the files that may have changed.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        now = time.monotonic()
+        for path in paths:
+            if not self._is_html(path):
+                continue
+
+            path = os.path.abspath(path)
+            signature = self._get_signature(path)
+            if signature is None or signature == self.processed.get(path):
+                self.pending.pop(path, None)
+                continue
+
+            # Restart the debounce period whenever the file changes again
+            if path not in self.pending or self.pending[path][0] != signature:
+                self.pending[path] = (signature, now)
+
+    def _get_ready_files(self):
+        """
+        Return the files unchanged for the debounce period
+
+        Returns
+        -------
+        List
+            Paths and signatures of the files ready to be processed,
+            in order of path.
+
+        """
+
+        # Files being written have their signature updated here
+        self._mark_changed(list(self.pending))
+
+        now = time.monotonic()
+        return sorted((path, signature)
+                      for path, (signature, changed) in self.pending.items()
+                      if now - changed >= self.debounce)
+
+    def run(self, process_file, should_stop=None):
+        """
+        Process the files of the folder, then keep watching it and process
+        each new or modified file once it stops changing
+
+        Parameters
+        ----------
+        process_file : function
+            Function processing the path of a html file.
+        should_stop : function, optional
+            Function returning True to stop watching, checked after each wait.
+            If it is None, the folder is watched until interrupted.
+            The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self._mark_changed(self._scan_folder())
+
+        try:
+            while should_stop is None or not should_stop():
+                for path, signature in self._get_ready_files():
+                    process_file(path)
+                    self.processed[path] = signature
+                    del self.pending[path]
+                    self._save_state()
+
+                # Wake up in time for the next pending file
+                timeout = self.debounce if self.pending else self.poll_interval
+                changed = self.source.wait(timeout)
+                if changed is None:
+                    changed = self._scan_folder()
+                self._mark_changed(changed)
+        finally:
+            self.source.close()
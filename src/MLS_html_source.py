@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_HTML_Source
+Description: Plain, gzip, zip and MHTML inputs read as bytes and decoded once
+"""
+
+import codecs
+import email
+import email.policy
+import gzip
+import io
+import locale
+import re
+import zipfile
+from fnmatch import fnmatch
+
+# File name patterns of MLS html inputs, plain, compressed or archived
+HTML_FILE_PATTERNS = ['*.html', '*.htm',
+                      '*.html.gz', '*.htm.gz',
+                      '*.zip',
+                      '*.mht', '*.mhtml']
+
+# File name patterns of the html in a zip archive
+ARCHIVED_HTML_PATTERNS = ['*.html', '*.htm']
+
+# First bytes of a gzip file and of a zip archive
+GZIP_MAGIC = b'\x1f\x8b'
+ZIP_MAGIC = b'PK\x03\x04'
+
+# MHTML bundles start with the mail headers of a multipart/related message
+MHTML_HEADER = re.compile(rb'^content-type:\s*multipart/related',
+                          re.IGNORECASE | re.MULTILINE)
+
+# Bytes read from the input at a time, also the most bytes looked at
+# for the <meta> charset
+READ_BUFFER_SIZE = 64 * 1024
+SNIFF_SIZE = 8 * 1024
+
+# Charset of <meta charset="..."> or <meta http-equiv="Content-Type"
+# content="text/html; charset=...">
+META_CHARSET = re.compile(rb'<meta\s[^>]*?charset\s*=\s*["\']?\s*([\w.:-]+)',
+                          re.IGNORECASE)
+
+# Byte order marks and their encoding, the mark is removed while decoding
+BYTE_ORDER_MARKS = [(codecs.BOM_UTF8, 'utf-8-sig'),
+                    (codecs.BOM_UTF16_LE, 'utf-16'),
+                    (codecs.BOM_UTF16_BE, 'utf-16')]
+
+# Start tag of the rental section in the raw html
+LISTING_START = re.compile(rb'<div\s[^>]*class="link-item status-')
+
+# Encoding of a html declaring no charset, the same as reading it as text
+FALLBACK_CHARSET = locale.getpreferredencoding(False)
+
+
+def sniff_charset(head):
+    """
+    Find the encoding of a html from its byte order mark or <meta> tag
+
+    Parameters
+    ----------
+    head : Bytes
+        First bytes of the html.
+
+    Returns
+    -------
+    Str or None
+        Encoding of the html, None if it is not declared or not known.
+
+    """
+
+    for byte_order_mark, charset in BYTE_ORDER_MARKS:
+        if head.startswith(byte_order_mark):
+            return charset
+
+    match = META_CHARSET.search(head)
+    if match is None:
+        return None
+
+    try:
+        charset = codecs.lookup(match.group(1).decode('ascii')).name
+    except LookupError:
+        return None
+
+    # A <meta> tag readable as ascii cannot be in utf-16, see the html standard
+    if charset.startswith('utf-16'):
+        return 'utf-8'
+    return charset
+
+
+"""
+Class: MLS_HTML_Source
+"""
+
+
+class MLS_HTML_Source:
+
+    def __init__(self, html_path):
+        """
+        Initialize the input of a MLS html, which can be plain, compressed by
+        gzip, archived in a zip or saved by a browser as a MHTML bundle.
+        Compressed and archived html is decompressed while it is read,
+        without a temporary file.
+
+        Parameters
+        ----------
+        html_path : Str
+            Path of the MLS html.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.html_path = html_path
+
+        # Input format, html, gzip, zip or mhtml told apart by the first
+        # bytes, and encoding, known once the input is opened
+        self.input_format = None
+        self.charset = None
+
+    def open_binary(self):
+        """
+        Open the html as bytes, decompressed or extracted from its bundle
+
+        Raises
+        ------
+        ValueError
+            If a zip archive or a MHTML bundle contains no html.
+
+        Returns
+        -------
+        io.BufferedReader
+            Bytes of the html, its charset is found by get_charset().
+
+        """
+
+        fp = open(self.html_path, 'rb', buffering=READ_BUFFER_SIZE)
+        head = fp.peek(SNIFF_SIZE)[:SNIFF_SIZE]
+
+        # Encoding declared by the bundle, before any <meta> tag
+        self.charset = None
+
+        if head.startswith(GZIP_MAGIC):
+            fp.close()
+            self.input_format = 'gzip'
+            stream = gzip.open(self.html_path, 'rb')
+        elif head.startswith(ZIP_MAGIC):
+            fp.close()
+            self.input_format = 'zip'
+            stream = self._open_zip_member()
+        elif MHTML_HEADER.search(head) and not head.lstrip().startswith(b'<'):
+            self.input_format = 'mhtml'
+            with fp:
+                stream = self._open_mhtml_part(fp)
+        else:
+            self.input_format = 'html'
+            return fp
+
+        # Buffered again, so the first bytes can be looked at without
+        # being consumed
+        return io.BufferedReader(stream, buffer_size=READ_BUFFER_SIZE)
+
+    def _open_zip_member(self):
+        """
+        Open the first html of a zip archive, decompressed while it is read
+
+        Raises
+        ------
+        ValueError
+            If the archive contains no html.
+
+        Returns
+        -------
+        zipfile.ZipExtFile
+            Bytes of the html, closing it closes the archive.
+
+        """
+
+        with zipfile.ZipFile(self.html_path) as archive:
+            for member in archive.infolist():
+                name = member.filename.rsplit('/', 1)[-1].lower()
+                if not member.is_dir() and any(
+                        fnmatch(name, pattern)
+                        for pattern in ARCHIVED_HTML_PATTERNS):
+                    # The member keeps the archive file open until it is closed
+                    return archive.open(member)
+
+        raise ValueError(f'No html file in {self.html_path}')
+
+    def _open_mhtml_part(self, fp):
+        """
+        Open the html part of a MHTML bundle.
+        The parts are quoted-printable or base64, the bundle is decoded
+        in memory as a whole.
+
+        Parameters
+        ----------
+        fp : File object
+            Bytes of the MHTML bundle.
+
+        Raises
+        ------
+        ValueError
+            If the bundle contains no html.
+
+        Returns
+        -------
+        io.BytesIO
+            Bytes of the html.
+
+        """
+
+        message = email.message_from_binary_file(fp, policy=email.policy.compat32)
+
+        for part in message.walk():
+            if part.get_content_type() == 'text/html':
+                self.charset = self._lookup_charset(part.get_content_charset())
+                return io.BytesIO(part.get_payload(decode=True))
+
+        raise ValueError(f'No html part in {self.html_path}')
+
+    def _lookup_charset(self, charset):
+        """
+        Return the name of a known encoding
+
+        Parameters
+        ----------
+        charset : Str or None
+            Declared encoding.
+
+        Returns
+        -------
+        Str or None
+            Name of the encoding, None if it is not declared or not known.
+
+        """
+
+        if charset is None:
+            return None
+        try:
+            return codecs.lookup(charset).name
+        except LookupError:
+            return None
+
+    def get_charset(self, fp):
+        """
+        Return the encoding of the html, declared by the bundle,
+        its byte order mark or its <meta> tag
+
+        Parameters
+        ----------
+        fp : io.BufferedReader
+            Bytes of the html from open_binary(), nothing is consumed.
+
+        Returns
+        -------
+        Str
+            Encoding of the html, FALLBACK_CHARSET if it is not declared.
+
+        """
+
+        if self.charset is None:
+            self.charset = sniff_charset(fp.peek(SNIFF_SIZE)[:SNIFF_SIZE])
+        if self.charset is None:
+            self.charset = FALLBACK_CHARSET
+        return self.charset
+
+    def open(self):
+        """
+        Open the html as text, decoded once while it is read.
+        Bytes that are not valid in the encoding are replaced by U+FFFD
+        instead of being dropped.
+
+        Returns
+        -------
+        io.TextIOWrapper
+            Text of the html.
+
+        """
+
+        fp = self.open_binary()
+        return io.TextIOWrapper(fp, encoding=self.get_charset(fp),
+                                errors='replace')
+
+
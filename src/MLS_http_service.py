@@ -0,0 +1,597 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_HTTP_Service
+Description: Local HTTP service extracting the rentals of a posted MLS html
+"""
+
+import asyncio
+import json
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from MLS_scraper_module import (MLS_Scraper_Module, DEFAULT_PARSER,
+                                DEFAULT_ENGINE)
+from MLS_html_source import sniff_charset, SNIFF_SIZE
+
+# Address of the service, only reachable from the local machine by default
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Path of the extraction, the html is the body of a POST request
+EXTRACT_PATH = '/extract'
+
+# Path of the health check
+HEALTH_PATH = '/health'
+
+# Bytes per megabyte of the body size limit
+MEGABYTE = 1024 * 1024
+
+# Largest html accepted, larger requests are answered 413
+DEFAULT_MAX_BODY_SIZE = 32 * MEGABYTE
+
+# Largest request line and headers, larger requests are answered 431
+MAX_HEADER_SIZE = 16 * 1024
+
+# Number of worker processes running the extraction
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Requests extracted or waiting for a worker at the same time per worker,
+# further requests are answered 503 instead of queueing up
+CONCURRENCY_PER_WORKER = 2
+
+# Seconds to receive a request, and to wait for the next one of a connection
+REQUEST_TIMEOUT = 30.0
+
+# Encoding of the html if neither the Content-Type nor the <meta> tag
+# gives a charset
+DEFAULT_CHARSET = 'utf-8'
+
+# Scraper module of a worker process, kept warm between requests
+_service_scraper = None
+
+
+def _init_service_worker(parser, engine):
+    """
+    Initialize the MLS Scraper module of a worker process
+
+    Parameters
+    ----------
+    parser : Str
+        Parser backend of beautiful soup.
+    engine : Str
+        Extraction engine.
+
+    Returns
+    -------
+    None.
+
+    """
+    global _service_scraper
+    _service_scraper = MLS_Scraper_Module(parser=parser, cache_dir=None,
+                                          engine=engine)
+
+
+def _get_worker_pid():
+    """
+    Return the process id of a worker, submitted to start the workers
+    before the first request
+
+    Returns
+    -------
+    Int
+        Process id of the worker.
+
+    """
+    return os.getpid()
+
+
+def _extract_html(body, charset):
+    """
+    Extract the rentals of a html in a worker process
+
+    Parameters
+    ----------
+    body : Bytes
+        MLS html.
+    charset : Str or None
+        Encoding of the html given by the Content-Type, if it is None
+        the encoding is found from the <meta> tag.
+
+    Returns
+    -------
+    Bytes
+        Json of the unit and room attributes, and the succeeded and
+        failed MLS numbers.
+
+    """
+
+    scraper = _service_scraper
+    scraper.reset_scraping_status()
+
+    if charset is None:
+        charset = sniff_charset(body[:SNIFF_SIZE]) or DEFAULT_CHARSET
+
+    scraper.parse_html(body.decode(charset, errors='replace'))
+    scraper.get_all_rental()
+
+    # Serialized in the worker, so the event loop only sends bytes
+    return json.dumps({**scraper.output_rental_information(),
+                       **scraper.get_rental_scraping_status()}).encode('utf-8')
+
+
+"""
+Class: MLS_HTTP_Error
+"""
+
+
+class MLS_HTTP_Error(Exception):
+
+    def __init__(self, status, message):
+        """
+        Error answered to a request instead of its extraction
+
+        Parameters
+        ----------
+        status : Int
+            HTTP status code.
+        message : Str
+            Description of the error.
+
+        Returns
+        -------
+        None.
+
+        """
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+"""
+Class: MLS_HTTP_Service
+"""
+
+
+class MLS_HTTP_Service:
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT,
+                 workers=DEFAULT_WORKERS,
+                 max_concurrency=None,
+                 max_body_size=DEFAULT_MAX_BODY_SIZE,
+                 parser=DEFAULT_PARSER, engine=DEFAULT_ENGINE):
+        """
+        Initialize the HTTP service extracting the rentals of posted html.
+        The extraction runs in worker processes with a warm scraper module
+        each, so the event loop keeps accepting requests.
+
+        Parameters
+        ----------
+        host : Str, optional
+            Address the service listens on.
+            The default is DEFAULT_HOST.
+        port : Int, optional
+            Port the service listens on, 0 for any free port.
+            The default is DEFAULT_PORT.
+        workers : Int, optional
+            Number of worker processes.
+            The default is DEFAULT_WORKERS.
+        max_concurrency : Int, optional
+            Requests extracted or waiting for a worker at the same time.
+            If it is None, CONCURRENCY_PER_WORKER requests per worker.
+            The default is None.
+        max_body_size : Int, optional
+            Largest html accepted in bytes.
+            The default is DEFAULT_MAX_BODY_SIZE.
+        parser : Str, optional
+            Parser backend of beautiful soup.
+            The default is DEFAULT_PARSER.
+        engine : Str, optional
+            Extraction engine.
+            The default is DEFAULT_ENGINE.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.host = host
+        self.port = port
+        self.workers = workers
+        if max_concurrency is None:
+            max_concurrency = CONCURRENCY_PER_WORKER * workers
+        self.max_concurrency = max_concurrency
+        self.max_body_size = max_body_size
+        self.parser = parser
+        self.engine = engine
+
+        self.executor = None
+        self.server = None
+
+        # Requests being extracted or waiting for a worker
+        self.in_flight = 0
+
+        # Number of requests answered, by status code
+        self.request_count = {}
+
+    async def start(self):
+        """
+        Start the worker processes and listen for requests
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_service_worker,
+            initargs=(self.parser, self.engine))
+
+        # Start every worker now, the first requests do not pay for it
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self.executor,
+                                                    _get_worker_pid)
+                               for _ in range(self.workers)])
+
+        self.server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port, limit=MAX_HEADER_SIZE)
+
+        # Port actually listened on, e.g. if port 0 was requested
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    def run(self, on_start=None):
+        """
+        Start the service and answer requests until interrupted,
+        e.g. by Ctrl+C or SIGTERM
+
+        Parameters
+        ----------
+        on_start : function, optional
+            Function called once the service listens for requests.
+            The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        try:
+            asyncio.run(self._run(on_start))
+        except KeyboardInterrupt:
+            pass
+
+    async def _run(self, on_start):
+        """
+        Start the service, then answer requests until stopped
+
+        Parameters
+        ----------
+        on_start : function
+            Function called once the service listens for requests.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        await self.start()
+        if on_start is not None:
+            on_start()
+
+        # Stop as with Ctrl+C when the service is stopped,
+        # signal handlers of the event loop are not available on Windows
+        stop = asyncio.Event()
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM,
+                                                          stop.set)
+        except NotImplementedError:
+            pass
+
+        try:
+            await stop.wait()
+        finally:
+            await self.stop()
+
+    def get_url(self):
+        """
+        Return the url the html is posted to
+
+        Returns
+        -------
+        Str
+            Url of the extraction.
+
+        """
+        return f'http://{self.host}:{self.port}{EXTRACT_PATH}'
+
+    async def stop(self):
+        """
+        Stop listening and shut down the worker processes
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    async def handle_connection(self, reader, writer):
+        """
+        Answer the requests of a connection, kept alive between requests
+        unless the client closes it
+
+        Parameters
+        ----------
+        reader : asyncio.StreamReader
+            Stream of the requests.
+        writer : asyncio.StreamWriter
+            Stream of the responses.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(
+                        reader.readuntil(b'\r\n\r\n'), REQUEST_TIMEOUT)
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                                        self._get_error_body('Headers are too large'),
+                                        keep_alive=False)
+                    break
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError,
+                        ConnectionError):
+                    break
+
+                try:
+                    method, path, headers, keep_alive = self._parse_head(head)
+                    body = await self.handle_request(method, path, headers,
+                                                     reader)
+                    status = HTTPStatus.OK
+                except MLS_HTTP_Error as error:
+                    status = error.status
+                    body = self._get_error_body(error.message)
+
+                    # The body of a rejected request is not read,
+                    # so the connection cannot be used again
+                    keep_alive = False
+
+                await self._respond(writer, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _parse_head(self, head):
+        """
+        Parse the request line and headers of a request
+
+        Parameters
+        ----------
+        head : Bytes
+            Request line and headers, up to the empty line.
+
+        Raises
+        ------
+        MLS_HTTP_Error
+            If the request line is malformed.
+
+        Returns
+        -------
+        Tuple
+            Method, path, headers with lower case names,
+            and whether the connection is kept alive.
+
+        """
+
+        request_line, *header_lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = request_line.split(' ')
+        except ValueError:
+            raise MLS_HTTP_Error(HTTPStatus.BAD_REQUEST, 'Malformed request line')
+
+        headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(':')
+            if name:
+                headers[name.strip().lower()] = value.strip()
+
+        # HTTP/1.1 connections are kept alive unless closed by the client
+        connection = headers.get('connection', '').lower()
+        if version == 'HTTP/1.1':
+            keep_alive = connection != 'close'
+        else:
+            keep_alive = connection == 'keep-alive'
+
+        return method, target.split('?', 1)[0], headers, keep_alive
+
+    async def handle_request(self, method, path, headers, reader):
+        """
+        Answer a request
+
+        Parameters
+        ----------
+        method : Str
+            Request method.
+        path : Str
+            Request path, without the query.
+        headers : Dict
+            Request headers with lower case names.
+        reader : asyncio.StreamReader
+            Stream of the request body.
+
+        Raises
+        ------
+        MLS_HTTP_Error
+            If the request is not answered by an extraction,
+            e.g. too large or too many requests.
+
+        Returns
+        -------
+        Bytes
+            Json body of the response.
+
+        """
+
+        if path == HEALTH_PATH:
+            if method != 'GET':
+                raise MLS_HTTP_Error(HTTPStatus.METHOD_NOT_ALLOWED,
+                                     f'Use GET on {HEALTH_PATH}')
+            return json.dumps({'status': 'ok',
+                               'in_flight': self.in_flight,
+                               'max_concurrency': self.max_concurrency,
+                               'workers': self.workers}).encode('utf-8')
+
+        if path != EXTRACT_PATH:
+            raise MLS_HTTP_Error(HTTPStatus.NOT_FOUND, f'{path} is not found')
+        if method != 'POST':
+            raise MLS_HTTP_Error(HTTPStatus.METHOD_NOT_ALLOWED,
+                                 f'POST the html to {EXTRACT_PATH}')
+
+        # The size is checked before reading the body
+        if 'content-length' not in headers:
+            raise MLS_HTTP_Error(HTTPStatus.LENGTH_REQUIRED,
+                                 'Content-Length is required')
+        try:
+            content_length = int(headers['content-length'])
+        except ValueError:
+            raise MLS_HTTP_Error(HTTPStatus.BAD_REQUEST,
+                                 'Content-Length is not a number')
+        if content_length < 0:
+            raise MLS_HTTP_Error(HTTPStatus.BAD_REQUEST,
+                                 'Content-Length is negative')
+        if content_length > self.max_body_size:
+            raise MLS_HTTP_Error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                 f'Html is larger than {self.max_body_size} bytes')
+
+        # Requests beyond the cap are rejected instead of queueing up
+        if self.in_flight >= self.max_concurrency:
+            raise MLS_HTTP_Error(HTTPStatus.SERVICE_UNAVAILABLE,
+                                 'Too many requests, retry later')
+
+        self.in_flight += 1
+        try:
+            try:
+                body = await asyncio.wait_for(reader.readexactly(content_length),
+                                              REQUEST_TIMEOUT)
+            except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                raise MLS_HTTP_Error(HTTPStatus.BAD_REQUEST,
+                                     'Html is shorter than Content-Length')
+
+            charset = self._get_charset(headers.get('content-type', ''))
+
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(self.executor, _extract_html,
+                                                  body, charset)
+            except Exception as error:
+                raise MLS_HTTP_Error(HTTPStatus.INTERNAL_SERVER_ERROR,
+                                     f'Issue arised in extraction: {error!r}')
+        finally:
+            self.in_flight -= 1
+
+    def _get_charset(self, content_type):
+        """
+        Return the encoding of the html given by its Content-Type
+
+        Parameters
+        ----------
+        content_type : Str
+            Content-Type header, e.g. text/html; charset=utf-8.
+
+        Returns
+        -------
+        Str or None
+            Encoding of the html, None if it is not given or not known.
+
+        """
+
+        for parameter in content_type.split(';')[1:]:
+            name, _, value = parameter.partition('=')
+            if name.strip().lower() == 'charset':
+                charset = value.strip().strip('"')
+                try:
+                    ''.encode(charset)
+                except LookupError:
+                    break
+                return charset
+        return None
+
+    def _get_error_body(self, message):
+        """
+        Return the json body of an error
+
+        Parameters
+        ----------
+        message : Str
+            Description of the error.
+
+        Returns
+        -------
+        Bytes
+            Json body of the response.
+
+        """
+        return json.dumps({'error': message}).encode('utf-8')
+
+    async def _respond(self, writer, status, body, keep_alive):
+        """
+        Send a json response
+
+        Parameters
+        ----------
+        writer : asyncio.StreamWriter
+            Stream of the responses.
+        status : Int
+            HTTP status code.
+        body : Bytes
+            Json body of the response.
+        keep_alive : Bool
+            Whether the connection is kept alive for the next request.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        status = HTTPStatus(status)
+        self.request_count[status.value] = self.request_count.get(status.value, 0) + 1
+
+        head = (f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+                'Content-Type: application/json\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                f'Connection: {"keep-alive" if keep_alive else "close"}\r\n'
+                '\r\n')
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    def get_request_count(self):
+        """
+        Return the number of requests answered
+
+        Returns
+        -------
+        Dict
+            Number of requests answered by status code.
+
+        """
+        return self.request_count
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_JSONL_Writer
+Description: Streaming JSON Lines output of rentals as they are scraped
+"""
+
+import json
+
+# File name of the json lines in the output directory
+JSONL_FILE_NAME = 'MLS_rentals.jsonl'
+
+# Number of rentals kept in memory before writing them to the file
+FLUSH_EVERY = 200
+
+"""
+Class: MLS_JSONL_Writer
+"""
+
+
+class MLS_JSONL_Writer:
+
+    def __init__(self, file_path, append=False, flush_every=FLUSH_EVERY):
+        """
+        Open the json lines output, a line per rental
+
+        Parameters
+        ----------
+        file_path : Str
+            Path of the json lines file.
+        append : Bool, optional
+            Whether rentals are appended to an existing file.
+            If append is False, the file is overwritten.
+            The default is False.
+        flush_every : Int, optional
+            Number of rentals kept in memory before writing them to the file.
+            The default is FLUSH_EVERY.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.file_path = file_path
+        self.flush_every = flush_every
+        self.fp = open(file_path, 'a' if append else 'w', encoding='utf-8')
+
+        # Lines not yet written to the file
+        self.lines = []
+
+        # Number of rentals written
+        self.rental_count = 0
+
+    def write_rental(self, MLS_num, attribute_dict, room_table):
+        """
+        Add a rental to the output
+
+        Parameters
+        ----------
+        MLS_num : Str
+            MLS number of the rental.
+        attribute_dict : Dict
+            Unit attributes of rental.
+        room_table : Dict
+            Room attributes of rental.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.lines.append(json.dumps({'MLS#': MLS_num,
+                                      'unit': attribute_dict,
+                                      'rooms': room_table}) + '\n')
+        self.rental_count += 1
+
+        if len(self.lines) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the rentals kept in memory to the file,
+        so the rentals scraped so far are kept even if the program stops
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if self.lines:
+            self.fp.write(''.join(self.lines))
+            self.lines = []
+        self.fp.flush()
+
+    def get_rental_count(self):
+        """
+        Return the number of rentals written
+
+        Returns
+        -------
+        Int
+            Number of rentals written.
+
+        """
+        return self.rental_count
+
+    def close(self):
+        """
+        Write the remaining rentals and close the file
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.fp is None:
+            return
+
+        self.flush()
+        self.fp.close()
+        self.fp = None
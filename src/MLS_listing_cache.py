@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_Listing_Cache
+Description: On-disk cache of scraped rentals keyed by the hash of their html
+"""
+
+import hashlib
+import json
+import os
+import time
+
+# Default size cap of the cache in bytes
+DEFAULT_CACHE_SIZE = 512 * 1024 * 1024
+
+# File name of the cache database in the cache directory
+CACHE_FILE_NAME = 'MLS_listing_cache.sqlite'
+
+# Number of new or used rentals kept in memory before writing to the cache
+FLUSH_EVERY = 500
+
+"""
+Class: MLS_Listing_Cache
+"""
+
+
+class MLS_Listing_Cache:
+
+    def __init__(self, cache_dir, max_size=DEFAULT_CACHE_SIZE, salt=''):
+        """
+        Initialize the cache of scraped rentals
+
+        Parameters
+        ----------
+        cache_dir : Str
+            Directory of the cache, created if it does not exist.
+        max_size : Int, optional
+            Size cap of the cached rentals in bytes. Least recently used
+            rentals are evicted beyond the cap.
+            The default is DEFAULT_CACHE_SIZE.
+        salt : Str, optional
+            Salt of the hash, e.g. the version of the scraper, so that
+            rentals scraped by another version are not reused.
+            The default is ''.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.salt = salt.encode()
+
+        # sqlite3 is only imported once a cache is used
+        import sqlite3
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.connection = sqlite3.connect(
+            os.path.join(self.cache_dir, CACHE_FILE_NAME), timeout=60)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS rentals ('
+            'key TEXT PRIMARY KEY, value TEXT, size INTEGER, last_used INTEGER)')
+        self.connection.execute(
+            'CREATE INDEX IF NOT EXISTS rentals_last_used ON rentals (last_used)')
+        self.connection.commit()
+
+        # Rentals to be written and rentals used since the last flush
+        self.new_rentals = {}
+        self.used_keys = set()
+
+        # Number of cache hit and miss
+        self.cache_status = {'hit': 0, 'miss': 0}
+
+    def make_key(self, raw_html):
+        """
+        Hash the raw html of a rental section
+
+        Parameters
+        ----------
+        raw_html : Str or Bytes
+            Raw html of a rental section.
+
+        Returns
+        -------
+        Str
+            Key of the rental in the cache.
+
+        """
+
+        if isinstance(raw_html, str):
+            raw_html = raw_html.encode()
+
+        return hashlib.blake2b(self.salt + raw_html, digest_size=20).hexdigest()
+
+    def get(self, key):
+        """
+        Get a cached rental
+
+        Parameters
+        ----------
+        key : Str
+            Key of the rental from make_key().
+
+        Returns
+        -------
+        Tuple or None
+            MLS number, unit attributes and room attributes of the rental,
+            None if the rental is not cached.
+
+        """
+
+        if key in self.new_rentals:
+            value = self.new_rentals[key]
+        else:
+            row = self.connection.execute(
+                'SELECT value FROM rentals WHERE key = ?', (key,)).fetchone()
+            value = None if row is None else row[0]
+
+        if value is None:
+            self.cache_status['miss'] += 1
+            return None
+
+        self.cache_status['hit'] += 1
+        self.used_keys.add(key)
+        self._flush_if_full()
+
+        return tuple(json.loads(value))
+
+    def put(self, key, rental):
+        """
+        Cache a rental
+
+        Parameters
+        ----------
+        key : Str
+            Key of the rental from make_key().
+        rental : Tuple
+            MLS number, unit attributes and room attributes of the rental.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.new_rentals[key] = json.dumps(rental)
+        self._flush_if_full()
+
+    def get_cache_status(self):
+        """
+        Return the number of cache hit and miss
+
+        Returns
+        -------
+        cache_status : Dict
+            Number of cache hit and miss.
+
+        """
+        return self.cache_status
+
+    def _flush_if_full(self):
+        """
+        Write to the cache when enough rentals are kept in memory
+
+        Returns
+        -------
+        None.
+
+        """
+        if len(self.new_rentals) + len(self.used_keys) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        """
+        Write new rentals and the last used time of rentals to the cache
+
+        Returns
+        -------
+        None.
+
+        """
+
+        now = time.time_ns()
+
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO rentals VALUES (?, ?, ?, ?)',
+                [(key, value, len(value), now)
+                 for key, value in self.new_rentals.items()])
+            self.connection.executemany(
+                'UPDATE rentals SET last_used = ? WHERE key = ?',
+                [(now, key) for key in self.used_keys])
+
+        self.new_rentals = {}
+        self.used_keys = set()
+
+    def evict(self):
+        """
+        Evict the least recently used rentals beyond the size cap
+
+        Returns
+        -------
+        None.
+
+        """
+
+        total_size = self.connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM rentals').fetchone()[0]
+
+        if total_size <= self.max_size:
+            return
+
+        evicted_keys = []
+        for key, size in self.connection.execute(
+                'SELECT key, size FROM rentals ORDER BY last_used'):
+            if total_size <= self.max_size:
+                break
+            evicted_keys.append((key,))
+            total_size -= size
+
+        with self.connection:
+            self.connection.executemany(
+                'DELETE FROM rentals WHERE key = ?', evicted_keys)
+
+    def close(self):
+        """
+        Write pending rentals, evict rentals beyond the size cap
+        and close the cache
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.connection is None:
+            return
+
+        self.flush()
+        self.evict()
+        self.connection.close()
+        self.connection = None
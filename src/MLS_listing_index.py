@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_Listing_Index
+Description: Sidecar index of the byte offsets of each rental section of a MLS html
+"""
+
+import mmap
+import os
+import re
+import struct
+from MLS_html_source import (GZIP_MAGIC, ZIP_MAGIC, MHTML_HEADER, SNIFF_SIZE,
+                             LISTING_START, sniff_charset)
+
+# Suffix of the index, next to the html
+INDEX_FILE_SUFFIX = '.mlsidx'
+
+# First bytes of an index, changed with the layout of the records
+INDEX_MAGIC = b'MLSIDX01'
+
+"""
+Header of an index: magic, size and modification time in nanoseconds of the
+html when indexed, charset declared by the html, length of the MLS numbers
+and number of records
+"""
+INDEX_HEADER = struct.Struct('<8sQq32sHI')
+
+# Start and end byte offsets of a rental section, after its MLS number
+OFFSET_RECORD = struct.Struct('<QQ')
+
+# id attribute of the opening tag of a rental section, i.e. its MLS number
+ID_ATTRIBUTE = re.compile(rb'\sid\s*=\s*["\']([^"\']*)["\']')
+
+"""
+Class: MLS_Listing_Index
+"""
+
+
+class MLS_Listing_Index:
+
+    def __init__(self, html_path, index_path=None):
+        """
+        Initialize the index of the rental sections of a MLS html.
+        The records are sorted by MLS number, so a rental is found by a
+        binary search of the memory-mapped index without reading it whole.
+
+        Parameters
+        ----------
+        html_path : Str
+            Path of the MLS html, plain html only.
+        index_path : Str, optional
+            Path of the index. If it is None, the index is saved next to the
+            html with INDEX_FILE_SUFFIX. If the index cannot be saved, e.g.
+            the directory is read-only, it is only kept in memory.
+            The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.html_path = html_path
+        if index_path is None:
+            index_path = html_path + INDEX_FILE_SUFFIX
+        self.index_path = index_path
+
+        # Charset declared by the html, None if it is not declared
+        self.charset = None
+
+        # Memory-mapped index: length of the MLS numbers, number of records
+        self.index_map = None
+        self.key_size = 0
+        self.record_count = 0
+
+    def _get_signature(self):
+        """
+        Return the size and modification time of the html
+
+        Returns
+        -------
+        Tuple
+            Size and modification time in nanoseconds.
+
+        """
+        stat = os.stat(self.html_path)
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def scan(self):
+        """
+        Find the rental sections of the html from its raw bytes, without
+        parsing it. Each section runs from its opening tag to the start of the
+        next one, or the end of the file, as in iter_rentals().
+
+        Raises
+        ------
+        ValueError
+            If the html is compressed, archived or a MHTML bundle, whose
+            byte offsets are not those of the file.
+
+        Returns
+        -------
+        charset : Str or None
+            Charset declared by the html.
+        offsets : Dict
+            Start and end byte offsets of each MLS number, the last section
+            of a MLS number repeated in the html replaces the previous ones.
+
+        """
+
+        offsets = {}
+
+        with open(self.html_path, 'rb') as fp:
+            if os.fstat(fp.fileno()).st_size == 0:
+                return None, offsets
+
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as html:
+                head = html[:SNIFF_SIZE]
+                if (head.startswith(GZIP_MAGIC) or head.startswith(ZIP_MAGIC)
+                        or (MHTML_HEADER.search(head)
+                            and not head.lstrip().startswith(b'<'))):
+                    raise ValueError(f'Only plain html can be indexed, '
+                                     f'{self.html_path} is compressed')
+
+                MLS_num = start = None
+                for match in LISTING_START.finditer(html):
+                    if MLS_num is not None:
+                        offsets[MLS_num] = (start, match.start())
+
+                    # The id may come before or after the class attribute
+                    start = match.start()
+                    tag_end = html.find(b'>', match.end())
+                    found = ID_ATTRIBUTE.search(html, start, tag_end)
+                    MLS_num = None if found is None else found.group(1)
+
+                if MLS_num is not None:
+                    offsets[MLS_num] = (start, len(html))
+
+        return sniff_charset(head), offsets
+
+    def build(self):
+        """
+        Scan the html and save its index, replacing the previous one at once.
+        If the index cannot be saved, it is mapped in memory instead.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.close()
+
+        signature = self._get_signature()
+        charset, offsets = self.scan()
+
+        key_size = max(map(len, offsets), default=0)
+        index = INDEX_HEADER.pack(INDEX_MAGIC, *signature,
+                                  (charset or '').encode('ascii'),
+                                  key_size, len(offsets))
+        index += b''.join(MLS_num.ljust(key_size, b'\0')
+                          + OFFSET_RECORD.pack(*offsets[MLS_num])
+                          for MLS_num in sorted(offsets))
+
+        temp_path = self.index_path + '.tmp'
+        try:
+            with open(temp_path, 'wb') as fp:
+                fp.write(index)
+            os.replace(temp_path, self.index_path)
+        except OSError:
+            # e.g. a read-only directory, the index lasts until it is closed
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            index_map = mmap.mmap(-1, len(index))
+            index_map.write(index)
+            self._map_index(index_map)
+
+    def load(self):
+        """
+        Map the index of the html, it is built again if it is missing
+        or the html was modified since it was built
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if self.index_map is not None:
+            return
+
+        if not self._open_index():
+            self.build()
+            if self.index_map is None and not self._open_index():
+                raise ValueError(f'Index {self.index_path} cannot be read')
+
+    def _open_index(self):
+        """
+        Map the index if it is up to date with the html
+
+        Returns
+        -------
+        Bool
+            True if the index is mapped.
+
+        """
+
+        try:
+            with open(self.index_path, 'rb') as fp:
+                index_map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Missing or empty index
+            return False
+
+        return self._map_index(index_map)
+
+    def _map_index(self, index_map):
+        """
+        Use a mapped index if it is up to date with the html, it is closed
+        otherwise
+
+        Parameters
+        ----------
+        index_map : mmap.mmap
+            Index mapped from its file or in memory.
+
+        Returns
+        -------
+        Bool
+            True if the index is used.
+
+        """
+
+        if len(index_map) < INDEX_HEADER.size:
+            index_map.close()
+            return False
+
+        (magic, size, mtime_ns, charset, key_size,
+         record_count) = INDEX_HEADER.unpack_from(index_map)
+
+        if (magic != INDEX_MAGIC
+                or (size, mtime_ns) != self._get_signature()
+                or len(index_map) != (INDEX_HEADER.size + record_count
+                                      * (key_size + OFFSET_RECORD.size))):
+            index_map.close()
+            return False
+
+        self.index_map = index_map
+        self.charset = charset.rstrip(b'\0').decode('ascii') or None
+        self.key_size = key_size
+        self.record_count = record_count
+        return True
+
+    def _get_key(self, position):
+        """
+        Return the MLS number of a record
+
+        Parameters
+        ----------
+        position : Int
+            Position of the record in the index.
+
+        Returns
+        -------
+        Bytes
+            MLS number, padded with null bytes.
+
+        """
+        offset = INDEX_HEADER.size + position * (self.key_size + OFFSET_RECORD.size)
+        return self.index_map[offset:offset + self.key_size]
+
+    def lookup(self, MLS_num):
+        """
+        Find the byte offsets of the rental section of a MLS number
+
+        Parameters
+        ----------
+        MLS_num : Str
+            MLS number of the rental.
+
+        Returns
+        -------
+        Tuple or None
+            Start and end byte offsets of the rental section in the html,
+            None if the MLS number is not in the html.
+
+        """
+
+        self.load()
+
+        key = MLS_num.encode('utf-8')
+        if len(key) > self.key_size:
+            return None
+        key = key.ljust(self.key_size, b'\0')
+
+        # Binary search of the records sorted by MLS number
+        low, high = 0, self.record_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low == self.record_count or self._get_key(low) != key:
+            return None
+
+        offset = (INDEX_HEADER.size + low * (self.key_size + OFFSET_RECORD.size)
+                  + self.key_size)
+        return OFFSET_RECORD.unpack_from(self.index_map, offset)
+
+    def read_listing(self, MLS_num):
+        """
+        Read the raw html of the rental section of a MLS number
+
+        Parameters
+        ----------
+        MLS_num : Str
+            MLS number of the rental.
+
+        Returns
+        -------
+        Bytes or None
+            Raw html of the rental section, None if the MLS number is not
+            in the html.
+
+        """
+
+        span = self.lookup(MLS_num)
+        if span is None:
+            return None
+
+        start, end = span
+        with open(self.html_path, 'rb') as fp:
+            fp.seek(start)
+            return fp.read(end - start)
+
+    def close(self):
+        """
+        Unmap the index
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.index_map is None:
+            return
+
+        self.index_map.close()
+        self.index_map = None
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_Load_Test
+Description: Concurrent load test of the local HTTP service with latency percentiles
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+from urllib.parse import urlsplit
+from MLS_http_service import DEFAULT_HOST, DEFAULT_PORT, EXTRACT_PATH
+
+# Url of the extraction of the local service
+DEFAULT_URL = f'http://{DEFAULT_HOST}:{DEFAULT_PORT}{EXTRACT_PATH}'
+
+# Number of requests sent, and number of them sent at the same time
+DEFAULT_REQUESTS = 200
+DEFAULT_CONCURRENCY = 8
+
+# Percentiles of the latency reported
+PERCENTILES = [50, 90, 99]
+
+
+def get_percentile(latencies, percentile):
+    """
+    Return a percentile of the latencies by the nearest-rank method
+
+    Parameters
+    ----------
+    latencies : List
+        Latencies in seconds, sorted.
+    percentile : Float
+        Percentile between 0 and 100.
+
+    Returns
+    -------
+    Float or None
+        Latency of the percentile, None if there is no latency.
+
+    """
+
+    if not latencies:
+        return None
+
+    rank = max(math.ceil(percentile / 100 * len(latencies)), 1)
+    return latencies[rank - 1]
+
+
+"""
+Class: MLS_Load_Test
+"""
+
+
+class MLS_Load_Test:
+
+    def __init__(self, url=DEFAULT_URL, request_count=DEFAULT_REQUESTS,
+                 concurrency=DEFAULT_CONCURRENCY):
+        """
+        Initialize the load test of the HTTP service.
+        Each concurrent client keeps its connection alive and sends its
+        next request once the previous one is answered.
+
+        Parameters
+        ----------
+        url : Str, optional
+            Url the html is posted to.
+            The default is DEFAULT_URL.
+        request_count : Int, optional
+            Number of requests sent.
+            The default is DEFAULT_REQUESTS.
+        concurrency : Int, optional
+            Number of concurrent clients.
+            The default is DEFAULT_CONCURRENCY.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        url = urlsplit(url)
+        self.host = url.hostname or DEFAULT_HOST
+        self.port = url.port or 80
+        self.path = url.path or '/'
+
+        self.request_count = request_count
+        self.concurrency = concurrency
+
+    def run(self, body):
+        """
+        Send the html to the service and measure the latency of each request
+
+        Parameters
+        ----------
+        body : Bytes
+            MLS html posted by every request.
+
+        Returns
+        -------
+        Dict
+            Settings, throughput, latency percentiles of the extracted
+            requests and number of responses by status code.
+
+        """
+        return asyncio.run(self._run(body))
+
+    async def _run(self, body):
+        """
+        Run the concurrent clients
+
+        Parameters
+        ----------
+        body : Bytes
+            MLS html posted by every request.
+
+        Returns
+        -------
+        Dict
+            Results of the load test.
+
+        """
+
+        # Requests not yet sent, shared by the clients
+        remaining = iter(range(self.request_count))
+
+        latencies = []
+        status_count = {}
+
+        wall_start = time.perf_counter()
+        await asyncio.gather(*[self._run_client(body, remaining, latencies,
+                                                status_count)
+                               for _ in range(self.concurrency)])
+        wall_time = time.perf_counter() - wall_start
+
+        latencies.sort()
+        return {'url': f'http://{self.host}:{self.port}{self.path}',
+                'requests': self.request_count,
+                'concurrency': self.concurrency,
+                'body_bytes': len(body),
+                'wall_time': wall_time,
+                'requests_per_second': (self.request_count / wall_time
+                                        if wall_time else None),
+                'status': status_count,
+                'latency': {
+                    **{f'p{percentile}': get_percentile(latencies, percentile)
+                       for percentile in PERCENTILES},
+                    'mean': sum(latencies) / len(latencies) if latencies else None,
+                    'max': latencies[-1] if latencies else None}}
+
+    async def _run_client(self, body, remaining, latencies, status_count):
+        """
+        Send requests over a kept alive connection until none remains
+
+        Parameters
+        ----------
+        body : Bytes
+            MLS html posted by every request.
+        remaining : Iterator
+            Requests not yet sent, shared by the clients.
+        latencies : List
+            Latency of each extracted request, appended to.
+        status_count : Dict
+            Number of responses by status code, or by error, updated.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        request = (f'POST {self.path} HTTP/1.1\r\n'
+                   f'Host: {self.host}:{self.port}\r\n'
+                   'Content-Type: text/html; charset=utf-8\r\n'
+                   f'Content-Length: {len(body)}\r\n'
+                   '\r\n').encode('latin-1') + body
+
+        reader = writer = None
+        try:
+            for _ in remaining:
+                start = time.perf_counter()
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(
+                            self.host, self.port)
+
+                    writer.write(request)
+                    await writer.drain()
+                    status, keep_alive = await self._read_response(reader)
+                except (ConnectionError, asyncio.IncompleteReadError) as error:
+                    status, keep_alive = type(error).__name__, False
+
+                # Rejected requests are answered at once, they would hide
+                # the latency of the extraction
+                if status == 200:
+                    latencies.append(time.perf_counter() - start)
+                status_count[status] = status_count.get(status, 0) + 1
+
+                # Rejected requests close the connection, open a new one
+                if not keep_alive and writer is not None:
+                    writer.close()
+                    reader = writer = None
+        finally:
+            if writer is not None:
+                writer.close()
+
+    async def _read_response(self, reader):
+        """
+        Read a response and discard its body
+
+        Parameters
+        ----------
+        reader : asyncio.StreamReader
+            Stream of the responses.
+
+        Returns
+        -------
+        Tuple
+            Status code, and whether the connection is kept alive.
+
+        """
+
+        head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1')
+        status_line, *header_lines = head.split('\r\n')
+
+        headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(':')
+            if name:
+                headers[name.strip().lower()] = value.strip()
+
+        await reader.readexactly(int(headers.get('content-length', 0)))
+
+        return (int(status_line.split(' ')[1]),
+                headers.get('connection', '').lower() != 'close')
+
+
+def arguement_parsing():
+    parser = argparse.ArgumentParser(
+        description='Load test of the MLS scraper HTTP service')
+    parser.add_argument('input',
+                        type=str,
+                        help='Path of the MLS html posted by every request')
+    parser.add_argument('--url',
+                        type=str,
+                        default=DEFAULT_URL,
+                        help='Url the html is posted to')
+    parser.add_argument('-n', '--requests',
+                        dest='request_count',
+                        type=int,
+                        default=DEFAULT_REQUESTS,
+                        help='Number of requests sent')
+    parser.add_argument('-c', '--concurrency',
+                        type=int,
+                        default=DEFAULT_CONCURRENCY,
+                        help='Number of requests sent at the same time')
+    parser.add_argument('--output',
+                        type=str,
+                        default=None,
+                        help='Output path of the results in json')
+
+    return parser.parse_args()
+
+
+def main():
+    args = arguement_parsing()
+
+    with open(args.input, 'rb') as fp:
+        body = fp.read()
+
+    results = MLS_Load_Test(args.url, args.request_count,
+                            args.concurrency).run(body)
+
+    if args.output is not None:
+        with open(args.output, 'w') as fp:
+            json.dump(results, fp, indent=2)
+
+    print(f"{results['requests']} requests, {results['concurrency']} concurrent, "
+          f"{results['requests_per_second'] or 0:.1f} requests/s")
+    print('Status: ' + ', '.join(f'{status}: {count}' for status, count
+                                 in sorted(results['status'].items(),
+                                           key=lambda item: str(item[0]))))
+    for name, latency in results['latency'].items():
+        if latency is not None:
+            print(f"  {name}: {latency * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
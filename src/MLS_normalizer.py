@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_Normalizer
+Description: Column-wise type normalization of scraped rental attributes
+"""
+
+import pandas as pd
+
+"""
+Normalization rules of the unit attributes and room attributes
+price: amount like $2,500 into number
+count: count like 5 or 5 + 1 into integer, the sum of its terms
+float: decimal number
+date: date in month/day/year
+boolean: flag like Y or N
+range: range like 700-799, 3000+ or <500 into Low and High columns
+type_count: type and count like Undergrnd / 1.0 into Type and Spcs columns
+"""
+UNIT_ATTRS_RULES = {'List': 'price',
+                    'Maintenance': 'price',
+                    'Park $/Mo': 'price',
+                    'DOM': 'count',
+                    'Rms': 'count',
+                    'Bedrooms': 'count',
+                    'Washrooms': 'count',
+                    'Kitchens': 'count',
+                    'Park/Drv Spcs': 'count',
+                    'Tot Prk Spcs': 'float',
+                    'Contract Date': 'date',
+                    'Possession Date': 'date',
+                    'Apx Sqft': 'range',
+                    'Gar/Gar Spcs': 'type_count',
+                    'SPIS': 'boolean',
+                    'Fam Rm': 'boolean',
+                    'Fireplace/Stv': 'boolean',
+                    'Phys Hdp-Eqp': 'boolean',
+                    'Pets Perm': 'boolean',
+                    'Central Vac': 'boolean',
+                    'UFFI': 'boolean',
+                    'Elev/Lift': 'boolean',
+                    'Retirement': 'boolean',
+                    'All Incl': 'boolean',
+                    'Water Incl': 'boolean',
+                    'Heat Incl': 'boolean',
+                    'Hydro Incl': 'boolean',
+                    'Cable TV Incl': 'boolean',
+                    'CAC Incl': 'boolean',
+                    'Bldg Ins Incl': 'boolean',
+                    'Prkg Incl': 'boolean',
+                    'ComElem Inc': 'boolean',
+                    'Energy Cert': 'boolean',
+                    'GreenPIS': 'boolean',
+                    'Pvt Ent': 'boolean',
+                    'Furnished': 'boolean'}
+ROOM_RULES = {'Length': 'float',
+              'Width': 'float'}
+
+# Date format of the MLS website
+DATE_FORMAT = '%m/%d/%Y'
+
+# Count of the form 5 or 5 + 1
+COUNT_PATTERN = r'^\s*(\d+)\s*(?:\+\s*(\d+))?\s*$'
+
+# Range of the form 700-799, 3000+ or <500
+RANGE_PATTERN = (r'^\s*(?:(?P<Low>\d+)\s*(?:-\s*(?P<High>\d+)|\+)?'
+                 r'|<\s*(?P<Below>\d+))\s*$')
+
+# Type and count of the form Undergrnd / 1.0
+TYPE_COUNT_PATTERN = r'^\s*(?P<Type>.*?)\s*/\s*(?P<Spcs>\d+(?:\.\d+)?)\s*$'
+
+# Characters of an amount other than the number
+PRICE_SYMBOLS = r'[$,\s]'
+
+# Values of the flags
+BOOLEAN_VALUES = {'Y': True, 'Yes': True, 'N': False, 'No': False}
+
+"""
+Class: MLS_Normalizer
+"""
+
+
+class MLS_Normalizer:
+
+    def __init__(self):
+        """
+        Initialize the normalization of the tabular output.
+        Every column is converted at once with vectorized string and regex
+        operations of pandas, never rental by rental.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        # Number of values that failed to be converted in each column
+        self.failure_count = {}
+
+    def normalize_output(self, MLS_output_df):
+        """
+        Normalize the unit attributes and room attributes
+
+        Parameters
+        ----------
+        MLS_output_df : Dict
+            MLS_unit_attrs_df: Dataframe of unit attributes
+            MLS_room_df: Dataframe of room attributes
+
+        Returns
+        -------
+        Dict
+            MLS_unit_attrs_df: Dataframe of normalized unit attributes
+            MLS_room_df: Dataframe of normalized room attributes
+
+        """
+
+        self.failure_count = {}
+
+        return {'MLS_unit_attrs_df': self.normalize(
+                    MLS_output_df['MLS_unit_attrs_df'], UNIT_ATTRS_RULES),
+                'MLS_room_df': self.normalize(
+                    MLS_output_df['MLS_room_df'], ROOM_RULES)}
+
+    def normalize(self, df, rules):
+        """
+        Normalize the columns of a dataframe of scraped strings.
+        Columns without a rule are kept as they are, and columns split by
+        their rule are replaced by the new columns at the same position.
+
+        Parameters
+        ----------
+        df : pandas dataframe
+            Dataframe of unit attributes or room attributes.
+        rules : Dict
+            Normalization rule of the columns.
+
+        Returns
+        -------
+        pandas dataframe
+            Normalized dataframe.
+
+        """
+
+        columns = {}
+
+        for column in df.columns:
+            rule = rules.get(column)
+            if rule is None:
+                columns[column] = df[column]
+                continue
+
+            values = self.convert_column(df[column], rule)
+            if isinstance(values, pd.DataFrame):
+                parsed = values.notna().any(axis=1)
+                for part in values.columns:
+                    columns[f'{column} {part}'] = values[part]
+            else:
+                parsed = values.notna()
+                columns[column] = values
+
+            # Empty values are missing, not failures
+            failure = (self._is_filled(df[column]) & ~parsed).sum()
+            self.failure_count[column] = int(failure)
+
+        return pd.DataFrame(columns, index=df.index)
+
+    def convert_column(self, column, rule):
+        """
+        Convert a column of scraped strings by a normalization rule.
+        Values that cannot be converted are missing.
+        Listing fields repeat a few distinct values, so each distinct value
+        is converted once and the results are taken back to the rows.
+
+        Parameters
+        ----------
+        column : pandas series
+            Scraped strings.
+        rule : Str
+            Normalization rule, one of price, count, float, date, boolean,
+            range and type_count.
+
+        Returns
+        -------
+        pandas series or pandas dataframe
+            Converted column, or the columns it is split into.
+
+        """
+
+        codes, uniques = pd.factorize(column)
+        converted = self._convert_values(pd.Series(uniques, dtype='string'), rule)
+
+        if isinstance(converted, pd.DataFrame):
+            return pd.DataFrame({part: self._take(converted[part], codes,
+                                                  column.index)
+                                 for part in converted.columns},
+                                index=column.index)
+
+        return self._take(converted, codes, column.index)
+
+    def _take(self, values, codes, index):
+        """
+        Take the converted distinct values back to the rows
+
+        Parameters
+        ----------
+        values : pandas series
+            Converted distinct values.
+        codes : numpy array
+            Position of the distinct value of each row, -1 for missing values.
+        index : pandas index
+            Index of the rows.
+
+        Returns
+        -------
+        pandas series
+            Converted value of each row.
+
+        """
+        return pd.Series(values.array.take(codes, allow_fill=True), index=index)
+
+    def _convert_values(self, column, rule):
+        """
+        Convert strings by a normalization rule with vectorized operations
+
+        Parameters
+        ----------
+        column : pandas series
+            Strings to be converted.
+        rule : Str
+            Normalization rule.
+
+        Raises
+        ------
+        ValueError
+            If the normalization rule is not supported.
+
+        Returns
+        -------
+        pandas series or pandas dataframe
+            Converted strings, or the columns they are split into.
+
+        """
+
+        if rule == 'price':
+            return pd.to_numeric(column.str.replace(PRICE_SYMBOLS, '', regex=True),
+                                 errors='coerce').astype('Float64')
+
+        if rule == 'count':
+            terms = column.str.extract(COUNT_PATTERN).astype('Float64')
+            return (terms[0] + terms[1].fillna(0)).astype('Int64')
+
+        if rule == 'float':
+            return pd.to_numeric(column, errors='coerce').astype('Float64')
+
+        if rule == 'date':
+            return pd.to_datetime(column, format=DATE_FORMAT, errors='coerce')
+
+        if rule == 'boolean':
+            return column.str.strip().map(BOOLEAN_VALUES).astype('boolean')
+
+        if rule == 'range':
+            bounds = column.str.extract(RANGE_PATTERN).astype('Float64')
+            return pd.DataFrame({'Low': bounds['Low'],
+                                 'High': bounds['High'].fillna(bounds['Below'])},
+                                index=column.index).astype('Int64')
+
+        if rule == 'type_count':
+            parts = column.str.extract(TYPE_COUNT_PATTERN)
+            return pd.DataFrame({'Type': parts['Type'],
+                                 'Spcs': parts['Spcs'].astype('Float64')},
+                                index=column.index)
+
+        raise ValueError(f'Normalization rule {rule} is not supported')
+
+    def _is_filled(self, column):
+        """
+        Find the values that are not empty
+
+        Parameters
+        ----------
+        column : pandas series
+            Scraped strings.
+
+        Returns
+        -------
+        pandas series
+            Whether each value is not empty.
+
+        """
+        return column.notna() & (column.astype('string').str.strip() != '')
+
+    def get_failure_count(self):
+        """
+        Return the number of values that failed to be converted in each column
+
+        Returns
+        -------
+        Dict
+            Number of values that failed to be converted in each column.
+
+        """
+        return self.failure_count
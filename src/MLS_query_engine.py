@@ -0,0 +1,820 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_Query_Engine
+Description: Hash and sorted indexes answering filtered queries over scraped rentals
+"""
+
+import base64
+import json
+import math
+import os
+import re
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+
+# File name of the persisted index, in the output directory
+QUERY_INDEX_FILE_NAME = 'MLS_query_index.json'
+
+# Version of the persisted index, changed with its layout
+QUERY_INDEX_VERSION = 2
+
+# Unit attributes with a hash index, answering equality on the scraped value
+HASH_INDEX_FIELDS = ['Street Number', 'City', 'Province', 'Postal Code',
+                     'For', 'Last Status', 'Bedrooms', 'Washrooms',
+                     'Exposure', 'Pets Perm', 'Furnished', 'All Incl',
+                     'Water Incl', 'Heat Incl', 'Hydro Incl', 'Prkg Incl',
+                     'Locker', 'Park/Drive']
+
+"""
+Unit attributes with a sorted index answering ranges, and how their value is
+read as a number, the same as the normalization rules of MLS_Normalizer
+price: amount like $2,500
+count: count like 5 or 5 + 1, the sum of its terms
+float: decimal number
+range: range like 700-799, 3000+ or <500, indexed as its Low and High bounds
+"""
+SORTED_INDEX_FIELDS = {'List': 'price',
+                       'Maintenance': 'price',
+                       'DOM': 'count',
+                       'Rms': 'count',
+                       'Bedrooms': 'count',
+                       'Washrooms': 'count',
+                       'Park/Drv Spcs': 'count',
+                       'Tot Prk Spcs': 'float',
+                       'Apx Sqft': 'range'}
+
+# Room attributes with a hash index, answering rentals with such a room
+ROOM_INDEX_FIELDS = ['Room', 'Level']
+
+# Operators of the conditions, = answered by a hash index if there is one
+OPERATORS = ['<=', '>=', '=', '<', '>']
+
+# Condition of the form Field<=Value, e.g. List<=2500 or City=Toronto
+CONDITION_PATTERN = re.compile(r'^\s*(.+?)\s*(<=|>=|=|<|>)\s*(.*?)\s*$')
+
+# Number patterns, see MLS_Normalizer
+PRICE_SYMBOLS = re.compile(r'[$,\s]')
+COUNT_PATTERN = re.compile(r'^\s*(\d+)\s*(?:\+\s*(\d+))?\s*$')
+RANGE_PATTERN = re.compile(r'^\s*(?:(?P<Low>\d+)\s*(?:-\s*(?P<High>\d+)|\+)?'
+                           r'|<\s*(?P<Below>\d+))\s*$')
+
+# Missing number
+NAN = float('nan')
+
+
+def parse_condition(condition):
+    """
+    Split a condition of the form Field<=Value
+
+    Parameters
+    ----------
+    condition : Str
+        Condition, e.g. List<=2500, City=Toronto or Prkg Incl=Y.
+
+    Raises
+    ------
+    ValueError
+        If the condition has no operator.
+
+    Returns
+    -------
+    Tuple
+        Field, operator and value.
+
+    """
+
+    match = CONDITION_PATTERN.match(condition)
+    if match is None or not match.group(1):
+        raise ValueError(f'Condition {condition} is not of the form '
+                         f'Field<=Value, operators: {" ".join(OPERATORS)}')
+    return match.groups()
+
+
+def parse_number(value, rule):
+    """
+    Read a scraped value as a number
+
+    Parameters
+    ----------
+    value : Str or None
+        Scraped value.
+    rule : Str
+        How the value is read, price, count or float.
+
+    Returns
+    -------
+    Float
+        Number, NaN if the value is missing or not a number.
+
+    """
+
+    if not value:
+        return NAN
+
+    if rule == 'count':
+        match = COUNT_PATTERN.match(value)
+        if match is None:
+            return NAN
+        return float(int(match.group(1)) + int(match.group(2) or 0))
+
+    if rule == 'price':
+        value = PRICE_SYMBOLS.sub('', value)
+
+    try:
+        return float(value)
+    except ValueError:
+        return NAN
+
+
+def parse_range(value):
+    """
+    Read a scraped range as its bounds
+
+    Parameters
+    ----------
+    value : Str or None
+        Scraped range, e.g. 700-799, 3000+ or <500.
+
+    Returns
+    -------
+    Tuple
+        Low and High bounds, NaN if they are missing.
+
+    """
+
+    match = RANGE_PATTERN.match(value or '')
+    if match is None or not value:
+        return NAN, NAN
+
+    low, high, below = match.group('Low', 'High', 'Below')
+    return (NAN if low is None else float(low),
+            NAN if (high or below) is None else float(high or below))
+
+
+def _pack_array(values):
+    """
+    Keep an array as its type code and raw bytes in base64, for json
+
+    Parameters
+    ----------
+    values : array
+        Rows, codes or numbers of an index.
+
+    Returns
+    -------
+    List
+        Type code and raw bytes in base64.
+
+    """
+    return [values.typecode, base64.b64encode(values.tobytes()).decode('ascii')]
+
+
+def _unpack_array(packed):
+    """
+    Read an array kept by _pack_array()
+
+    Parameters
+    ----------
+    packed : List
+        Type code and raw bytes in base64.
+
+    Raises
+    ------
+    ValueError
+        If the type code or the bytes are not valid.
+
+    Returns
+    -------
+    values : array
+        Rows, codes or numbers of an index.
+
+    """
+    typecode, data = packed
+    values = array(typecode)
+    values.frombytes(base64.b64decode(data, validate=True))
+    return values
+
+
+def _pack_index(index):
+    """
+    Keep the hash indexes for json, as pairs of value and rows since
+    a value may be missing
+
+    Parameters
+    ----------
+    index : Dict
+        Field to value to rows.
+
+    Returns
+    -------
+    Dict
+        Field to pairs of value and packed rows.
+
+    """
+    return {field: [[value, _pack_array(rows)] for value, rows in postings.items()]
+            for field, postings in index.items()}
+
+
+def _unpack_index(packed):
+    """
+    Read the hash indexes kept by _pack_index()
+
+    Parameters
+    ----------
+    packed : Dict
+        Field to pairs of value and packed rows.
+
+    Returns
+    -------
+    Dict
+        Field to value to rows.
+
+    """
+    return {field: {value: _unpack_array(rows) for value, rows in postings}
+            for field, postings in packed.items()}
+
+
+"""
+Class: MLS_Query_Engine
+"""
+
+
+class MLS_Query_Engine:
+
+    def __init__(self, hash_fields=HASH_INDEX_FIELDS,
+                 sorted_fields=SORTED_INDEX_FIELDS,
+                 room_fields=ROOM_INDEX_FIELDS):
+        """
+        Initialize the query engine of scraped rentals.
+        Each condition has a posting list of the rows it matches, from a
+        hash index of the scraped values or a sorted index of the numbers.
+        A query starts from the shortest posting list and intersects it with
+        the other conditions by looking up each remaining row, so its time
+        depends on the rows matched rather than the number of rentals.
+
+        Parameters
+        ----------
+        hash_fields : List, optional
+            Unit attributes with a hash index.
+            The default is HASH_INDEX_FIELDS.
+        sorted_fields : Dict, optional
+            Unit attributes with a sorted index, and how they are read
+            as numbers. The default is SORTED_INDEX_FIELDS.
+        room_fields : List, optional
+            Room attributes with a hash index.
+            The default is ROOM_INDEX_FIELDS.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.hash_fields = list(hash_fields)
+        self.sorted_fields = dict(sorted_fields)
+        self.room_fields = list(room_fields)
+
+        # MLS number of each row, and row of each MLS number
+        self.MLS_numbers = []
+        self.rows = {}
+
+        # Scraped values of the indexed unit attributes, each distinct value
+        # kept once with the position of the value of each row
+        self.columns = {}
+
+        # Hash indexes: field to value to sorted rows
+        self.hash_index = {}
+        self.room_index = {}
+
+        # Number of each row, NaN if missing, and the rows sorted by number
+        # without the missing ones
+        self.numbers = {}
+        self.sorted_index = {}
+
+        # Signature of the output the index was built from
+        self.signature = None
+
+    def build(self, MLS_dict, signature=None):
+        """
+        Build the indexes of scraped rentals
+
+        Parameters
+        ----------
+        MLS_dict : Dict
+            MLS_unit_attrs_dict: Dictionary of unit attributes
+            MLS_room_dict: Dictionary of room attributes
+        signature : Object, optional
+            Signature of the output the rentals were loaded from, saved with
+            the index to tell whether it is up to date. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        unit_attrs_dict = MLS_dict['MLS_unit_attrs_dict']
+        room_dict = MLS_dict['MLS_room_dict']
+
+        self.MLS_numbers = list(unit_attrs_dict)
+        self.rows = {MLS_num: row for row, MLS_num in enumerate(self.MLS_numbers)}
+        attribute_dicts = list(unit_attrs_dict.values())
+
+        self.columns = {}
+        self.hash_index = {}
+        for field in {*self.hash_fields, *self.sorted_fields}:
+            column = [attribute_dict.get(field)
+                      for attribute_dict in attribute_dicts]
+            self.columns[field] = self._encode_column(column)
+            if field in self.hash_fields:
+                self.hash_index[field] = self._build_hash_index(column)
+
+        self.numbers = {}
+        for field, rule in self.sorted_fields.items():
+            # Each distinct value is read once
+            values, codes = self.columns[field]
+            if rule == 'range':
+                bounds = [parse_range(value) for value in values]
+                self.numbers[f'{field} Low'] = array('d', (bounds[code][0]
+                                                           for code in codes))
+                self.numbers[f'{field} High'] = array('d', (bounds[code][1]
+                                                            for code in codes))
+            else:
+                numbers = [parse_number(value, rule) for value in values]
+                self.numbers[field] = array('d', (numbers[code]
+                                                  for code in codes))
+
+        self.sorted_index = {}
+        for field, numbers in self.numbers.items():
+            self.sorted_index[field] = array('I', sorted(
+                (row for row, number in enumerate(numbers)
+                 if not math.isnan(number)), key=numbers.__getitem__))
+
+        # Rows of the rentals having a room of each value
+        self.room_index = {field: {} for field in self.room_fields}
+        for MLS_num, room_table in room_dict.items():
+            row = self.rows.get(MLS_num)
+            if row is None:
+                continue
+            for field, index in self.room_index.items():
+                for value in {room.get(field) for room in room_table.values()}:
+                    posting = index.setdefault(value, array('I'))
+                    posting.append(row)
+
+        for index in self.room_index.values():
+            for posting in index.values():
+                posting[:] = array('I', sorted(posting))
+
+        self.signature = signature
+
+    def _encode_column(self, column):
+        """
+        Keep each distinct value of a column once
+
+        Parameters
+        ----------
+        column : List
+            Scraped value of each row.
+
+        Returns
+        -------
+        values : List
+            Distinct values, in order of appearance.
+        codes : array
+            Position of the value of each row in the distinct values.
+
+        """
+
+        positions = {}
+        codes = [positions.setdefault(value, len(positions)) for value in column]
+
+        # Few distinct values take a byte or two per row
+        if len(positions) <= 0xFF:
+            typecode = 'B'
+        elif len(positions) <= 0xFFFF:
+            typecode = 'H'
+        else:
+            typecode = 'I'
+
+        return list(positions), array(typecode, codes)
+
+    def _get_value(self, field, row):
+        """
+        Return the scraped value of a row
+
+        Parameters
+        ----------
+        field : Str
+            Indexed unit attribute.
+        row : Int
+            Row of the rental.
+
+        Returns
+        -------
+        Str or None
+            Scraped value.
+
+        """
+        values, codes = self.columns[field]
+        return values[codes[row]]
+
+    def _build_hash_index(self, column):
+        """
+        Build the hash index of a column
+
+        Parameters
+        ----------
+        column : List
+            Scraped value of each row.
+
+        Returns
+        -------
+        Dict
+            Rows of each value, in order.
+
+        """
+
+        index = {}
+        for row, value in enumerate(column):
+            posting = index.get(value)
+            if posting is None:
+                posting = index[value] = array('I')
+            posting.append(row)
+        return index
+
+    def save(self, index_path):
+        """
+        Save the indexes as json, replacing the previous ones at once.
+        The arrays are kept as their raw bytes in base64.
+
+        Parameters
+        ----------
+        index_path : Str
+            Path of the persisted index.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        state = {'version': QUERY_INDEX_VERSION,
+                 'byteorder': sys.byteorder,
+                 'signature': self.signature,
+                 'hash_fields': self.hash_fields,
+                 'sorted_fields': self.sorted_fields,
+                 'room_fields': self.room_fields,
+                 'MLS_numbers': self.MLS_numbers,
+                 'columns': {field: [values, _pack_array(codes)]
+                             for field, (values, codes)
+                             in self.columns.items()},
+                 'hash_index': _pack_index(self.hash_index),
+                 'room_index': _pack_index(self.room_index),
+                 'numbers': {field: _pack_array(numbers)
+                             for field, numbers in self.numbers.items()},
+                 'sorted_index': {field: _pack_array(rows)
+                                  for field, rows in self.sorted_index.items()}}
+
+        temp_path = index_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as fp:
+            json.dump(state, fp)
+        os.replace(temp_path, index_path)
+
+    def load(self, index_path, signature=None):
+        """
+        Load the indexes saved by save()
+
+        Parameters
+        ----------
+        index_path : Str
+            Path of the persisted index.
+        signature : Object, optional
+            Signature of the current output, the index is not loaded if it
+            was built from another one. The default is None.
+
+        Returns
+        -------
+        Bool
+            True if the index is loaded.
+
+        """
+
+        if not os.path.exists(index_path):
+            return False
+
+        try:
+            with open(index_path, encoding='utf-8') as fp:
+                state = json.load(fp)
+
+            # The signature is compared as it was saved, e.g. tuples as lists
+            if (state['version'] != QUERY_INDEX_VERSION
+                    or state['byteorder'] != sys.byteorder
+                    or state['signature'] != json.loads(json.dumps(signature))):
+                return False
+
+            columns = {field: (values, _unpack_array(codes))
+                       for field, (values, codes) in state['columns'].items()}
+            hash_index = _unpack_index(state['hash_index'])
+            room_index = _unpack_index(state['room_index'])
+            numbers = {field: _unpack_array(packed)
+                       for field, packed in state['numbers'].items()}
+            sorted_index = {field: _unpack_array(packed)
+                            for field, packed in state['sorted_index'].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+        self.hash_fields = state['hash_fields']
+        self.sorted_fields = state['sorted_fields']
+        self.room_fields = state['room_fields']
+        self.MLS_numbers = state['MLS_numbers']
+        self.rows = {MLS_num: row for row, MLS_num in enumerate(self.MLS_numbers)}
+        self.columns = columns
+        self.hash_index = hash_index
+        self.room_index = room_index
+        self.numbers = numbers
+        self.sorted_index = sorted_index
+        self.signature = signature
+        return True
+
+    def _plan_condition(self, field, operator, value):
+        """
+        Find the posting list of a condition and a test of a single row
+
+        Parameters
+        ----------
+        field : Str
+            Indexed unit attribute.
+        operator : Str
+            One of OPERATORS.
+        value : Str
+            Value compared with.
+
+        Raises
+        ------
+        ValueError
+            If the field has no index answering the operator.
+
+        Returns
+        -------
+        size : Int
+            Number of rows matched.
+        posting : Sequence
+            Rows matched.
+        test : function
+            Function telling whether a row is matched.
+
+        """
+
+        if operator == '=' and field in self.hash_index:
+            posting = self.hash_index[field].get(value, ())
+            values, codes = self.columns[field]
+            code = codes[posting[0]] if posting else None
+            return len(posting), posting, lambda row: codes[row] == code
+
+        if field not in self.sorted_index:
+            raise ValueError(f'{field} has no index for {operator}, indexed: '
+                             f'{", ".join(sorted({*self.hash_index, *self.sorted_index}))}')
+
+        rule = self.sorted_fields.get(field, 'float')
+        number = parse_number(value, rule)
+        if math.isnan(number):
+            raise ValueError(f'{value} is not a number of {field}')
+
+        numbers = self.numbers[field]
+        rows = self.sorted_index[field]
+        if operator in ['<', '>=']:
+            split = bisect_left(rows, number, key=numbers.__getitem__)
+        else:
+            split = bisect_right(rows, number, key=numbers.__getitem__)
+
+        if operator in ['<', '<=']:
+            low, high = 0, split
+        elif operator in ['>', '>=']:
+            low, high = split, len(rows)
+        else:
+            low, high = bisect_left(rows, number,
+                                    key=numbers.__getitem__), split
+
+        tests = {'<': lambda row: numbers[row] < number,
+                 '<=': lambda row: numbers[row] <= number,
+                 '>': lambda row: numbers[row] > number,
+                 '>=': lambda row: numbers[row] >= number,
+                 '=': lambda row: numbers[row] == number}
+
+        return high - low, rows[low:high], tests[operator]
+
+    def _plan_room_condition(self, field, value):
+        """
+        Find the posting list of rentals having a room of a value
+
+        Parameters
+        ----------
+        field : Str
+            Indexed room attribute.
+        value : Str
+            Value of the room attribute.
+
+        Raises
+        ------
+        ValueError
+            If the room attribute has no index.
+
+        Returns
+        -------
+        size : Int
+            Number of rows matched.
+        posting : Sequence
+            Rows matched.
+        test : function
+            Function telling whether a row is matched.
+
+        """
+
+        if field not in self.room_index:
+            raise ValueError(f'Room attribute {field} has no index, indexed: '
+                             f'{", ".join(self.room_index)}')
+
+        posting = self.room_index[field].get(value, ())
+        posting_set = None
+
+        def test(row):
+            nonlocal posting_set
+            if posting_set is None:
+                posting_set = set(posting)
+            return row in posting_set
+
+        return len(posting), posting, test
+
+    def query(self, conditions=(), room_conditions=(), order_by=None,
+              descending=False, limit=None):
+        """
+        Find the rentals matching all the conditions
+
+        Parameters
+        ----------
+        conditions : Iterable, optional
+            Conditions on unit attributes, either Field<=Value strings or
+            tuples of field, operator and value. The default is ().
+        room_conditions : Iterable, optional
+            Conditions of a room, either Field=Value strings or tuples of
+            field and value, e.g. ('Room', 'Den'). The default is ().
+        order_by : Str, optional
+            Indexed attribute the rentals are sorted by, numbers are sorted
+            as numbers and missing values come last. If it is None, rentals
+            are in the order they were scraped. The default is None.
+        descending : Bool, optional
+            Whether the rentals are sorted in descending order.
+            The default is False.
+        limit : Int, optional
+            Largest number of rentals returned, None for all.
+            The default is None.
+
+        Raises
+        ------
+        ValueError
+            If a condition or the sorting attribute has no index.
+
+        Returns
+        -------
+        List
+            MLS numbers of the rentals.
+
+        """
+
+        plans = []
+        for condition in conditions:
+            if isinstance(condition, str):
+                condition = parse_condition(condition)
+            plans.append(self._plan_condition(*condition))
+
+        for condition in room_conditions:
+            if isinstance(condition, str):
+                field, operator, value = parse_condition(condition)
+                if operator != '=':
+                    raise ValueError(f'Room condition {condition} must be of '
+                                     'the form Field=Value')
+                condition = (field, value)
+            plans.append(self._plan_room_condition(*condition))
+
+        if order_by is not None and order_by not in self.numbers \
+                and order_by not in self.columns:
+            raise ValueError(f'{order_by} has no index to be sorted by')
+
+        if not plans:
+            rows = self._get_all_rows(order_by, descending)
+        else:
+            # Start from the shortest posting list, and keep its rows
+            # matched by the other conditions
+            plans.sort(key=lambda plan: plan[0])
+            _, posting, _ = plans[0]
+            tests = [test for _, _, test in plans[1:]]
+            rows = [row for row in posting
+                    if all(test(row) for test in tests)]
+            rows = self._sort_rows(rows, order_by, descending)
+
+        if limit is not None:
+            rows = rows[:limit]
+
+        return [self.MLS_numbers[row] for row in rows]
+
+    def _get_all_rows(self, order_by, descending):
+        """
+        Return all the rows, sorted by an attribute
+
+        Parameters
+        ----------
+        order_by : Str or None
+            Attribute the rows are sorted by, None for the scraped order.
+        descending : Bool
+            Whether the rows are sorted in descending order.
+
+        Returns
+        -------
+        List
+            Rows.
+
+        """
+
+        if order_by not in self.sorted_index:
+            return self._sort_rows(range(len(self.MLS_numbers)), order_by,
+                                   descending)
+
+        # Already sorted by the index, followed by the missing numbers
+        rows = self.sorted_index[order_by]
+        rows = list(reversed(rows)) if descending else list(rows)
+        numbers = self.numbers[order_by]
+        return rows + [row for row, number in enumerate(numbers)
+                       if math.isnan(number)]
+
+    def _sort_rows(self, rows, order_by, descending):
+        """
+        Sort rows by an attribute, missing values come last
+
+        Parameters
+        ----------
+        rows : Iterable
+            Rows.
+        order_by : Str or None
+            Attribute the rows are sorted by, None for the scraped order.
+        descending : Bool
+            Whether the rows are sorted in descending order.
+
+        Returns
+        -------
+        List
+            Sorted rows.
+
+        """
+
+        if order_by is None:
+            return sorted(rows)
+
+        if order_by in self.numbers:
+            get_key = self.numbers[order_by].__getitem__
+            present = [row for row in rows if not math.isnan(get_key(row))]
+        else:
+            values, codes = self.columns[order_by]
+            get_key = lambda row: values[codes[row]]
+            present = [row for row in rows if get_key(row)]
+
+        # Rows of the same value stay in the scraped order
+        present_set = set(present)
+        missing = sorted(row for row in rows if row not in present_set)
+        present.sort()
+        present.sort(key=get_key, reverse=descending)
+        return present + missing
+
+    def get_values(self, MLS_numbers, fields):
+        """
+        Return the scraped values of indexed attributes
+
+        Parameters
+        ----------
+        MLS_numbers : List
+            MLS numbers of the rentals.
+        fields : List
+            Indexed unit attributes.
+
+        Returns
+        -------
+        List
+            Dictionary of the values of each rental.
+
+        """
+
+        return [{field: self._get_value(field, self.rows[MLS_num])
+                 for field in fields if field in self.columns}
+                for MLS_num in MLS_numbers]
+
+    def get_rental_count(self):
+        """
+        Return the number of indexed rentals
+
+        Returns
+        -------
+        Int
+            Number of rentals.
+
+        """
+        return len(self.MLS_numbers)
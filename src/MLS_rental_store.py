@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_Rental_Store
+Description: Compact records of scraped rentals with shared labels and interned values
+"""
+
+from collections.abc import Mapping, MutableMapping
+from types import MappingProxyType
+
+# Values up to this length are interned, e.g. City, Y/N flags, room names
+# and description phrases. Longer values like Client Remks are seldom
+# repeated and kept as they are.
+INTERN_MAX_LENGTH = 64
+
+"""
+Class: MLS_Rental_Record
+"""
+
+
+class MLS_Rental_Record:
+
+    # Fixed slots instead of an attribute dictionary per record
+    __slots__ = ('unit_labels', 'unit_values', 'rooms')
+
+    def __init__(self, unit_labels, unit_values, rooms):
+        """
+        Initialize the compact record of a rental
+
+        Parameters
+        ----------
+        unit_labels : Tuple
+            Labels of the unit attributes in their order, shared by the
+            rentals of the same layout.
+        unit_values : Tuple
+            Value of each label.
+        rooms : Tuple
+            Room index, shared labels and values of each room.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.unit_labels = unit_labels
+        self.unit_values = unit_values
+        self.rooms = rooms
+
+    def get_attribute_dict(self):
+        """
+        Return the unit attributes as a dictionary
+
+        Returns
+        -------
+        Dict
+            Unit attributes of rental, in the order they were scraped.
+
+        """
+        return dict(zip(self.unit_labels, self.unit_values))
+
+    def get_room_table(self):
+        """
+        Return the room attributes as a dictionary
+
+        Returns
+        -------
+        Dict
+            Room attributes of each room index.
+
+        """
+        return {room_index: dict(zip(labels, values))
+                for room_index, labels, values in self.rooms}
+
+
+"""
+Class: MLS_Rental_Store
+"""
+
+
+class MLS_Rental_Store(MutableMapping):
+
+    def __init__(self):
+        """
+        Initialize the store of scraped rentals by MLS number.
+        It is used as a dictionary of unit attributes and room attributes
+        of each rental. Each rental is kept as a MLS_Rental_Record: the
+        label tuples are shared by the rentals of the same layout, and
+        repeated values are kept once. The dictionaries are built again
+        whenever a rental is read.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        # Record of each MLS number, in the order they were added
+        self.records = {}
+
+        # Label tuples and values kept once
+        self.layouts = {}
+        self.values = {}
+
+    def _intern(self, value):
+        """
+        Return the kept copy of a repeated value
+
+        Parameters
+        ----------
+        value : Object
+            Scraped value.
+
+        Returns
+        -------
+        Object
+            Value equal to the given one, shared by all the rentals.
+
+        """
+
+        if not isinstance(value, str) or len(value) > INTERN_MAX_LENGTH:
+            return value
+        return self.values.setdefault(value, value)
+
+    def _get_layout(self, labels):
+        """
+        Return the kept tuple of labels
+
+        Parameters
+        ----------
+        labels : Iterable
+            Labels in their order.
+
+        Returns
+        -------
+        Tuple
+            Labels, shared by the rentals of the same layout.
+
+        """
+        labels = tuple(map(self._intern, labels))
+        return self.layouts.setdefault(labels, labels)
+
+    def __setitem__(self, MLS_num, rental):
+        attribute_dict, room_table = rental
+
+        rooms = tuple((self._intern(room_index),
+                       self._get_layout(room_attrs),
+                       tuple(map(self._intern, room_attrs.values())))
+                      for room_index, room_attrs in room_table.items())
+
+        self.records[MLS_num] = MLS_Rental_Record(
+            self._get_layout(attribute_dict),
+            tuple(map(self._intern, attribute_dict.values())),
+            rooms)
+
+    def __getitem__(self, MLS_num):
+        record = self.records[MLS_num]
+        return record.get_attribute_dict(), record.get_room_table()
+
+    def __delitem__(self, MLS_num):
+        del self.records[MLS_num]
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, MLS_num):
+        return MLS_num in self.records
+
+    def iter_rentals(self):
+        """
+        Iterate the rentals, each built as dictionaries when it is reached
+
+        Yields
+        ------
+        MLS_num : Str
+            MLS number of the rental.
+        attribute_dict : Dict
+            Unit attributes of rental.
+        room_table : Dict
+            Room attributes of rental.
+
+        """
+
+        for MLS_num, record in self.records.items():
+            yield MLS_num, record.get_attribute_dict(), record.get_room_table()
+
+    def get_MLS_dict(self):
+        """
+        Build the dictionaries of all the rentals
+
+        Returns
+        -------
+        MLS_dict : Dict
+            MLS_unit_attrs_dict: Dictionary of unit attributes
+            MLS_room_dict: Dictionary of room attributes
+
+        """
+
+        MLS_unit_attrs_dict = {}
+        MLS_room_dict = {}
+
+        for MLS_num, record in self.records.items():
+            MLS_unit_attrs_dict[MLS_num] = record.get_attribute_dict()
+            MLS_room_dict[MLS_num] = record.get_room_table()
+
+        return {'MLS_unit_attrs_dict': MLS_unit_attrs_dict,
+                'MLS_room_dict': MLS_room_dict}
+
+    def get_MLS_view(self):
+        """
+        Return read-only views of the rentals with the layout of MLS_dict.
+        Nothing is copied, a rental is built when it is looked up.
+
+        Returns
+        -------
+        MLS_view : Mapping
+            MLS_unit_attrs_dict: View of unit attributes
+            MLS_room_dict: View of room attributes
+
+        """
+        return MappingProxyType(
+            {'MLS_unit_attrs_dict': MLS_Rental_View(self, 'unit_attrs'),
+             'MLS_room_dict': MLS_Rental_View(self, 'room')})
+
+
+"""
+Class: MLS_Rental_View
+"""
+
+
+class MLS_Rental_View(Mapping):
+
+    def __init__(self, store, part):
+        """
+        Initialize a read-only view of the unit attributes or the room
+        attributes of the rentals in a store, by MLS number
+
+        Parameters
+        ----------
+        store : MLS_Rental_Store
+            Store of the rentals.
+        part : Str
+            unit_attrs or room.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.store = store
+        self.part = part
+
+    def __getitem__(self, MLS_num):
+        record = self.store.records[MLS_num]
+
+        if self.part == 'unit_attrs':
+            return MappingProxyType(record.get_attribute_dict())
+
+        return MappingProxyType({room_index: MappingProxyType(room_attrs)
+                                 for room_index, room_attrs
+                                 in record.get_room_table().items()})
+
+    def __iter__(self):
+        return iter(self.store.records)
+
+    def __len__(self):
+        return len(self.store.records)
+
+    def __contains__(self, MLS_num):
+        return MLS_num in self.store.records
@@ -0,0 +1,487 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_Report_Generator
+Description: Synthetic MLS html reports of any number of rentals
+"""
+
+import argparse
+import os
+import random
+import re
+
+# Sample report whose markup is reproduced
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.pardir, 'sample', 'input',
+                             'Dummy_MLS_Website.html')
+
+# Encoding of the sample report
+TEMPLATE_ENCODING = 'utf-8'
+
+# Start of a rental section in the sample report
+LISTING_START = re.compile(r'[ \t]*<div class="link-item status-')
+
+# Opening and closing div tags, to find the end of a rental section
+DIV_TAG = re.compile(r'<div[\s>]|</div>')
+
+# Bold values of the address block: street, unit, city, province, postal code
+ADDRESS_VALUE = re.compile(r'<span class="value" style="font-weight:bold">'
+                           r'([^<]*)</span>')
+ADDRESS_VARIABLE = ['Street Number', 'Unit Number', 'City', 'Province',
+                    'Postal Code']
+
+# Label-value pair of the unit attributes
+LABEL_VALUE = re.compile(r'<label[^>]*>([^<]*):</label>'
+                         r'<span class="value"[^>]*>([^<]*)</span>')
+
+# Value of a field without label, e.g. the cells of a room row
+FIELD_VALUE = re.compile(r'<span class="value">([^<]*)</span>')
+
+# Row of the room table and the table itself
+ROOM_HEADER = '<b><u>Description</u></b>'
+ROOM_ROW_START = '\t\t\t<div class="formitem formgroup vertical">\n'
+ROOM_TABLE_END = ('\t\t</div>\n\t\t<div class="formitem formgroup vertical" '
+                  'style="width:750px;border-bottom')
+ROOM_VARIABLE = ['Room Index', 'Room', 'Level', 'Length', 'Width',
+                 'Description 1', 'Description 2', 'Description 3']
+
+# Number of rooms of a rental, shown as Rms
+MIN_ROOMS = 1
+MAX_ROOMS = 12
+ROOM_COUNT_LABEL = 'Rms'
+
+# Status of the rental sections
+STATUSES = ['new', 'pc']
+
+# Count of results in the page header
+RESULT_COUNT = re.compile(r'<div class="count-container">\d+ Results</div>')
+
+"""
+Values of the randomized fields, other fields keep the value of the sample
+"""
+STREETS = ['Dummy Ave', 'Yonge St', 'Bloor St W', 'Queen St E', 'King St W',
+           'Bay St', 'Sheppard Ave E', 'Eglinton Ave W', 'Dundas St W']
+CITIES = ['Toronto', 'Mississauga', 'Markham', 'Vaughan', 'Richmond Hill',
+          'Oakville', 'Brampton']
+SQFT_RANGES = ['<500', '500-599', '600-699', '700-799', '800-899', '900-999',
+               '1000-1199', '1200-1399', '1400-1599', '2000-2249', '3000+']
+EXPOSURES = ['N', 'S', 'E', 'W', 'Ne', 'Nw', 'Se', 'Sw']
+GARAGES = ['Undergrnd', 'Attached', 'None', 'Surface']
+YES_NO_FIELDS = ['SPIS', 'Fam Rm', 'Fireplace/Stv', 'Pets Perm', 'All Incl',
+                 'Water Incl', 'Heat Incl', 'Hydro Incl', 'Cable TV Incl',
+                 'CAC Incl', 'Bldg Ins Incl', 'Prkg Incl', 'ComElem Inc',
+                 'Pvt Ent', 'Furnished']
+ROOMS = ['Living', 'Dining', 'Kitchen', 'Prim Bdrm', '2nd Br', '3rd Br',
+         'Den', 'Family', 'Laundry', 'Foyer', 'Bathroom', 'Office']
+ROOM_LEVELS = ['Flat', 'Main', 'Upper', 'Lower', 'Bsmt', '2nd']
+ROOM_DESCRIPTIONS = ['', 'Open Concept', 'Laminate', 'Hardwood Floor',
+                     'W/O To Balcony', 'Double Closet', 'Closet', 'Window',
+                     '4 Pc Ensuite', 'Granite Counter', 'Stainless Steel Appl',
+                     'Broadloom', 'Ceramic Floor', 'Large Window']
+
+"""
+Class: MLS_Report_Generator
+"""
+
+
+class MLS_Report_Generator:
+
+    def __init__(self, template_path=TEMPLATE_PATH, seed=None):
+        """
+        Initialize the generator of synthetic MLS reports.
+        The page, the rental sections and the room rows of the sample report
+        are used as templates, so the markup is the same as the sample and
+        only the values of the fields change.
+
+        Parameters
+        ----------
+        template_path : Str, optional
+            Path of the sample MLS html.
+            The default is TEMPLATE_PATH.
+        seed : Int, optional
+            Seed of the random values, the same seed gives the same report.
+            The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.random = random.Random(seed)
+
+        # Generator of the value of each randomized unit attribute
+        self.field_generators = {
+            'List': lambda: f'${self.random.randrange(1500, 6000, 50):,}',
+            'DOM': lambda: str(self.random.randint(0, 90)),
+            'Contract Date': lambda: (f'{self.random.randint(1, 12)}/'
+                                      f'{self.random.randint(1, 28)}/2099'),
+            'Bedrooms': lambda: self.random.choice(['1', '2', '3', '1 + 1',
+                                                    '2 + 1']),
+            'Washrooms': lambda: str(self.random.randint(1, 3)),
+            'Apx Sqft': lambda: self.random.choice(SQFT_RANGES),
+            'Level': lambda: str(self.random.randint(1, 50)),
+            'Exposure': lambda: self.random.choice(EXPOSURES),
+            'Gar/Gar Spcs': lambda: (f'{self.random.choice(GARAGES)} / '
+                                     f'{self.random.randint(0, 2)}.0'),
+            'Park/Drv Spcs': lambda: str(self.random.randint(0, 2)),
+            'Tot Prk Spcs': lambda: f'{self.random.randint(0, 2)}.0',
+            **{field: lambda: self.random.choice(['Y', 'N'])
+               for field in YES_NO_FIELDS}}
+
+        with open(template_path, encoding=TEMPLATE_ENCODING) as fp:
+            self._load_template(fp.read())
+
+    def _load_template(self, html):
+        """
+        Cut the sample report into the page around the rental sections,
+        the template of a rental section and the template of a room row
+
+        Parameters
+        ----------
+        html : Str
+            Sample MLS html.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        starts = [match.start() for match in LISTING_START.finditer(html)]
+        ends = [self._find_section_end(html, start) for start in starts]
+
+        # Page before the first and after the last rental section,
+        # and the white space between the sections
+        self.page_head = html[:starts[0]]
+        self.page_tail = html[ends[-1]:]
+        self.separator = html[ends[0]:starts[1]] if len(starts) > 1 else '\n'
+
+        sections = [html[start:end] for start, end in zip(starts, ends)]
+
+        # Rental sections with and without the information of the rental
+        listing = next(section for section in sections if ROOM_HEADER in section)
+        empty_listing = next(section for section in sections
+                             if LABEL_VALUE.search(section) is None)
+
+        self.listing = self._compile_listing(listing)
+        self.empty_listing = self._compile(empty_listing,
+                                           self._find_common_slots(empty_listing))
+
+    def _find_section_end(self, html, start):
+        """
+        Find the end of the div starting a rental section
+
+        Parameters
+        ----------
+        html : Str
+            Sample MLS html.
+        start : Int
+            Position of the rental section.
+
+        Returns
+        -------
+        Int
+            Position after the closing div of the section.
+
+        """
+
+        depth = 0
+        for match in DIV_TAG.finditer(html, start):
+            depth += -1 if match.group() == '</div>' else 1
+            if depth == 0:
+                return match.end()
+
+        return len(html)
+
+    def _compile_listing(self, listing):
+        """
+        Compile the template of a rental section with its room table
+
+        Parameters
+        ----------
+        listing : Str
+            Html of a rental section of the sample.
+
+        Returns
+        -------
+        Tuple
+            Literal pieces of the section and the slots between them.
+
+        """
+
+        # Room table, every row has the same markup
+        header = listing.index(ROOM_HEADER)
+        rows_start = listing.index(ROOM_ROW_START, header)
+        rows_end = listing.index(ROOM_TABLE_END, rows_start)
+        row = ROOM_ROW_START + listing[rows_start:rows_end].split(
+            ROOM_ROW_START)[1]
+
+        self.room_row = self._compile(
+            row, [(*match.span(1), variable) for match, variable
+                  in zip(FIELD_VALUE.finditer(row), ROOM_VARIABLE)])
+
+        slots = self._find_common_slots(listing)
+        slots.append((rows_start, rows_end, 'rooms'))
+
+        # Address, the first bold values of the section
+        for match, variable in zip(ADDRESS_VALUE.finditer(listing),
+                                   ADDRESS_VARIABLE):
+            slots.append((*match.span(1), variable))
+
+        for match in LABEL_VALUE.finditer(listing):
+            label = match.group(1)
+            if label in self.field_generators or label == ROOM_COUNT_LABEL:
+                slots.append((*match.span(2), label))
+
+        return self._compile(listing, slots)
+
+    def _find_common_slots(self, section):
+        """
+        Find the MLS number, the status and the index of a rental section
+
+        Parameters
+        ----------
+        section : Str
+            Html of a rental section of the sample.
+
+        Returns
+        -------
+        slots : List
+            Tuples of start, end and name of the slots.
+
+        """
+
+        MLS_num = re.search(r'\sid="([^"]+)"', section).group(1)
+
+        slots = [(match.start(), match.end(), 'MLS#')
+                 for match in re.finditer(re.escape(MLS_num), section)]
+        slots += [(*match.span(1), 'status')
+                  for match in re.finditer(r'status-(\w+)', section)]
+        slots += [(*match.span(1), 'index') for match in re.finditer(
+            r'<span class="map-marker-index">(\d+)</span>', section)]
+
+        return slots
+
+    def _compile(self, section, slots):
+        """
+        Split a template into literal pieces and slots
+
+        Parameters
+        ----------
+        section : Str
+            Html of the template.
+        slots : List
+            Tuples of start, end and name of the slots.
+
+        Returns
+        -------
+        Tuple
+            Literal pieces of the template and the names of the slots,
+            there is one more piece than slots.
+
+        """
+
+        pieces = []
+        names = []
+        position = 0
+        for start, end, name in sorted(slots):
+            pieces.append(section[position:start])
+            names.append(name)
+            position = end
+        pieces.append(section[position:])
+
+        return pieces, names
+
+    def _render(self, template, values):
+        """
+        Fill the slots of a template
+
+        Parameters
+        ----------
+        template : Tuple
+            Literal pieces of the template and the names of the slots.
+        values : Dict
+            Value of each slot.
+
+        Returns
+        -------
+        Str
+            Html of the template.
+
+        """
+
+        pieces, names = template
+        html = [pieces[0]]
+        for name, piece in zip(names, pieces[1:]):
+            html.append(values[name])
+            html.append(piece)
+
+        return ''.join(html)
+
+    def write_report(self, html_path, listing_count, empty_rate=0.0):
+        """
+        Write a report of the given number of rentals.
+        Rental sections are written one at a time, so reports much larger
+        than the memory can be written.
+
+        Parameters
+        ----------
+        html_path : Str
+            Path of the MLS html to be written.
+        listing_count : Int
+            Number of rental sections.
+        empty_rate : Float, optional
+            Share of the rental sections without information, which fail
+            to be scraped like some sections of the sample.
+            The default is 0.0.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        MLS_nums = self.random.sample(range(1000000, 10000000), listing_count)
+
+        with open(html_path, 'w', encoding=TEMPLATE_ENCODING) as fp:
+            fp.write(RESULT_COUNT.sub(
+                f'<div class="count-container">{listing_count} Results</div>',
+                self.page_head))
+
+            for index, MLS_num in enumerate(MLS_nums, 1):
+                if index > 1:
+                    fp.write(self.separator)
+                fp.write(self.generate_listing(index, f'C{MLS_num}',
+                                               self.random.random() < empty_rate))
+
+            fp.write(self.page_tail)
+
+    def generate_listing(self, index, MLS_num, empty=False):
+        """
+        Generate the html of a rental section with random values
+
+        Parameters
+        ----------
+        index : Int
+            Index of the rental section in the report, starting from 1.
+        MLS_num : Str
+            MLS number of the rental.
+        empty : Bool, optional
+            Whether the section is without information.
+            The default is False.
+
+        Returns
+        -------
+        Str
+            Html of the rental section.
+
+        """
+
+        values = {'MLS#': MLS_num,
+                  'status': self.random.choice(STATUSES),
+                  'index': str(index)}
+
+        if empty:
+            return self._render(self.empty_listing, values)
+
+        room_count = self.random.randint(MIN_ROOMS, MAX_ROOMS)
+
+        values.update({
+            'Street Number': (f'{self.random.randint(1, 9999)} '
+                              f'{self.random.choice(STREETS)}'),
+            'Unit Number': str(self.random.randint(1, 3999)),
+            'City': self.random.choice(CITIES),
+            'Province': 'Ontario',
+            'Postal Code': self._generate_postal_code(),
+            ROOM_COUNT_LABEL: str(room_count),
+            'rooms': ''.join(self._generate_room(room_index)
+                             for room_index in range(1, room_count + 1))})
+
+        for field, generator in self.field_generators.items():
+            values[field] = generator()
+
+        return self._render(self.listing, values)
+
+    def _generate_room(self, room_index):
+        """
+        Generate the html of a room row with random values
+
+        Parameters
+        ----------
+        room_index : Int
+            Index of the room, starting from 1.
+
+        Returns
+        -------
+        Str
+            Html of the room row.
+
+        """
+
+        descriptions = self.random.sample(ROOM_DESCRIPTIONS, 3)
+
+        return self._render(self.room_row, {
+            'Room Index': str(room_index),
+            'Room': self.random.choice(ROOMS),
+            'Level': self.random.choice(ROOM_LEVELS),
+            'Length': f'{self.random.uniform(2, 30):.2f}',
+            'Width': f'{self.random.uniform(2, 30):.2f}',
+            'Description 1': descriptions[0],
+            'Description 2': descriptions[1],
+            'Description 3': descriptions[2]})
+
+    def _generate_postal_code(self):
+        """
+        Generate a postal code of the form of the sample, e.g. M2AB1D
+
+        Returns
+        -------
+        Str
+            Postal code.
+
+        """
+
+        letters = 'ABCEGHJKLMNPRSTVXY'
+        return (f'M{self.random.randint(1, 9)}'
+                f'{self.random.choice(letters)}{self.random.choice(letters)}'
+                f'{self.random.randint(0, 9)}{self.random.choice(letters)}')
+
+
+def arguement_parsing():
+    parser = argparse.ArgumentParser(
+        description='Generate a synthetic MLS html report with the markup of '
+        'the sample report and random values')
+    parser.add_argument('output',
+                        type=str,
+                        help='Output path of the MLS html')
+    parser.add_argument('-n', '--listings',
+                        dest='listings',
+                        type=int,
+                        default=1000,
+                        help='Number of rental sections')
+    parser.add_argument('--seed',
+                        type=int,
+                        default=None,
+                        help='Seed of the random values')
+    parser.add_argument('--empty-rate',
+                        dest='empty_rate',
+                        type=float,
+                        default=0.0,
+                        help='Share of the rental sections without information')
+    parser.add_argument('--template',
+                        type=str,
+                        default=TEMPLATE_PATH,
+                        help='Sample MLS html whose markup is reproduced')
+
+    return parser.parse_args()
+
+
+def main():
+    args = arguement_parsing()
+
+    generator = MLS_Report_Generator(args.template, args.seed)
+    generator.write_report(args.output, args.listings, args.empty_rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,11 +8,46 @@ Update Date: 17/07/2022
 @author: hinwm
 """
 import argparse
-from os.path import exists
-from sys import exit
-from MLS_scraper_module import MLS_Scraper_Module
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from glob import glob
+from multiprocessing import freeze_support
+from os import stat
+from os.path import exists, isdir, join
+from signal import signal, SIGTERM
+from sys import argv, exit
+from time import perf_counter
+from MLS_scraper_module import (MLS_Scraper_Module, PARSER_BACKENDS,
+                                DEFAULT_PARSER, DEFAULT_CHUNK_SIZE,
+                                ENGINES, DEFAULT_ENGINE, scrape_html_file)
+from MLS_html_source import HTML_FILE_PATTERNS
+from MLS_listing_cache import DEFAULT_CACHE_SIZE
 from MLS_command_line_view import MLS_Command_Line_View
 
+# Bytes per megabyte of the cache size
+MEGABYTE = 1024 * 1024
+
+# First argument of the watch mode, e.g. MLS_scraper.exe watch folder output
+WATCH_COMMAND = 'watch'
+
+# Output formats the watch mode appends the rentals to
+WATCH_FORMATS = ['jsonl', 'sqlite']
+
+# First argument of the HTTP service, e.g. MLS_scraper.exe serve --port 8765
+SERVE_COMMAND = 'serve'
+
+# First argument of the lookup of single rentals through the sidecar index,
+# e.g. MLS_scraper.exe listing report.html C1008101
+LISTING_COMMAND = 'listing'
+
+# First argument of the queries over a scraped output,
+# e.g. MLS_scraper.exe query output --where City=Toronto --order-by DOM
+QUERY_COMMAND = 'query'
+
+# First argument of the merge of outputs into the latest rental of each MLS#,
+# e.g. MLS_scraper.exe merge merged 2026-09 2026-10
+MERGE_COMMAND = 'merge'
+
 """
 Class: MLS_Scraper
 """
@@ -36,8 +71,51 @@ class MLS_Scraper:
         
         self.args = args
         
+        # Output format, csv or json following -t / -nt unless given
+        if self.args.format is None:
+            self.args.format = 'csv' if self.args.tabular else 'json'
+        else:
+            self.args.tabular = self.args.format not in ['json', 'jsonl']
+        
+        # Writer of json lines, rentals are streamed to it while scraping
+        self.rental_writer = None
+        
+        # MLS html files of batch mode, None if the input is a single file
+        self.html_paths = self.find_html_files(self.args.input)
+        
+        # Scraping status of each html file in batch mode
+        self.file_scraping_status = {}
+        
+        # Cache of scraped rentals
+        if self.args.no_cache:
+            self.cache_dir = None
+        else:
+            self.cache_dir = self.args.cache_dir
+        self.cache_size = self.args.cache_size * MEGABYTE
+        
+        # Number of cache hit and miss of all the html files in batch mode
+        self.cache_status = {'hit': 0, 'miss': 0}
+        
+        # Number of extraction template hit and miss in batch mode
+        self.template_status = {'hit': 0, 'miss': 0}
+        
+        # Whether a single html is cut into rental sections while scraping,
+        # to read it in chunks or to share the sections among worker processes
+        self.split_by_rental = (self.args.chunk_size is not None
+                                or self.args.workers > 1)
+        
         # Initialize scraper module
-        self.scraper = MLS_Scraper_Module()
+        self.scraper = MLS_Scraper_Module(parser=self.args.parser,
+                                          listings_only=self.args.listings_only,
+                                          cache_dir=self.cache_dir,
+                                          cache_size=self.cache_size,
+                                          engine=self.args.engine,
+                                          template=self.args.template)
+        
+        # Time and peak memory of the stages, profiled by cProfile if required
+        from MLS_stage_profiler import MLS_Stage_Profiler
+        self.profiler = MLS_Stage_Profiler(profile=self.args.profile is not None)
+        self.scraper.set_profiler(self.profiler)
         
         # Initialize command line view
         self.view = MLS_Command_Line_View()
@@ -45,9 +123,24 @@ class MLS_Scraper:
         # Display initialization message
         self.view.initialization(self.args)
         
+        # Typed output formats need pyarrow, checked before scraping
+        from MLS_arrow_writer import MLS_Arrow_Writer, ARROW_FORMATS
+        if self.args.format in ARROW_FORMATS:
+            try:
+                MLS_Arrow_Writer()
+            except ImportError:
+                self.view.error_missing_dependency('pyarrow', self.args.format)
+                exit()
+        
+        # Warn the user if the requested parser is not installed
+        if self.scraper.parser != self.scraper.requested_parser:
+            self.view.parser_fallback_view(self.scraper.requested_parser,
+                                           self.scraper.parser)
+        
     def read_html(self):
         """
         Read the html file
+        If the html is split by rental, it is read while scraping instead
 
         Returns
         -------
@@ -56,8 +149,17 @@ class MLS_Scraper:
         """
         html_path = self.args.input
         
+        # In batch mode, the html files are read by the workers
+        if self.html_paths is not None:
+            if not self.html_paths:
+                self.view.error_file_not_exist(html_path)
+                exit()
+            return
+        
         if self.check_file_exist(html_path):
-            self.view.read_html_view(self.scraper.read_html(html_path))
+            if not self.split_by_rental:
+                with self.profiler.stage('read_html'):
+                    self.view.read_html_view(self.scraper.read_html)(html_path)
         else:
             self.view.error_file_not_exist(html_path)
             exit()
@@ -71,7 +173,116 @@ class MLS_Scraper:
         None.
         
         """
-        self.view.get_all_rental_view(self.scraper.get_all_rental())
+        # The diff against a previous output needs all the rentals in memory
+        if self.args.format == 'jsonl' and self.args.diff_against is None:
+            self.open_rental_writer()
+        
+        if self.html_paths is not None:
+            with self.profiler.stage('get_all_rental'):
+                self.view.get_all_rental_view(self.scrape_html_files)()
+            return
+        
+        if self.split_by_rental:
+            rentals = self.scraper.iter_rentals(
+                self.args.input,
+                self.args.chunk_size or DEFAULT_CHUNK_SIZE,
+                self.args.workers)
+        else:
+            rentals = None
+        
+        with self.profiler.stage('get_all_rental'):
+            self.view.get_all_rental_view(self.scraper.get_all_rental)(rentals)
+            self.scraper.close_cache()
+        
+    def open_rental_writer(self):
+        """
+        Open the json lines output before scraping,
+        the rentals are written to it as they are scraped
+
+        Returns
+        -------
+        None.
+
+        """
+        output_path = self.args.output
+        if not self.check_file_exist(output_path):
+            self.view.error_file_not_exist(output_path)
+            exit()
+        
+        from MLS_jsonl_writer import MLS_JSONL_Writer, JSONL_FILE_NAME
+        self.rental_writer = MLS_JSONL_Writer(join(output_path, JSONL_FILE_NAME))
+        self.scraper.set_rental_writer(self.rental_writer)
+        
+    def scrape_html_files(self):
+        """
+        Scrap all rental information of the html files in batch mode
+        The files are shared among a pool of worker processes,
+        and merged in the order of file path regardless of the number of workers
+        
+        Returns
+        -------
+        None.
+        
+        """
+        options = {'parser': self.args.parser,
+                   'listings_only': self.args.listings_only,
+                   'chunk_size': self.args.chunk_size,
+                   'cache_dir': self.cache_dir,
+                   'cache_size': self.cache_size,
+                   'engine': self.args.engine,
+                   'template': self.args.template}
+        
+        # Start with no rental in case all the files fail
+        self.scraper.merge_rental_information(
+            {'MLS_unit_attrs_dict': {}, 'MLS_room_dict': {}},
+            {'success': [], 'failure': []})
+        
+        if self.args.workers > 1:
+            with ProcessPoolExecutor(max_workers=self.args.workers) as executor:
+                futures = [executor.submit(scrape_html_file, html_path, **options)
+                           for html_path in self.html_paths]
+                for html_path, future in zip(self.html_paths, futures):
+                    self.merge_html_file(html_path, future.result)
+        else:
+            for html_path in self.html_paths:
+                self.merge_html_file(
+                    html_path, partial(scrape_html_file, html_path, **options))
+                
+    def merge_html_file(self, html_path, get_result):
+        """
+        Merge the rental information of a html file into the scraper module
+
+        Parameters
+        ----------
+        html_path : Str
+            Path of the MLS html.
+        get_result : function
+            Function returning the MLS_dict, scraping status, cache status
+            and template status of the html.
+
+        Returns
+        -------
+        None.
+
+        """
+        try:
+            (MLS_dict, scraping_status, cache_status,
+             template_status) = get_result()
+        except Exception:
+            # The whole file cannot be read
+            self.file_scraping_status[html_path] = None
+            return
+        
+        self.scraper.merge_rental_information(MLS_dict, scraping_status)
+        self.file_scraping_status[html_path] = scraping_status
+        
+        if cache_status is not None:
+            for status, count in cache_status.items():
+                self.cache_status[status] += count
+        
+        if template_status is not None:
+            for status, count in template_status.items():
+                self.template_status[status] += count
         
     def scraping_summary(self):
         """
@@ -83,7 +294,29 @@ class MLS_Scraper:
 
         """
         scraping_result = self.scraper.get_rental_scraping_status()
-        self.view.scraping_summary_view(scraping_result)
+        
+        if self.cache_dir is None:
+            cache_status = None
+        elif self.html_paths is None:
+            cache_status = self.scraper.get_cache_status()
+        else:
+            cache_status = self.cache_status
+        
+        if self.scraper.get_template_status() is None:
+            template_status = None
+        elif self.html_paths is None:
+            template_status = self.scraper.get_template_status()
+        else:
+            template_status = self.template_status
+        
+        if self.html_paths is None:
+            self.view.scraping_summary_view(scraping_result,
+                                            cache_status=cache_status,
+                                            template_status=template_status)
+        else:
+            self.view.scraping_summary_view(scraping_result,
+                                            self.file_scraping_status,
+                                            cache_status, template_status)
         
     def output_rental_information(self):
         """
@@ -94,15 +327,99 @@ class MLS_Scraper:
         None.
         """
         output_path = self.args.output
-        if self.check_file_exist(output_path):
-            self.view.output_rental_information_view(
-                self.scraper.output_rental_information(self.args.output,
-                                                   self.args.tabular)
-                )
-        else:
+        if not self.check_file_exist(output_path):
             self.view.error_file_not_exist(output_path)
             exit()
         
+        if self.args.diff_against is not None:
+            with self.profiler.stage('output_rental_information'):
+                self.output_snapshot_diff()
+        elif self.rental_writer is not None:
+            with self.profiler.stage('output_rental_information'):
+                self.rental_writer.close()
+            self.view.jsonl_output_view(self.rental_writer.get_rental_count())
+        else:
+            with self.profiler.stage('output_rental_information'):
+                self.view.output_rental_information_view(
+                    self.scraper.output_rental_information)(self.args.output,
+                                                            self.args.tabular,
+                                                            self.args.format,
+                                                            self.args.normalize)
+                if self.args.derived_metrics:
+                    self.output_derived_metrics()
+            if self.args.format == 'sqlite':
+                self.view.write_status_view(self.scraper.get_write_status())
+            elif self.args.normalize and self.args.tabular:
+                self.view.normalization_failure_view(
+                    self.scraper.get_normalization_failure())
+            
+    def output_derived_metrics(self):
+        """
+        Save the derived metrics of the rentals next to the output,
+        in the format of the output, or as csv for sqlite
+
+        Returns
+        -------
+        None.
+        """
+        self.scraper.output_derived_metrics(self.args.output, self.args.format)
+        
+    def output_metrics(self):
+        """
+        Show the time and peak memory of each stage and the slowest rentals,
+        and save the metrics and the profile statistics if required
+
+        Returns
+        -------
+        None.
+        """
+        self.view.stage_metrics_view(self.profiler.get_stage_metrics(),
+                                     self.profiler.get_slowest_listings(),
+                                     self.profiler.get_failed_listings())
+        
+        if self.args.metrics_json is not None:
+            settings = {'input': self.args.input,
+                        'format': self.args.format,
+                        'engine': self.args.engine,
+                        'parser': self.scraper.parser,
+                        'chunk_size': self.args.chunk_size,
+                        'workers': self.args.workers,
+                        'cache': self.cache_dir is not None}
+            self.profiler.output_metrics(self.args.metrics_json,
+                                         self.scraper.get_rental_scraping_status(),
+                                         settings)
+        
+        if self.args.profile is not None:
+            self.profiler.output_profile(self.args.profile)
+        
+    def output_snapshot_diff(self):
+        """
+        Output the added, changed and removed rentals
+        compared with a previous output, and the full output as csv or json
+        to diff against on the next run
+
+        Returns
+        -------
+        None.
+        """
+        from MLS_snapshot_diff import MLS_Snapshot_Diff
+        previous_path = self.args.diff_against
+        snapshot_diff = MLS_Snapshot_Diff()
+        
+        try:
+            previous_MLS_dict = snapshot_diff.load_snapshot(previous_path)
+        except FileNotFoundError:
+            self.view.error_file_not_exist(previous_path)
+            exit()
+            
+        snapshot_diff.compare(previous_MLS_dict,
+                              self.scraper.output_rental_information())
+        snapshot_diff.output_diff(self.args.output, self.args.tabular)
+        self.scraper.output_rental_information(self.args.output,
+                                               self.args.tabular)
+        
+        self.view.diff_summary_view(snapshot_diff.get_diff_summary())
+        
         
     def ending(self):
         """
@@ -130,6 +447,391 @@ class MLS_Scraper:
 
         """
         return exists(path)
+    
+    def find_html_files(self, input_path):
+        """
+        Find the MLS html files of batch mode
+
+        Parameters
+        ----------
+        input_path : Str
+            Input path, a directory or a glob pattern in batch mode.
+
+        Returns
+        -------
+        List or None
+            Sorted paths of the html files,
+            None if the input is a path of a single file.
+
+        """
+        if isdir(input_path):
+            html_paths = []
+            for pattern in HTML_FILE_PATTERNS:
+                html_paths.extend(glob(join(input_path, pattern)))
+        elif any(char in input_path for char in '*?['):
+            html_paths = glob(input_path)
+        else:
+            return None
+        
+        return sorted(set(html_paths))
+        
+"""
+Class: MLS_Watch_Scraper
+"""
+
+class MLS_Watch_Scraper:
+    
+    def __init__(self, args):
+        """
+        Initialize the watch mode, scraping the html files dropped into
+        a folder as they arrive with the same warm scraper module
+
+        Parameters
+        ----------
+        args : namespace
+            Input arguments of the watch mode
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        self.args = args
+        
+        # Initialize command line view
+        self.view = MLS_Command_Line_View()
+        self.view.initialization(self.args)
+        
+        for path in [self.args.folder, self.args.output]:
+            if not isdir(path):
+                self.view.error_file_not_exist(path)
+                exit()
+        
+        # Every file is scraped once, so there is no cache
+        self.scraper = MLS_Scraper_Module(parser=self.args.parser,
+                                          listings_only=self.args.listings_only,
+                                          cache_dir=None,
+                                          engine=self.args.engine)
+        
+        # Rentals are appended to the output as each file is scraped
+        if self.args.format == 'sqlite':
+            from MLS_sqlite_sink import MLS_SQLite_Sink, SQLITE_FILE_NAME
+            output_file = join(self.args.output, SQLITE_FILE_NAME)
+            self.rental_writer = MLS_SQLite_Sink(output_file)
+        else:
+            from MLS_jsonl_writer import MLS_JSONL_Writer, JSONL_FILE_NAME
+            output_file = join(self.args.output, JSONL_FILE_NAME)
+            self.rental_writer = MLS_JSONL_Writer(output_file, append=True)
+        self.scraper.set_rental_writer(self.rental_writer)
+        
+        # Files already scraped into the output file are kept next to it
+        from MLS_folder_watcher import MLS_Folder_Watcher, STATE_FILE_SUFFIX
+        self.watcher = MLS_Folder_Watcher(self.args.folder,
+                                          output_file + STATE_FILE_SUFFIX,
+                                          self.args.debounce,
+                                          self.args.poll_interval,
+                                          self.args.polling)
+        
+        # Number of html files scraped
+        self.file_count = 0
+        
+    def watch(self):
+        """
+        Watch the folder until interrupted, e.g. by Ctrl+C or SIGTERM
+
+        Returns
+        -------
+        None.
+
+        """
+        self.view.watch_start_view(self.args.folder,
+                                   self.watcher.get_mechanism())
+        
+        # Stop as with Ctrl+C when the service is stopped
+        signal(SIGTERM, lambda signum, frame: exit())
+        
+        try:
+            self.watcher.run(self.process_file)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.rental_writer.close()
+            self.view.watch_stop_view(self.file_count)
+        
+    def process_file(self, html_path):
+        """
+        Scrap a html file and append its rentals to the output
+
+        Parameters
+        ----------
+        html_path : Str
+            Path of the MLS html.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.scraper.reset_scraping_status()
+        self.file_count += 1
+        
+        try:
+            self.scraper.read_html(html_path)
+            self.scraper.get_all_rental()
+        except Exception:
+            # The whole file cannot be read, it is not retried until modified
+            self.view.watch_file_view(html_path, None)
+            return
+        
+        self.view.watch_file_view(html_path,
+                                  self.scraper.get_rental_scraping_status())
+        
+        
+"""
+Class: MLS_Service_Scraper
+"""
+
+class MLS_Service_Scraper:
+    
+    def __init__(self, args):
+        """
+        Initialize the HTTP service, extracting the rentals of the html
+        posted to it with warm scraper modules
+
+        Parameters
+        ----------
+        args : namespace
+            Input arguments of the HTTP service
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        self.args = args
+        
+        # Initialize command line view
+        self.view = MLS_Command_Line_View()
+        self.view.initialization(self.args)
+        
+        # asyncio is only imported by the HTTP service
+        from MLS_http_service import MLS_HTTP_Service
+        
+        self.service = MLS_HTTP_Service(self.args.host,
+                                        self.args.port,
+                                        self.args.workers,
+                                        self.args.max_concurrency,
+                                        int(self.args.max_body_size * MEGABYTE),
+                                        self.args.parser,
+                                        self.args.engine)
+        
+    def serve(self):
+        """
+        Answer requests until interrupted, e.g. by Ctrl+C or SIGTERM
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        try:
+            self.service.run(lambda: self.view.serve_start_view(
+                self.service.get_url(), self.service.workers))
+        finally:
+            self.view.serve_stop_view(self.service.get_request_count())
+        
+        
+"""
+Class: MLS_Query_Scraper
+"""
+
+class MLS_Query_Scraper:
+    
+    def __init__(self, args):
+        """
+        Initialize the queries over a scraped output, with the indexes
+        persisted in the output directory
+
+        Parameters
+        ----------
+        args : namespace
+            Input arguments of the queries
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        self.args = args
+        
+        # Initialize command line view
+        self.view = MLS_Command_Line_View()
+        self.view.initialization(self.args)
+        
+        if not isdir(self.args.output):
+            self.view.error_file_not_exist(self.args.output)
+            exit()
+        
+        from MLS_query_engine import MLS_Query_Engine, QUERY_INDEX_FILE_NAME
+        self.engine = MLS_Query_Engine()
+        self.index_path = join(self.args.output, QUERY_INDEX_FILE_NAME)
+        
+    def get_output_signature(self):
+        """
+        Return the size and modification time of the output files, the
+        index is built again whenever they change
+
+        Returns
+        -------
+        List
+            File name, size and modification time in nanoseconds of each
+            output file.
+
+        """
+        
+        from MLS_snapshot_diff import UNIT_ATTRS_FILE_NAMES, ROOM_FILE_NAMES
+        signature = []
+        for file_names in [UNIT_ATTRS_FILE_NAMES, ROOM_FILE_NAMES]:
+            for file_format, file_name in file_names.items():
+                path = join(self.args.output, f'{file_name}.{file_format}')
+                if exists(path):
+                    file_stat = stat(path)
+                    signature.append((file_name, file_format,
+                                      file_stat.st_size,
+                                      file_stat.st_mtime_ns))
+        return signature
+        
+    def load_index(self):
+        """
+        Load the persisted indexes, or build them from the output
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        start = perf_counter()
+        signature = self.get_output_signature()
+        
+        if not self.args.rebuild and self.engine.load(self.index_path,
+                                                      signature):
+            self.view.query_index_view(False, self.engine.get_rental_count(),
+                                       perf_counter() - start)
+            return
+        
+        from MLS_snapshot_diff import MLS_Snapshot_Diff
+        try:
+            MLS_dict = MLS_Snapshot_Diff().load_snapshot(self.args.output)
+        except FileNotFoundError:
+            self.view.error_file_not_exist(self.args.output)
+            exit()
+        
+        self.engine.build(MLS_dict, signature)
+        self.engine.save(self.index_path)
+        self.view.query_index_view(True, self.engine.get_rental_count(),
+                                   perf_counter() - start)
+        
+    def query(self):
+        """
+        Find and display the rentals matching the conditions
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        start = perf_counter()
+        try:
+            MLS_numbers = self.engine.query(self.args.where, self.args.room,
+                                            self.args.order_by,
+                                            self.args.descending, None)
+        except ValueError as error:
+            self.view.error_query_view(error)
+            exit()
+        query_time = perf_counter() - start
+        
+        from MLS_query_engine import parse_condition
+        
+        # Attributes shown: the queried ones, then the requested ones,
+        # e.g. Apx Sqft for a condition on Apx Sqft Low
+        fields = [parse_condition(condition)[0]
+                  for condition in self.args.where]
+        fields += [self.args.order_by] + (self.args.fields or [])
+        fields = [field if field in self.engine.columns
+                  else field.rsplit(' ', 1)[0]
+                  for field in fields if field is not None]
+        fields = [field for field in dict.fromkeys(fields)
+                  if field in self.engine.columns]
+        
+        shown = MLS_numbers[:self.args.limit]
+        self.view.query_result_view(shown,
+                                    self.engine.get_values(shown, fields),
+                                    fields, len(MLS_numbers), query_time)
+        
+        
+"""
+Class: MLS_Merge_Scraper
+"""
+
+class MLS_Merge_Scraper:
+    
+    def __init__(self, args):
+        """
+        Initialize the merge of outputs of MLS Scraper into the latest
+        rental of each MLS#
+
+        Parameters
+        ----------
+        args : namespace
+            Input arguments of the merge
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        self.args = args
+        
+        # Initialize command line view
+        self.view = MLS_Command_Line_View()
+        self.view.initialization(self.args)
+        
+        for path in [self.args.output, *self.args.snapshots]:
+            if not isdir(path):
+                self.view.error_file_not_exist(path)
+                exit()
+        
+        from MLS_snapshot_merge import MLS_Snapshot_Merge
+        self.merger = MLS_Snapshot_Merge(self.args.fan_in, self.args.run_size,
+                                         self.args.temp_dir)
+        
+    def merge(self):
+        """
+        Merge the outputs and save the merged rentals
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        try:
+            self.merger.output_rental_information(self.args.snapshots,
+                                                  self.args.output,
+                                                  self.args.format)
+        except FileNotFoundError as error:
+            self.view.error_file_not_exist(error.filename or str(error))
+            exit()
+        
+        self.view.merge_summary_view(self.merger.merge_status)
+        
         
 def arguement_parsing():
     """
@@ -138,17 +840,39 @@ def arguement_parsing():
     Returns
     -------
     args : namespace
-        input: path of MLS html file
+        input: path of MLS html file, a directory or a glob pattern
         output: path of directory to save the rental attributes
         -t: Save the files as csv (default)
         -nt: Save the files as json, mutually exclusive to -t
+        --format: Output format, csv, json, jsonl, parquet, arrow or sqlite
+        --normalize: Normalize the tabular output into numbers, dates
+            and booleans
+        --engine: Extraction engine, soup or event
+        --template: Read the rentals by a template learned from the first
+            rental of each status, soup engine only
+        --parser: Parser backend of the html
+        --listings-only: Only parse the rental sections of the html
+        --chunk-size: Read the html in chunks of the given number of bytes
+        --workers: Number of worker processes, scraping html files in batch
+            mode or rental sections of a single html otherwise
+        --cache-dir: Directory of the cache of scraped rentals
+        --no-cache: Do not use the cache of scraped rentals
+        --cache-size: Size cap of the cache in megabytes
+        --profile: Path of the cProfile statistics of the stages
+        --metrics-json: Path of the time and memory metrics in json
+        --diff-against: Directory of a previous output, the added, changed
+            and removed rentals are saved with the full output as csv or json
+        --derived-metrics: Also save the room area, price per sqft and
+            price per bedroom of each rental
 
     """
+    from MLS_arrow_writer import ARROW_FORMATS
     parser = argparse.ArgumentParser()
     
     parser.add_argument('input',
                         type=str,
-                        help='Input file path of MLS html file')
+                        help='Input file path of MLS html file, or a directory '
+                        'or a quoted glob pattern of MLS html files')
     
     parser.add_argument('output',
                         type=str,
@@ -158,13 +882,485 @@ def arguement_parsing():
     feature_parser .add_argument('-t', '--tabular', dest = 'tabular', action='store_true', help="Save as csv format")
     feature_parser .add_argument('-nt', '--non_tabular', dest='tabular', action='store_false', help="Save as json format")
     parser.set_defaults(tabular=True)
+    
+    parser.add_argument('--format',
+                        type=str,
+                        choices=(['csv', 'json', 'jsonl'] + list(ARROW_FORMATS)
+                                 + ['sqlite']),
+                        default=None,
+                        help='Output format, csv or json as -t / -nt, jsonl '
+                        'written while scraping, parquet or arrow with typed '
+                        'columns (requires pyarrow), or sqlite to update a '
+                        'database of rentals by MLS#')
+    
+    parser.add_argument('--normalize',
+                        action='store_true',
+                        help='Normalize the tabular output into numbers, dates '
+                        'and booleans, e.g. price, sqft range and Y/N flags')
+    
+    parser.add_argument('--engine',
+                        type=str,
+                        choices=ENGINES,
+                        default=DEFAULT_ENGINE,
+                        help='Extraction engine, soup builds a tree of the html '
+                        'and event reads it in a single pass without a tree')
+    
+    parser.add_argument('--template',
+                        action='store_true',
+                        help='Read the rentals by a template learned from the '
+                        'first rental of each status, rentals of another '
+                        'layout are read as usual (soup engine only)')
+    
+    parser.add_argument('--parser',
+                        type=str,
+                        choices=PARSER_BACKENDS,
+                        default=DEFAULT_PARSER,
+                        help='Parser backend of the html, '
+                        'fall back to html.parser if it is not installed')
+    
+    parser.add_argument('--listings-only',
+                        dest='listings_only',
+                        action='store_true',
+                        help='Only parse the rental sections of the html')
+    
+    parser.add_argument('--chunk-size',
+                        dest='chunk_size',
+                        type=int,
+                        default=None,
+                        help='Read the html in chunks of the given number of bytes '
+                        'and parse one rental at a time, for very large html')
+    
+    parser.add_argument('-w', '--workers',
+                        type=int,
+                        default=1,
+                        help='Number of worker processes to scrap the html files '
+                        'when input is a directory or a glob pattern, '
+                        'or the rental sections of a single html file')
+    
+    cache_parser = parser.add_mutually_exclusive_group(required=False)
+    cache_parser.add_argument('--cache-dir',
+                              dest='cache_dir',
+                              type=str,
+                              default=None,
+                              help='Directory of the cache of scraped rentals, '
+                              'rentals with unchanged html are not scraped again. '
+                              'No cache is used unless it is given')
+    cache_parser.add_argument('--no-cache',
+                              dest='no_cache',
+                              action='store_true',
+                              help='Do not use the cache of scraped rentals')
+    
+    parser.add_argument('--cache-size',
+                        dest='cache_size',
+                        type=int,
+                        default=DEFAULT_CACHE_SIZE // MEGABYTE,
+                        help='Size cap of the cache in megabytes, '
+                        'least recently used rentals are evicted beyond it')
+    
+    parser.add_argument('--profile',
+                        type=str,
+                        default=None,
+                        help='Save the cProfile statistics of the stages to '
+                        'the given path, to be read with pstats')
+    parser.add_argument('--metrics-json',
+                        dest='metrics_json',
+                        type=str,
+                        default=None,
+                        help='Save the time, memory and throughput of the '
+                        'stages to the given path as json')
+    parser.add_argument('--diff-against',
+                        dest='diff_against',
+                        type=str,
+                        default=None,
+                        help='Directory of a previous output, the added, '
+                        'changed and removed rentals are saved with the full '
+                        'output as csv or json')
+    parser.add_argument('--derived-metrics',
+                        dest='derived_metrics',
+                        action='store_true',
+                        help='Also save the total room area, largest bedroom, '
+                        'price per sqft and price per bedroom of each rental, '
+                        'not with jsonl or --diff-against')
 
     args = parser.parse_args()
     
+    # Derived metrics need all the rentals in the output format,
+    # not written by jsonl or a diff
+    if args.derived_metrics:
+        if args.format == 'jsonl':
+            parser.error('--derived-metrics is not supported with --format jsonl')
+        if args.diff_against is not None:
+            parser.error('--derived-metrics is not supported with --diff-against')
+    
     return args
     
         
+def watch_arguement_parsing(watch_argv):
+    """
+    Parse the input arguments of the watch mode
+
+    Parameters
+    ----------
+    watch_argv : List
+        Input arguments after the watch command.
+
+    Returns
+    -------
+    args : namespace
+        folder: folder where the MLS html files are dropped
+        output: path of directory the rentals are appended to
+        --format: Output format, jsonl or sqlite
+        --engine: Extraction engine, soup or event
+        --parser: Parser backend of the html
+        --listings-only: Only parse the rental sections of the html
+        --debounce: Seconds a file must stay unchanged before it is scraped
+        --poll-interval: Seconds between two scans of the folder by polling
+        --polling: Scan the folder even if inotify is available
+
+    """
+    from MLS_jsonl_writer import JSONL_FILE_NAME
+    from MLS_sqlite_sink import SQLITE_FILE_NAME
+    from MLS_folder_watcher import DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL
+    parser = argparse.ArgumentParser(prog=f'MLS_scraper {WATCH_COMMAND}')
+    parser.add_argument('folder',
+                        type=str,
+                        help='Folder where the MLS html files are dropped')
+    parser.add_argument('output',
+                        type=str,
+                        help='Output directory the rentals are appended to')
+    parser.add_argument('--format',
+                        choices=WATCH_FORMATS,
+                        default='jsonl',
+                        help='Output format, jsonl appended to '
+                        f'{JSONL_FILE_NAME} or sqlite upserted into '
+                        f'{SQLITE_FILE_NAME}')
+    parser.add_argument('--engine',
+                        choices=ENGINES,
+                        default=DEFAULT_ENGINE,
+                        help='Extraction engine, soup builds a tree of the html '
+                        'and event reads it in a single pass without a tree')
+    parser.add_argument('--parser',
+                        choices=PARSER_BACKENDS,
+                        default=DEFAULT_PARSER,
+                        help='Parser backend of the html, fall back to '
+                        'html.parser if it is not installed')
+    parser.add_argument('--listings-only',
+                        dest='listings_only',
+                        action='store_true',
+                        help='Only parse the rental sections of the html')
+    parser.add_argument('--debounce',
+                        type=float,
+                        default=DEFAULT_DEBOUNCE,
+                        help='Seconds a file must stay unchanged before it is '
+                        'scraped, so files being written are not read half way')
+    parser.add_argument('--poll-interval',
+                        dest='poll_interval',
+                        type=float,
+                        default=DEFAULT_POLL_INTERVAL,
+                        help='Seconds between two scans of the folder when '
+                        'inotify is not available')
+    parser.add_argument('--polling',
+                        action='store_true',
+                        help='Scan the folder even if inotify is available, '
+                        'e.g. for network shares')
+    
+    return parser.parse_args(watch_argv)
+    
+    
+def watch_main(watch_argv):
+    args = watch_arguement_parsing(watch_argv)
+    
+    MLS_Watch_Scraper(args).watch()
+    
+    
+def serve_arguement_parsing(serve_argv):
+    """
+    Parse the input arguments of the HTTP service
+
+    Parameters
+    ----------
+    serve_argv : List
+        Input arguments after the serve command.
+
+    Returns
+    -------
+    args : namespace
+        --host: Address the service listens on
+        --port: Port the service listens on
+        --workers: Number of worker processes running the extraction
+        --max-concurrency: Requests extracted at the same time, further
+            requests are answered 503
+        --max-body-size: Largest html accepted in MB, larger requests are
+            answered 413
+        --engine: Extraction engine, soup or event
+        --parser: Parser backend of the html
+
+    """
+    from MLS_http_service import (DEFAULT_HOST, DEFAULT_PORT, DEFAULT_WORKERS,
+                                  CONCURRENCY_PER_WORKER, DEFAULT_MAX_BODY_SIZE)
+    
+    parser = argparse.ArgumentParser(prog=f'MLS_scraper {SERVE_COMMAND}')
+    parser.add_argument('--host',
+                        type=str,
+                        default=DEFAULT_HOST,
+                        help='Address the service listens on')
+    parser.add_argument('--port',
+                        type=int,
+                        default=DEFAULT_PORT,
+                        help='Port the service listens on')
+    parser.add_argument('--workers',
+                        type=int,
+                        default=DEFAULT_WORKERS,
+                        help='Number of worker processes running the extraction')
+    parser.add_argument('--max-concurrency',
+                        dest='max_concurrency',
+                        type=int,
+                        default=None,
+                        help='Requests extracted or waiting for a worker at '
+                        'the same time, further requests are answered 503, '
+                        f'{CONCURRENCY_PER_WORKER} per worker by default')
+    parser.add_argument('--max-body-size',
+                        dest='max_body_size',
+                        type=float,
+                        default=DEFAULT_MAX_BODY_SIZE / MEGABYTE,
+                        help='Largest html accepted in MB, larger requests '
+                        'are answered 413')
+    parser.add_argument('--engine',
+                        choices=ENGINES,
+                        default=DEFAULT_ENGINE,
+                        help='Extraction engine, soup builds a tree of the html '
+                        'and event reads it in a single pass without a tree')
+    parser.add_argument('--parser',
+                        choices=PARSER_BACKENDS,
+                        default=DEFAULT_PARSER,
+                        help='Parser backend of the html, fall back to '
+                        'html.parser if it is not installed')
+    
+    return parser.parse_args(serve_argv)
+    
+    
+def serve_main(serve_argv):
+    args = serve_arguement_parsing(serve_argv)
+    
+    MLS_Service_Scraper(args).serve()
+    
+    
+def listing_arguement_parsing(listing_argv):
+    """
+    Parse the input arguments of the lookup of single rentals
+
+    Parameters
+    ----------
+    listing_argv : List
+        Input arguments after the listing command.
+
+    Returns
+    -------
+    args : namespace
+        input: Input path of the plain MLS html
+        MLS_numbers: MLS numbers of the rentals
+        --engine: Extraction engine, soup or event
+        --parser: Parser backend of the html
+
+    """
+    parser = argparse.ArgumentParser(prog=f'MLS_scraper {LISTING_COMMAND}')
+    parser.add_argument('input',
+                        type=str,
+                        help='Input path of the plain MLS html, indexed the '
+                        'first time and whenever it is modified')
+    parser.add_argument('MLS_numbers',
+                        nargs='+',
+                        help='MLS numbers of the rentals')
+    parser.add_argument('--engine',
+                        choices=ENGINES,
+                        default=DEFAULT_ENGINE,
+                        help='Extraction engine, soup builds a tree of the html '
+                        'and event reads it in a single pass without a tree')
+    parser.add_argument('--parser',
+                        choices=PARSER_BACKENDS,
+                        default=DEFAULT_PARSER,
+                        help='Parser backend of the html, fall back to '
+                        'html.parser if it is not installed')
+    
+    return parser.parse_args(listing_argv)
+    
+    
+def listing_main(listing_argv):
+    args = listing_arguement_parsing(listing_argv)
+    
+    view = MLS_Command_Line_View()
+    view.initialization(args)
+    
+    if not exists(args.input):
+        view.error_file_not_exist(args.input)
+        exit()
+    
+    scraper = MLS_Scraper_Module(parser=args.parser, engine=args.engine)
+    for MLS_num in args.MLS_numbers:
+        try:
+            rental = scraper.get_listing(args.input, MLS_num)
+        except ValueError:
+            # Compressed and archived html has no byte offsets to index
+            view.error_not_indexable(args.input)
+            exit()
+        view.listing_view(MLS_num, rental)
+    
+    
+def query_arguement_parsing(query_argv):
+    """
+    Parse the input arguments of the queries over a scraped output
+
+    Parameters
+    ----------
+    query_argv : List
+        Input arguments after the query command.
+
+    Returns
+    -------
+    args : namespace
+        output: Directory of the json or csv output of MLS Scraper
+        --where: Conditions on unit attributes, e.g. List<=2500
+        --room: Conditions of a room, e.g. Room=Den
+        --order-by: Attribute the rentals are sorted by
+        --descending: Sort in descending order
+        --limit: Number of rentals shown
+        --fields: Further attributes shown
+        --rebuild: Build the indexes again
+
+    """
+    from MLS_query_engine import QUERY_INDEX_FILE_NAME
+    parser = argparse.ArgumentParser(prog=f'MLS_scraper {QUERY_COMMAND}')
+    parser.add_argument('output',
+                        type=str,
+                        help='Directory of the json or csv output of MLS '
+                        f'Scraper, the indexes are saved to {QUERY_INDEX_FILE_NAME}')
+    parser.add_argument('--where',
+                        action='append',
+                        default=[],
+                        help='Condition on a unit attribute, e.g. City=Toronto '
+                        'or List<=2500, repeat for more conditions')
+    parser.add_argument('--room',
+                        action='append',
+                        default=[],
+                        help='Condition of a room of the rental, e.g. '
+                        'Room=Den, repeat for more conditions')
+    parser.add_argument('--order-by',
+                        dest='order_by',
+                        default=None,
+                        help='Attribute the rentals are sorted by, e.g. DOM')
+    parser.add_argument('--descending',
+                        action='store_true',
+                        help='Sort the rentals in descending order')
+    parser.add_argument('--limit',
+                        type=int,
+                        default=20,
+                        help='Number of rentals shown')
+    parser.add_argument('--fields',
+                        nargs='+',
+                        default=None,
+                        help='Further attributes shown')
+    parser.add_argument('--rebuild',
+                        action='store_true',
+                        help='Build the indexes again from the output')
+    
+    return parser.parse_args(query_argv)
+    
+    
+def query_main(query_argv):
+    args = query_arguement_parsing(query_argv)
+    
+    scraper = MLS_Query_Scraper(args)
+    scraper.load_index()
+    scraper.query()
+    
+    
+def merge_arguement_parsing(merge_argv):
+    """
+    Parse the input arguments of the merge of outputs
+
+    Parameters
+    ----------
+    merge_argv : List
+        Input arguments after the merge command.
+
+    Returns
+    -------
+    args : namespace
+        output: Directory of the merged output
+        snapshots: Directories of the outputs of MLS Scraper, oldest first
+        --format: Output format, json, csv, jsonl or sqlite
+        --fan-in: Most runs merged at the same time
+        --run-size: Rentals sorted in memory at a time
+        --temp-dir: Directory of the temporary runs
+
+    """
+    from MLS_snapshot_merge import MERGE_FORMATS, DEFAULT_FAN_IN, DEFAULT_RUN_SIZE
+    parser = argparse.ArgumentParser(prog=f'MLS_scraper {MERGE_COMMAND}')
+    parser.add_argument('output',
+                        type=str,
+                        help='Directory of the merged output')
+    parser.add_argument('snapshots',
+                        nargs='+',
+                        help='Directories of the outputs of MLS Scraper in '
+                        'json, csv or jsonl, oldest first. The rental with the '
+                        'latest Contract Date wins, then the latest snapshot')
+    parser.add_argument('--format',
+                        choices=MERGE_FORMATS,
+                        default='json',
+                        help='Output format of the merged rentals')
+    parser.add_argument('--fan-in',
+                        dest='fan_in',
+                        type=int,
+                        default=DEFAULT_FAN_IN,
+                        help='Most temporary runs merged at the same time')
+    parser.add_argument('--run-size',
+                        dest='run_size',
+                        type=int,
+                        default=DEFAULT_RUN_SIZE,
+                        help='Rentals sorted in memory before they are '
+                        'written to a temporary run')
+    parser.add_argument('--temp-dir',
+                        dest='temp_dir',
+                        type=str,
+                        default=None,
+                        help='Directory of the temporary runs, the system '
+                        'one by default')
+    
+    return parser.parse_args(merge_argv)
+    
+    
+def merge_main(merge_argv):
+    args = merge_arguement_parsing(merge_argv)
+    
+    MLS_Merge_Scraper(args).merge()
+    
+    
 def main():
+    # Long-running watch mode, e.g. MLS_scraper.exe watch folder output
+    if len(argv) > 1 and argv[1] == WATCH_COMMAND:
+        watch_main(argv[2:])
+        return
+    
+    # Local HTTP service, e.g. MLS_scraper.exe serve --port 8765
+    if len(argv) > 1 and argv[1] == SERVE_COMMAND:
+        serve_main(argv[2:])
+        return
+    
+    # Single rentals, e.g. MLS_scraper.exe listing report.html C1008101
+    if len(argv) > 1 and argv[1] == LISTING_COMMAND:
+        listing_main(argv[2:])
+        return
+    
+    # Queries over a scraped output, e.g. MLS_scraper.exe query output
+    if len(argv) > 1 and argv[1] == QUERY_COMMAND:
+        query_main(argv[2:])
+        return
+    
+    # Merge of outputs, e.g. MLS_scraper.exe merge merged 2026-09 2026-10
+    if len(argv) > 1 and argv[1] == MERGE_COMMAND:
+        merge_main(argv[2:])
+        return
+    
     args = arguement_parsing()
     
     scraper = MLS_Scraper(args)
@@ -179,8 +1375,12 @@ def main():
     # Output as desired format
     scraper.output_rental_information()
     
+    # Time of each stage
+    scraper.output_metrics()
+    
     scraper.ending()
 
 
 if __name__ == "__main__":
+    freeze_support()
     main()
\ No newline at end of file
@@ -8,11 +8,47 @@ Update Date: 15/07/2022
 @author: hinwm
 """
 
-from bs4 import BeautifulSoup
-import pandas as pd
+from MLS_listing_cache import DEFAULT_CACHE_SIZE
+from MLS_event_parser import MLS_Event_Parser
+from MLS_html_source import MLS_HTML_Source, FALLBACK_CHARSET, LISTING_START
+from MLS_column_builder import MLS_Column_Builder
+from MLS_rental_store import MLS_Rental_Store
+from MLS_csv_writer import MLS_CSV_Writer
 import re
 import os
 import json
+import time
+from io import BytesIO
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Version of the scraping logic, changing it invalidates the cache
+SCRAPER_VERSION = '1.1'
+
+"""
+Parser backends supported by read_html, fastest first
+lxml is C-accelerated, html.parser comes with Python and is always available
+"""
+PARSER_BACKENDS = ['lxml', 'html.parser', 'html5lib']
+DEFAULT_PARSER = 'lxml'
+FALLBACK_PARSER = 'html.parser'
+
+"""
+Extraction engines
+soup: build a beautiful soup tree and search it for each rental
+event: single pass over the html with MLS_Event_Parser, no tree is built
+"""
+ENGINES = ['soup', 'event']
+DEFAULT_ENGINE = 'soup'
+
+# Class of the div containing the information of a rental
+LISTING_CLASS = re.compile("^link-item status-")
+
+# Number of bytes read at a time by the chunked reader
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# Number of rental sections queued per worker process
+FRAGMENTS_PER_WORKER = 4
 
 """
 Class: MLS_Scraper_Module
@@ -21,10 +57,45 @@ Class: MLS_Scraper_Module
 
 class MLS_Scraper_Module:
 
-    def __init__(self):
+    def __init__(self, parser=DEFAULT_PARSER, listings_only=False,
+                 cache_dir=None, cache_size=DEFAULT_CACHE_SIZE,
+                 engine=DEFAULT_ENGINE, template=False):
         """
         Initialize MLS Scraper module
 
+        Parameters
+        ----------
+        parser : Str, optional
+            Parser backend of beautiful soup, one of PARSER_BACKENDS.
+            If the backend is not installed, html.parser is used instead.
+            The default is DEFAULT_PARSER.
+
+        listings_only : Bool, optional
+            Whether only the rental sections are built into the html tree.
+            Page header, scripts and map widgets are skipped while parsing,
+            which saves memory and parse time. Not supported by html5lib.
+            The default is False.
+
+        cache_dir : Str, optional
+            Directory of the cache of scraped rentals. Rentals with the same
+            html as a cached one are not scraped again.
+            If it is None, rentals are not cached. The default is None.
+
+        cache_size : Int, optional
+            Size cap of the cache in bytes, least recently used rentals are
+            evicted beyond the cap. The default is DEFAULT_CACHE_SIZE.
+
+        engine : Str, optional
+            Extraction engine, one of ENGINES. The soup engine builds a tree
+            with the parser backend, the event engine reads the html in a
+            single pass without a tree. The default is DEFAULT_ENGINE.
+
+        template : Bool, optional
+            Whether the rentals are read by a template learned from the
+            first rental of each status, instead of searching the blocks and
+            labels of each rental. Rentals of another layout are read as
+            usual. Only used by the soup engine. The default is False.
+
         Returns
         -------
         None.
@@ -33,6 +104,44 @@ class MLS_Scraper_Module:
 
         # initialize parameters
 
+        # Extraction engine
+        if engine not in ENGINES:
+            raise ValueError(f'Engine {engine} is not supported, '
+                             f'choose from {ENGINES}')
+        self.engine = engine
+
+        # Parser backend of the html
+        self.requested_parser = parser
+        self.parser = self._resolve_parser(parser)
+
+        # Only build the rental sections into the html tree
+        self.listings_only = listings_only
+
+        # Encoding of the html being read, found from its <meta> tag
+        self.html_charset = FALLBACK_CHARSET
+
+        # Cache of scraped rentals
+        if cache_dir is None:
+            self.cache = None
+        else:
+            from MLS_listing_cache import MLS_Listing_Cache
+            self.cache = MLS_Listing_Cache(cache_dir, cache_size,
+                                           self._get_cache_salt())
+
+        # Normalization of the tabular output, created once it is required
+        # as it imports pandas
+        self.normalizer = None
+
+        # Writer streaming the rentals as they are scraped, e.g. json lines
+        self.rental_writer = None
+
+        # Compact records of the scraped rentals, and their column buffers
+        self.rental_store = None
+        self.column_builder = None
+
+        # Recorder of the extraction time of each rental
+        self.profiler = None
+
         # Variable name of the address
         self.address_variable = ['Street Number',
                                  'Unit Number',
@@ -50,6 +159,14 @@ class MLS_Scraper_Module:
                                         'Description 2',
                                         'Description 3']
 
+        # Extraction templates of the rental sections of each status
+        if template and engine == 'soup':
+            from MLS_extraction_template import MLS_Template_Extractor
+            self.template_extractor = MLS_Template_Extractor(
+                self.address_variable, self.room_attribute_variable)
+        else:
+            self.template_extractor = None
+
         # Saving the succeeded and failed trail
         self.scrap_MLS_number = {'success': [],
                                  'failure': []}
@@ -57,6 +174,8 @@ class MLS_Scraper_Module:
     def read_html(self, html_path):
         """
         Read the MLS information in html format.
+        The html can be compressed by gzip (.html.gz), archived in a zip or
+        saved as a MHTML bundle, it is decompressed while it is read.
 
         Parameters
         ----------
@@ -72,49 +191,758 @@ class MLS_Scraper_Module:
         # Save the html and create a beautiful soup parser
         self.html_path = html_path
 
-        with open(self.html_path, errors="ignore") as fp:
-            soup = BeautifulSoup(fp, 'html.parser')
+        # The event engine looks up cached rentals by the raw bytes of their
+        # section, so the html is cut into sections when they are scraped
+        # and only the sections missing from the cache are parsed
+        if self.engine == 'event' and self.cache is not None:
+            self.MLS_info = None
+            self.MLS_fragments = None
+            return
+
+        # Bytes decoded once, in the charset of the <meta> tag
+        source = MLS_HTML_Source(self.html_path)
+        with source.open() as fp:
+            self.parse_html(fp)
+        self.html_charset = source.charset
+
+    def parse_html(self, html):
+        """
+        Read the MLS information from html text or an opened html file,
+        e.g. a html received without being saved as a file.
+
+        Parameters
+        ----------
+        html : Str or file object
+            MLS html.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        # read the rental sections in a single pass without a tree
+        if self.engine == 'event':
+            if isinstance(html, str):
+                html_chunks = [html]
+            else:
+                html_chunks = iter(lambda: html.read(DEFAULT_CHUNK_SIZE), '')
+
+            # Sections cut from the raw bytes, parsed if they are not cached
+            if self.cache is not None:
+                self.html_charset = 'utf-8'
+                self.MLS_info = None
+                self.MLS_fragments = list(self._iter_listing_fragments(
+                    BytesIO(''.join(html_chunks).encode(self.html_charset)),
+                    DEFAULT_CHUNK_SIZE))
+                return
+
+            self.MLS_info = list(MLS_Event_Parser().parse(html_chunks))
+            return
+
+        # bs4 is only imported by the soup engine
+        from bs4 import BeautifulSoup, SoupStrainer
+
+        # skip everything other than the rental sections if required
+        if self.listings_only:
+            parse_only = SoupStrainer("div", {"class": LISTING_CLASS})
+        else:
+            parse_only = None
+
+        soup = BeautifulSoup(html, self.parser, parse_only=parse_only)
 
         # pick up information that is related to the rentals
-        self.MLS_info = soup.find_all("div",
-                                      {"class": re.compile("^link-item status-")})
+        self.MLS_info = soup.find_all("div", {"class": LISTING_CLASS})
+
+    def _resolve_parser(self, parser):
+        """
+        Find the parser backend to be used by beautiful soup
+
+        Parameters
+        ----------
+        parser : Str
+            Requested parser backend.
+
+        Raises
+        ------
+        ValueError
+            If the parser backend is not supported.
+
+        Returns
+        -------
+        Str
+            Requested parser backend if it is installed, otherwise html.parser.
+            The event engine does not use the parser backend, it is kept
+            as requested.
 
-    def get_all_rental(self):
+        """
+
+        if parser not in PARSER_BACKENDS:
+            raise ValueError(f'Parser backend {parser} is not supported, '
+                             f'choose from {PARSER_BACKENDS}')
+
+        # bs4 is not imported by the event engine
+        if self.engine == 'event':
+            return parser
+
+        from bs4.builder import builder_registry
+
+        # Fall back to the built-in parser if the backend is not installed
+        if builder_registry.lookup(parser) is None:
+            return FALLBACK_PARSER
+
+        return parser
+
+    def get_all_rental(self, rentals=None):
         """
         Scrap and tidy information of all the rental
 
+        Parameters
+        ----------
+        rentals : Iterable, optional
+            Tuples of MLS number, unit attributes and room attributes,
+            e.g. from iter_rentals().
+            If it is None, rentals are scraped from the html read by read_html().
+            The default is None.
+
         Returns
         -------
         None.
 
         """
 
-        # Dictionary to store unit attributes and room attributes
-        MLS_unit_attrs_dict = {}
-        MLS_room_dict = {}
+        if rentals is None:
+            if self.MLS_info is not None:
+                rentals = self._scrape_sections(self.MLS_info)
+            elif self.MLS_fragments is not None:
+                rentals = self._scrape_fragments(self.MLS_fragments)
+            else:
+                rentals = self.iter_rentals(self.html_path)
 
-        for MLS_info_section in self.MLS_info:
+        # Rentals are kept as compact records, the column buffers of the
+        # tabular output are filled with their values while scraping
+        self.rental_store = MLS_Rental_Store()
+        self.column_builder = MLS_Column_Builder(self.rental_store)
 
-            # Get the MLS number
-            MLS_num = self.get_MLS_number(MLS_info_section)
+        # Rentals are handed to the writer instead of kept in memory
+        if self.rental_writer is not None:
+            rentals = self._write_rentals(rentals)
+
+        for MLS_num, attribute_dict, room_table in rentals:
+            self.column_builder.add_rental(MLS_num, attribute_dict, room_table)
+
+        if self.cache is not None:
+            self.cache.flush()
+
+    @property
+    def MLS_dict(self):
+        """
+        Read-only views of the scraped rentals, looked up in the compact
+        records without copying them.
+        Since the rentals are kept as records, the views and the rentals
+        they return cannot be modified, use merge_rental_information() to
+        add or replace rentals, or get_MLS_dict() for a copy as dictionaries.
+
+        Raises
+        ------
+        AttributeError
+            If no rental has been scraped.
+
+        Returns
+        -------
+        MLS_dict : Mapping
+            MLS_unit_attrs_dict: View of unit attributes
+            MLS_room_dict: View of room attributes
+
+        """
+        if self.rental_store is None:
+            raise AttributeError('No rental has been scraped')
+        return self.rental_store.get_MLS_view()
+
+    def get_MLS_dict(self):
+        """
+        Build the dictionaries of the scraped rentals, a copy which can be
+        modified or saved as json
+
+        Returns
+        -------
+        MLS_dict : Dict
+            MLS_unit_attrs_dict: Dictionary of unit attributes
+            MLS_room_dict: Dictionary of room attributes
+
+        """
+        if self.rental_store is None:
+            return {'MLS_unit_attrs_dict': {}, 'MLS_room_dict': {}}
+        return self.rental_store.get_MLS_dict()
+
+    def set_rental_writer(self, rental_writer):
+        """
+        Stream the rentals to a writer as they are scraped instead of keeping
+        them in memory. The writer is not closed by the scraper module.
+
+        Parameters
+        ----------
+        rental_writer : MLS_JSONL_Writer or None
+            Writer with write_rental() and flush(), None to keep the rentals
+            in memory.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.rental_writer = rental_writer
+
+    def set_profiler(self, profiler):
+        """
+        Record the extraction time of each rental scraped in this process
+
+        Parameters
+        ----------
+        profiler : MLS_Stage_Profiler or None
+            Profiler with record_listing(), None to stop recording.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.profiler = profiler
+
+    def _write_rentals(self, rentals):
+        """
+        Hand the rentals to the writer
+
+        Parameters
+        ----------
+        rentals : Iterable
+            Tuples of MLS number, unit attributes and room attributes.
+
+        Returns
+        -------
+        List
+            No rental is kept in memory.
+
+        """
+
+        for rental in rentals:
+            self.rental_writer.write_rental(*rental)
+        self.rental_writer.flush()
+
+        return []
+
+    def _get_cache_salt(self):
+        """
+        Return the salt of the cache hash
+        Rentals scraped by another version of the scraper or another parser
+        backend are not reused
+
+        Returns
+        -------
+        Str
+            Salt of the cache hash.
+
+        """
+        return (f'{SCRAPER_VERSION}:{self.engine}:{self.parser}:'
+                f'{self.listings_only}')
+
+    def iter_rentals(self, html_path, chunk_size=DEFAULT_CHUNK_SIZE, workers=1):
+        """
+        Scrap the rentals of a MLS html one at a time.
+        The html is read in chunks and each rental section is parsed on its own,
+        so memory use does not grow with the size of the html.
+
+        Parameters
+        ----------
+        html_path : String
+            Path of the MLS html.
+        chunk_size : Int, optional
+            Number of bytes read from the html at a time.
+            The default is DEFAULT_CHUNK_SIZE.
+        workers : Int, optional
+            Number of worker processes scraping the rental sections.
+            Only the raw html of the sections is sent to the workers,
+            and rentals are yielded in the order of the html.
+            The default is 1.
+
+        Yields
+        ------
+        MLS_num : Str
+            MLS number of the rental.
+        attribute_dict : Dict
+            Unit attributes of rental.
+        room_table : Dict
+            Room attributes of rental.
+
+        """
+
+        self.html_path = html_path
+
+        # Rental sections are cut from the bytes, each decoded on its own
+        source = MLS_HTML_Source(html_path)
+        with source.open_binary() as fp:
+            self.html_charset = source.get_charset(fp)
+            fragments = self._iter_listing_fragments(fp, chunk_size)
+
+            if workers > 1:
+                yield from self._scrape_fragments_in_pool(fragments, workers)
+            else:
+                yield from self._scrape_fragments(fragments)
+
+    def _scrape_fragments_in_pool(self, fragments, workers):
+        """
+        Scrap the raw html of rental sections in a pool of worker processes
+        Cached rentals are not sent to the workers
+
+        Parameters
+        ----------
+        fragments : Iterable
+            Raw html of rental sections.
+        workers : Int
+            Number of worker processes.
+
+        Yields
+        ------
+        MLS_num : Str
+            MLS number of the rental.
+        attribute_dict : Dict
+            Unit attributes of rental.
+        room_table : Dict
+            Room attributes of rental.
+
+        """
+
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_fragment_worker,
+                                 initargs=(self.parser, self.listings_only,
+                                           self.engine,
+                                           self.html_charset,
+                                           self.template_extractor is not None)
+                                 ) as executor:
+
+            # Keep a bounded number of fragments in flight, in html order
+            pending = deque()
+            for fragment in fragments:
+                cache_key, rental = self._get_cached_rental(fragment)
+                if rental is None:
+                    pending.append(
+                        (cache_key, executor.submit(_scrape_fragment, fragment)))
+                else:
+                    pending.append((cache_key, rental))
+                if len(pending) >= workers * FRAGMENTS_PER_WORKER:
+                    yield from self._collect_fragment_result(*pending.popleft())
+
+            while pending:
+                yield from self._collect_fragment_result(*pending.popleft())
+
+    def _collect_fragment_result(self, cache_key, result):
+        """
+        Record the scraping status of a rental section scraped by a worker
+
+        Parameters
+        ----------
+        cache_key : Str
+            Key of the rental section in the cache, None if there is no cache.
+        result : concurrent.futures.Future or Tuple
+            Future of _scrape_fragment(), or the cached rental.
+
+        Returns
+        -------
+        rentals : List
+            Tuples of MLS number, unit attributes and room attributes.
+
+        """
+
+        # Cached rental
+        if isinstance(result, tuple):
+            return [result]
+
+        rentals, scraping_status, template_status = result.result()
+
+        for status, MLS_nums in scraping_status.items():
+            self.scrap_MLS_number[status].extend(MLS_nums)
+
+        if template_status is not None:
+            self.template_extractor.add_template_status(template_status)
+
+        if cache_key is not None:
+            for rental in rentals:
+                self.cache.put(cache_key, rental)
+
+        return rentals
+
+    def _scrape_fragments(self, fragments):
+        """
+        Scrap the raw html of rental sections one at a time
+
+        Parameters
+        ----------
+        fragments : Iterable
+            Raw html of rental sections.
+
+        Yields
+        ------
+        MLS_num : Str
+            MLS number of the rental.
+        attribute_dict : Dict
+            Unit attributes of rental.
+        room_table : Dict
+            Room attributes of rental.
+
+        """
+
+        for fragment in fragments:
+
+            # Cached rentals are not parsed at all
+            cache_key, rental = self._get_cached_rental(fragment)
+
+            if rental is None:
+                MLS_info_section = self._parse_listing_fragment(fragment)
+                if MLS_info_section is None:
+                    continue
+                rental = self._scrape_section(MLS_info_section, cache_key)
+
+            if rental is not None:
+                yield rental
+
+    def _scrape_sections(self, MLS_info_sections):
+        """
+        Scrap the rental information of MLS information sections
+        and record the succeeded and failed MLS number
+
+        Parameters
+        ----------
+        MLS_info_sections : Iterable
+            bs4.element.Tag of MLS information sections.
+
+        Yields
+        ------
+        MLS_num : Str
+            MLS number of the rental.
+        attribute_dict : Dict
+            Unit attributes of rental.
+        room_table : Dict
+            Room attributes of rental.
+
+        """
+
+        for MLS_info_section in MLS_info_sections:
+
+            if self.cache is None:
+                cache_key, rental = None, None
+            else:
+                cache_key, rental = self._get_cached_rental(str(MLS_info_section))
+
+            if rental is None:
+                rental = self._scrape_section(MLS_info_section, cache_key)
+
+            if rental is not None:
+                yield rental
+
+    def _scrape_section(self, MLS_info_section, cache_key=None):
+        """
+        Scrap the rental information of a MLS information section
+        and record whether it succeeded or failed
+
+        Parameters
+        ----------
+        MLS_info_section : bs4.element.Tag
+            Html text of a particular MLS information section.
+        cache_key : Str, optional
+            Key of the section in the cache, the rental is cached if given.
+            The default is None.
+
+        Returns
+        -------
+        Tuple or None
+            MLS number, unit attributes and room attributes of the rental,
+            None if the rental information cannot be found.
+
+        """
+
+        # Get the MLS number
+        MLS_num = self.get_MLS_number(MLS_info_section)
+        start = time.perf_counter()
+        succeeded = False
+
+        try:
+            # Read the unit and room attributes from the section
+            attribute_dict, room_table = self.get_rental_information(
+                MLS_info_section)
+            succeeded = True
+        except:
+            # If there is issue, prompt the user and record the failed MLS
+            #print(
+            #    f'Warning: information of MLS#:{MLS_num} cannot be found')
+            self.scrap_MLS_number['failure'].append(MLS_num)
+            return None
+        finally:
+            if self.profiler is not None:
+                self.profiler.record_listing(MLS_num,
+                                             time.perf_counter() - start,
+                                             succeeded)
+
+        self.scrap_MLS_number['success'].append(MLS_num)
+        rental = (MLS_num, attribute_dict, room_table)
+
+        if cache_key is not None:
+            self.cache.put(cache_key, rental)
+
+        return rental
+
+    def _get_cached_rental(self, raw_html):
+        """
+        Look up the rental of a rental section in the cache
+        A cached rental is recorded as succeeded
+
+        Parameters
+        ----------
+        raw_html : Str or Bytes
+            Raw html of the rental section.
+
+        Returns
+        -------
+        cache_key : Str
+            Key of the section in the cache, None if there is no cache.
+        rental : Tuple or None
+            MLS number, unit attributes and room attributes of the rental,
+            None if the rental is not cached.
+
+        """
+
+        if self.cache is None:
+            return None, None
+
+        cache_key = self.cache.make_key(raw_html)
+        rental = self.cache.get(cache_key)
+
+        if rental is not None:
+            self.scrap_MLS_number['success'].append(rental[0])
+
+        return cache_key, rental
+
+    def _parse_listing_fragment(self, fragment):
+        """
+        Parse the raw html of a rental section
+
+        Parameters
+        ----------
+        fragment : Bytes
+            Raw html of a rental section.
+
+        Returns
+        -------
+        MLS_info_section : bs4.element.Tag or MLS_Listing_Record
+            Html text of a particular MLS information section,
+            None if the fragment does not contain a rental section.
+
+        """
+
+        html = fragment.decode(self.html_charset, errors="replace")
+
+        if self.engine == 'event':
+            return next(iter(MLS_Event_Parser().parse([html])), None)
+
+        from bs4 import BeautifulSoup, SoupStrainer
+
+        if self.listings_only:
+            parse_only = SoupStrainer("div", {"class": LISTING_CLASS})
+        else:
+            parse_only = None
+
+        soup = BeautifulSoup(html, self.parser, parse_only=parse_only)
+
+        return soup.find("div", {"class": LISTING_CLASS})
+
+    def _iter_listing_fragments(self, fp, chunk_size):
+        """
+        Cut the raw MLS html into fragments at the start of each rental section
+
+        Each fragment runs from the start of a rental section to the start of
+        the next one (or the end of the file). Content before the first
+        rental section is discarded.
+
+        Parameters
+        ----------
+        fp : File object
+            Bytes of the MLS html.
+        chunk_size : Int
+            Number of bytes read from the html at a time.
+
+        Yields
+        ------
+        fragment : Bytes
+            Raw html of a rental section.
+
+        """
+
+        buffer = b''
+        listing_started = False
+
+        for chunk in iter(lambda: fp.read(chunk_size), b''):
+
+            # Resume the search from the last tag that may be incomplete
+            search_from = max(buffer.rfind(b'<'), int(listing_started))
+            buffer += chunk
+
+            # Cut every rental section started in this chunk
+            match = LISTING_START.search(buffer, search_from)
+            while match is not None:
+                if listing_started:
+                    yield buffer[:match.start()]
+                listing_started = True
+                buffer = buffer[match.start():]
+                match = LISTING_START.search(buffer, 1)
+
+            # Only keep the possibly incomplete tag before any rental
+            if not listing_started:
+                last_tag = buffer.rfind(b'<')
+                buffer = buffer[last_tag:] if last_tag >= 0 else b''
+
+        if listing_started:
+            yield buffer
+
+    def get_listing(self, html_path, MLS_num):
+        """
+        Scrap a single rental of a MLS html.
+        The byte offsets of the rental sections are kept in a sidecar index
+        next to the html, built by scanning the raw bytes the first time and
+        whenever the html is modified. Only the section of the rental is read
+        and parsed, so the lookup does not depend on the size of the html.
+
+        Parameters
+        ----------
+        html_path : String
+            Path of the MLS html, plain html only.
+        MLS_num : Str
+            MLS number of the rental.
+
+        Returns
+        -------
+        Tuple or None
+            Unit attributes and room attributes of the rental, None if the
+            MLS number is not in the html or its information cannot be found.
+
+        """
+
+        # The index is only imported by the lookup of single rentals
+        from MLS_listing_index import MLS_Listing_Index
+
+        index = MLS_Listing_Index(html_path)
+        try:
+            fragment = index.read_listing(MLS_num)
+            self.html_charset = index.charset or FALLBACK_CHARSET
+        finally:
+            index.close()
+
+        if fragment is None:
+            return None
+
+        self.html_path = html_path
+        section = self._parse_listing_fragment(fragment)
+        if section is None:
+            return None
+
+        rental = self._scrape_section(section)
+        if rental is None:
+            return None
+
+        return rental[1], rental[2]
+
+    def merge_rental_information(self, MLS_dict, scraping_status):
+        """
+        Merge rental information scraped by another MLS Scraper module,
+        e.g. from another html file.
+        Rentals of the same MLS number are replaced by the merged ones.
+
+        Parameters
+        ----------
+        MLS_dict : Dict
+            MLS_unit_attrs_dict: Dictionary of unit attributes
+            MLS_room_dict: Dictionary of room attributes
+        scraping_status : Dict
+            Dictionary of MLS number of succeeded and failed records.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if self.rental_store is None:
+            self.rental_store = MLS_Rental_Store()
+            self.column_builder = MLS_Column_Builder(self.rental_store)
+
+        room_dict = MLS_dict['MLS_room_dict']
+        rentals = [(MLS_num, attribute_dict, room_dict[MLS_num])
+                   for MLS_num, attribute_dict
+                   in MLS_dict['MLS_unit_attrs_dict'].items()]
+
+        # Rentals are handed to the writer instead of kept in memory
+        if self.rental_writer is not None:
+            rentals = self._write_rentals(rentals)
+
+        for MLS_num, attribute_dict, room_table in rentals:
+            self.column_builder.add_rental(MLS_num, attribute_dict, room_table)
+
+        for status, MLS_nums in scraping_status.items():
+            self.scrap_MLS_number[status].extend(MLS_nums)
+
+    def get_cache_status(self):
+        """
+        Return the number of cache hit and miss
+
+        Returns
+        -------
+        Dict or None
+            Number of cache hit and miss, None if there is no cache.
+
+        """
+        if self.cache is None:
+            return None
+        return self.cache.get_cache_status()
+
+    def get_template_status(self):
+        """
+        Return the number of rentals read by an extraction template (hit)
+        or by searching the section (miss)
+
+        Returns
+        -------
+        Dict or None
+            Number of template hit and miss, None if templates are not used.
+
+        """
+        if self.template_extractor is None:
+            return None
+        return self.template_extractor.get_template_status()
+
+    def close_cache(self):
+        """
+        Save the cache of scraped rentals and evict the least recently used
+        rentals beyond the size cap
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.cache is not None:
+            self.cache.close()
+
+    def reset_scraping_status(self):
+        """
+        Forget the succeeded and failed MLS numbers, e.g. before scraping
+        the next html with the same scraper module
+
+        Returns
+        -------
+        None.
+
+        """
+        self.scrap_MLS_number = {'success': [],
+                                 'failure': []}
 
-            try:
-                # Read the unit and room attributes from the section
-                attribute_dict, room_table = self.get_rental_information(
-                    MLS_info_section)
-                MLS_unit_attrs_dict[MLS_num] = attribute_dict
-                MLS_room_dict[MLS_num] = room_table
-                self.scrap_MLS_number['success'].append(MLS_num)
-            except:
-                # If there is issue, prompt the user and record the failed MLS
-                #print(
-                #    f'Warning: information of MLS#:{MLS_num} cannot be found')
-                self.scrap_MLS_number['failure'].append(MLS_num)
-
-        self.MLS_dict = {
-            'MLS_unit_attrs_dict': MLS_unit_attrs_dict,
-            'MLS_room_dict': MLS_room_dict}
-        
     def get_rental_scraping_status(self):
         """
         Return the MLS number of record that is success or failure
@@ -129,7 +957,8 @@ class MLS_Scraper_Module:
         
         
 
-    def output_rental_information(self, directory=None, as_df=False):
+    def output_rental_information(self, directory=None, as_df=False,
+                                  file_format=None, normalize=False):
         """
         Return or save all the rental information
 
@@ -147,6 +976,18 @@ class MLS_Scraper_Module:
             if as_df is False, return dictionary or save as json
             The default is False.
 
+        file_format : Str, optional
+            File format to be saved instead, one of ARROW_FORMATS
+            (pyarrow is required) or sqlite to upsert the rentals into
+            the database SQLITE_FILE_NAME of the directory.
+            Only used if directory is given.
+            The default is None.
+
+        normalize : Bool, optional
+            Whether the tabular output is normalized into numbers, dates and
+            booleans by MLS_Normalizer. Not used by the json output.
+            The default is False.
+
         Returns
         -------
         MLS_output : Dict
@@ -156,13 +997,39 @@ class MLS_Scraper_Module:
 
         """
 
-        if as_df:
+        # Csv written from the column buffers, without building dataframes
+        if (as_df and not normalize and file_format in [None, 'csv']
+                and directory is not None):
+            MLS_CSV_Writer().output_rental_information(self.column_builder,
+                                                       directory)
+            return
+
+        # Sqlite rows are written record by record from the store
+        if file_format == 'sqlite' and directory is not None:
+            from MLS_sqlite_sink import MLS_SQLite_Sink, SQLITE_FILE_NAME
+            sink = MLS_SQLite_Sink(os.path.join(directory, SQLITE_FILE_NAME))
+            try:
+                sink.write_rentals(self.rental_store.iter_rentals())
+            finally:
+                sink.close()
+            self.write_status = sink.get_write_status()
+            return
+
+        # pyarrow is only imported by the typed outputs
+        from MLS_arrow_writer import MLS_Arrow_Writer, ARROW_FORMATS
+
+        if as_df or file_format in ARROW_FORMATS:
             MLS_output = self._convert_output_to_dataframe()
+            if normalize:
+                MLS_output = self._get_normalizer().normalize_output(MLS_output)
         else:
-            MLS_output = self.MLS_dict
+            MLS_output = self.get_MLS_dict()
 
         if directory is None:
             return MLS_output
+        elif file_format in ARROW_FORMATS:
+            MLS_Arrow_Writer().output_rental_information(MLS_output, directory,
+                                                         file_format)
         else:
             for file_name, file in MLS_output.items():
                 if as_df:
@@ -173,9 +1040,55 @@ class MLS_Scraper_Module:
                     with open(file_path, 'w') as fp:
                         json.dump(file, fp)
 
+    def get_write_status(self):
+        """
+        Return the number of rentals and rooms written to the database,
+        and the number of unchanged rentals skipped
+
+        Returns
+        -------
+        Dict or None
+            Number of rentals, rooms and unchanged rentals,
+            None if the rentals are not saved to a database.
+
+        """
+        return getattr(self, 'write_status', None)
+
+    def get_normalization_failure(self):
+        """
+        Return the number of values that failed to be normalized in each column
+
+        Returns
+        -------
+        Dict
+            Number of values that failed to be normalized in each column.
+
+        """
+        if self.normalizer is None:
+            return {}
+        return self.normalizer.get_failure_count()
+
+    def _get_normalizer(self):
+        """
+        Return the normalization of the tabular output, created the first time
+
+        Returns
+        -------
+        MLS_Normalizer
+            Normalization of the tabular output.
+
+        """
+
+        if self.normalizer is None:
+            # pandas is only imported once the output is normalized
+            from MLS_normalizer import MLS_Normalizer
+            self.normalizer = MLS_Normalizer()
+        return self.normalizer
+
     def _convert_output_to_dataframe(self):
         """
-        Convert all internal output from dictionary to pandas dataframe
+        Build the pandas dataframes from the column buffers filled while
+        scraping, each table is constructed once
         
         Returns
         -------
@@ -184,64 +1097,91 @@ class MLS_Scraper_Module:
             MLS_room_df: Dataframe of room attributes
         """
 
-        # Convert unit attribute dictionary into dataframe
-        unit_attrs_df = self._convert_unit_attrs_to_dataframe(
-            self.MLS_dict['MLS_unit_attrs_dict'])
+        # Convert unit attribute columns into dataframe
+        unit_attrs_df = self.column_builder.get_unit_attrs_df()
 
-        # Convert room attribute dictionary into dataframe
-        room_df = self._convert_room_attrs_to_dataframe(
-            self.MLS_dict['MLS_room_dict'])
+        # Convert room attribute columns into dataframe
+        room_df = self.column_builder.get_room_df()
 
         return {'MLS_unit_attrs_df': unit_attrs_df, 'MLS_room_df': room_df}
 
-    def _convert_unit_attrs_to_dataframe(self, unit_attrs_dict):
+    def get_derived_metrics(self):
         """
-        Convert unit attributes from dictionary to pandas dataframe
-        
+        Compute the derived metrics of the rentals from the dataframes:
+        total room area, number of measured rooms, largest bedroom area,
+        area per room, price per sqft and price per bedroom
+
+        Returns
+        -------
+        pandas dataframe
+            Derived metrics of each rental, indexed by MLS number.
+
+        """
+
+        # pandas and numpy are only imported by the derived metrics
+        from MLS_derived_metrics import MLS_Derived_Metrics
+
+        MLS_output = self._convert_output_to_dataframe()
+        return MLS_Derived_Metrics().compute(MLS_output['MLS_unit_attrs_df'],
+                                             MLS_output['MLS_room_df'])
+
+    def output_derived_metrics(self, directory, file_format=None):
+        """
+        Save the derived metrics of the rentals, as MLS_derived_metrics_df.csv
+        or in the given format
+
         Parameters
         ----------
-        unit_attrs_dict : Dict
-            Dictionary of unit attributes.
-        
+        directory : Str
+            Directory of the output to be saved.
+        file_format : Str, optional
+            json, parquet or arrow (pyarrow is required), otherwise csv.
+            The default is None.
+
         Returns
         -------
-        unit_attrs_df : pandas dataframe
-            Dataframe of unit attributes
+        None.
+
         """
 
-        unit_attrs_df = pd.DataFrame.from_dict(unit_attrs_dict, orient='index')
+        from MLS_derived_metrics import MLS_Derived_Metrics
 
-        return unit_attrs_df
+        MLS_Derived_Metrics().output_derived_metrics(self.get_derived_metrics(),
+                                                     directory, file_format)
 
-    def _convert_room_attrs_to_dataframe(self, room_dict):
+    def get_rental_information(self, MLS_info_section):
         """
-        Convert room attributes from dictionary to pandas dataframe
-        
+        Get rental information from a specific MLS information section
+
         Parameters
         ----------
-        room_dict : Dict
-            Dictionary of room attributes.
-        
+        MLS_info_section : bs4.element.Tag or MLS_Listing_Record
+            Html text of a particular MLS information section,
+            or the record of it read by the event engine.
+
         Returns
         -------
-        room_df : pandas dataframe
-            Dataframe of room attributes
+        attribute_dict : Dict
+            Unit attributes of rental.
+        room_table : Dict
+            Room attributes of rental.
+
         """
 
-        room_df_dict = {}
+        if self.engine == 'event':
+            return MLS_info_section.get_rental_information(
+                self.address_variable, self.room_attribute_variable)
 
-        for MLS_num, table_dict in room_dict.items():
-            room_df_dict[MLS_num] = pd.DataFrame.from_dict(
-                table_dict, orient='index')
-            room_df_dict[MLS_num] = room_df_dict[MLS_num].reset_index().rename(columns={
-                'index': 'Room Index'})
-        room_df = pd.concat(room_df_dict).droplevel(1)
+        if self.template_extractor is not None:
+            return self.template_extractor.extract(
+                MLS_info_section, self._get_rental_information)
 
-        return room_df
+        return self._get_rental_information(MLS_info_section)
 
-    def get_rental_information(self, MLS_info_section):
+    def _get_rental_information(self, MLS_info_section):
         """
-        Get rental information from a specific MLS information section
+        Get rental information by searching the blocks and labels of
+        a specific MLS information section
 
         Parameters
         ----------
@@ -432,4 +1372,129 @@ class MLS_Scraper_Module:
         return int(last_room_index)
 
 
-
+def scrape_html_file(html_path, parser=DEFAULT_PARSER, listings_only=False,
+                     chunk_size=None, cache_dir=None, cache_size=DEFAULT_CACHE_SIZE,
+                     engine=DEFAULT_ENGINE, template=False):
+    """
+    Scrap all the rentals of a MLS html with a new MLS Scraper module.
+    It is a module level function so that it can be run in worker processes.
+
+    Parameters
+    ----------
+    html_path : String
+        Path of the MLS html.
+    parser : Str, optional
+        Parser backend of beautiful soup. The default is DEFAULT_PARSER.
+    listings_only : Bool, optional
+        Whether only the rental sections are built into the html tree.
+        The default is False.
+    chunk_size : Int, optional
+        If given, the html is read in chunks of chunk_size bytes
+        by iter_rentals(). The default is None.
+    cache_dir : Str, optional
+        Directory of the cache of scraped rentals, None if there is no cache.
+        The default is None.
+    cache_size : Int, optional
+        Size cap of the cache in bytes. The default is DEFAULT_CACHE_SIZE.
+    engine : Str, optional
+        Extraction engine. The default is DEFAULT_ENGINE.
+    template : Bool, optional
+        Whether the rentals are read by extraction templates.
+        The default is False.
+
+    Returns
+    -------
+    MLS_dict : Dict
+        MLS_unit_attrs_dict: Dictionary of unit attributes
+        MLS_room_dict: Dictionary of room attributes
+    scraping_status : Dict
+        Dictionary of MLS number of succeeded and failed records.
+    cache_status : Dict or None
+        Number of cache hit and miss, None if there is no cache.
+    template_status : Dict or None
+        Number of template hit and miss, None if templates are not used.
+
+    """
+
+    scraper = MLS_Scraper_Module(parser=parser, listings_only=listings_only,
+                                 cache_dir=cache_dir, cache_size=cache_size,
+                                 engine=engine, template=template)
+
+    try:
+        if chunk_size is None:
+            scraper.read_html(html_path)
+            scraper.get_all_rental()
+        else:
+            scraper.get_all_rental(scraper.iter_rentals(html_path, chunk_size))
+    finally:
+        scraper.close_cache()
+
+    return (scraper.get_MLS_dict(), scraper.get_rental_scraping_status(),
+            scraper.get_cache_status(), scraper.get_template_status())
+
+
+# MLS Scraper module of a worker process scraping rental sections
+_fragment_scraper = None
+
+
+def _init_fragment_worker(parser, listings_only, engine,
+                          html_charset=FALLBACK_CHARSET, template=False):
+    """
+    Initialize the MLS Scraper module of a worker process
+
+    Parameters
+    ----------
+    parser : Str
+        Parser backend of beautiful soup.
+    listings_only : Bool
+        Whether only the rental sections are built into the html tree.
+    engine : Str
+        Extraction engine.
+    html_charset : Str, optional
+        Encoding of the raw html of the rental sections.
+        The default is FALLBACK_CHARSET.
+    template : Bool, optional
+        Whether the rentals are read by extraction templates, learned by
+        each worker process. The default is False.
+
+    Returns
+    -------
+    None.
+
+    """
+    global _fragment_scraper
+    _fragment_scraper = MLS_Scraper_Module(parser=parser,
+                                           listings_only=listings_only,
+                                           engine=engine, template=template)
+    _fragment_scraper.html_charset = html_charset
+
+
+def _scrape_fragment(fragment):
+    """
+    Scrap the raw html of a rental section in a worker process
+
+    Parameters
+    ----------
+    fragment : Bytes
+        Raw html of a rental section.
+
+    Returns
+    -------
+    rentals : List
+        Tuples of MLS number, unit attributes and room attributes.
+    scraping_status : Dict
+        Dictionary of MLS number of succeeded and failed records.
+    template_status : Dict or None
+        Number of template hit and miss, None if templates are not used.
+
+    """
+    scraper = _fragment_scraper
+    scraper.scrap_MLS_number = {'success': [], 'failure': []}
+    if scraper.template_extractor is not None:
+        scraper.template_extractor.reset_template_status()
+
+    section = scraper._parse_listing_fragment(fragment)
+    sections = [] if section is None else [section]
+    rentals = list(scraper._scrape_sections(sections))
+
+    return rentals, scraper.scrap_MLS_number, scraper.get_template_status()
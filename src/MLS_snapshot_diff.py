@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_Snapshot_Diff
+Description: Compare scraped rentals with a previous output of MLS Scraper
+"""
+
+import csv
+import json
+import os
+
+# File names of the outputs of MLS Scraper, without extension
+UNIT_ATTRS_FILE_NAMES = {'json': 'MLS_unit_attrs_dict',
+                         'csv': 'MLS_unit_attrs_df'}
+ROOM_FILE_NAMES = {'json': 'MLS_room_dict',
+                   'csv': 'MLS_room_df'}
+
+# Header of the field-level changes in csv format
+CHANGE_HEADER = ['MLS#', 'Table', 'Room Index', 'Field', 'Previous', 'Current']
+
+"""
+Class: MLS_Snapshot_Diff
+"""
+
+
+class MLS_Snapshot_Diff:
+
+    def __init__(self):
+        """
+        Initialize the comparison of MLS Scraper outputs
+
+        Returns
+        -------
+        None.
+
+        """
+
+        # Added, changed and removed rentals
+        self.diff = {'added': {},
+                     'changed': {},
+                     'removed': []}
+
+        # Whether empty attributes are ignored in the comparison,
+        # as csv output has empty cells for attributes a rental does not have
+        self.ignore_empty = False
+
+    def load_snapshot(self, directory):
+        """
+        Load a previous output of MLS Scraper.
+        Json output is used if it exists, otherwise csv output.
+
+        Parameters
+        ----------
+        directory : Str
+            Directory of the previous output.
+
+        Raises
+        ------
+        FileNotFoundError
+            If there is no output of MLS Scraper in the directory.
+
+        Returns
+        -------
+        MLS_dict : Dict
+            MLS_unit_attrs_dict: Dictionary of unit attributes
+            MLS_room_dict: Dictionary of room attributes
+
+        """
+
+        for file_format in ['json', 'csv']:
+            unit_attrs_path = os.path.join(
+                directory, f"{UNIT_ATTRS_FILE_NAMES[file_format]}.{file_format}")
+            room_path = os.path.join(
+                directory, f"{ROOM_FILE_NAMES[file_format]}.{file_format}")
+
+            if os.path.exists(unit_attrs_path) and os.path.exists(room_path):
+                self.ignore_empty = file_format == 'csv'
+                if file_format == 'json':
+                    return self._load_json_snapshot(unit_attrs_path, room_path)
+                return self._load_csv_snapshot(unit_attrs_path, room_path)
+
+        raise FileNotFoundError(f'No output of MLS Scraper in {directory}')
+
+    def _load_json_snapshot(self, unit_attrs_path, room_path):
+        """
+        Load a previous output of MLS Scraper in json format
+
+        Parameters
+        ----------
+        unit_attrs_path : Str
+            Path of the unit attributes.
+        room_path : Str
+            Path of the room attributes.
+
+        Returns
+        -------
+        MLS_dict : Dict
+            MLS_unit_attrs_dict: Dictionary of unit attributes
+            MLS_room_dict: Dictionary of room attributes
+
+        """
+
+        with open(unit_attrs_path, encoding='utf-8') as fp:
+            unit_attrs_dict = json.load(fp)
+
+        with open(room_path, encoding='utf-8') as fp:
+            room_dict = json.load(fp)
+
+        return {'MLS_unit_attrs_dict': unit_attrs_dict,
+                'MLS_room_dict': room_dict}
+
+    def _load_csv_snapshot(self, unit_attrs_path, room_path):
+        """
+        Load a previous output of MLS Scraper in csv format
+
+        Parameters
+        ----------
+        unit_attrs_path : Str
+            Path of the unit attributes.
+        room_path : Str
+            Path of the room attributes.
+
+        Returns
+        -------
+        MLS_dict : Dict
+            MLS_unit_attrs_dict: Dictionary of unit attributes
+            MLS_room_dict: Dictionary of room attributes
+
+        """
+
+        unit_attrs_dict = {}
+        room_dict = {}
+
+        with open(unit_attrs_path, newline='', encoding='utf-8') as fp:
+            reader = csv.reader(fp)
+            labels = next(reader)[1:]
+            for row in reader:
+                unit_attrs_dict[row[0]] = dict(zip(labels, row[1:]))
+                room_dict[row[0]] = {}
+
+        with open(room_path, newline='', encoding='utf-8') as fp:
+            reader = csv.reader(fp)
+            labels = next(reader)[2:]
+            for row in reader:
+                room_dict.setdefault(row[0], {})[row[1]] = dict(
+                    zip(labels, row[2:]))
+
+        return {'MLS_unit_attrs_dict': unit_attrs_dict,
+                'MLS_room_dict': room_dict}
+
+    def compare(self, previous_MLS_dict, current_MLS_dict):
+        """
+        Find the added, changed and removed rentals between two outputs.
+        Rentals are matched by MLS number in hash tables and compared record
+        by record, and field-level changes are only worked out for changed
+        rentals.
+
+        Parameters
+        ----------
+        previous_MLS_dict : Dict
+            Previous output with MLS_unit_attrs_dict and MLS_room_dict.
+        current_MLS_dict : Dict
+            Current output with MLS_unit_attrs_dict and MLS_room_dict.
+
+        Returns
+        -------
+        diff : Dict
+            added: Dictionary of unit and room attributes of new rentals
+            changed: Dictionary of field-level changes of changed rentals
+            removed: List of MLS number of removed rentals
+
+        """
+
+        previous_units = previous_MLS_dict['MLS_unit_attrs_dict']
+        previous_rooms = previous_MLS_dict['MLS_room_dict']
+        current_units = current_MLS_dict['MLS_unit_attrs_dict']
+        current_rooms = current_MLS_dict['MLS_room_dict']
+
+        self.diff = {'added': {},
+                     'changed': {},
+                     'removed': []}
+
+        for MLS_num, attribute_dict in current_units.items():
+            room_table = current_rooms.get(MLS_num, {})
+
+            if MLS_num not in previous_units:
+                self.diff['added'][MLS_num] = {'unit': attribute_dict,
+                                               'rooms': room_table}
+                continue
+
+            previous_attrs = previous_units[MLS_num]
+            previous_room_table = previous_rooms.get(MLS_num, {})
+
+            # Dictionary comparison does not depend on the order of attributes
+            if (self._drop_empty(previous_attrs) != self._drop_empty(attribute_dict)
+                    or previous_room_table != room_table):
+                self.diff['changed'][MLS_num] = self._compare_rental(
+                    previous_attrs, previous_room_table,
+                    attribute_dict, room_table)
+
+        self.diff['removed'] = [MLS_num for MLS_num in previous_units
+                                if MLS_num not in current_units]
+
+        return self.diff
+
+    def _drop_empty(self, attribute_dict):
+        """
+        Drop empty attributes if they are ignored in the comparison
+
+        Parameters
+        ----------
+        attribute_dict : Dict
+            Unit attributes of rental.
+
+        Returns
+        -------
+        Dict
+            Unit attributes of rental.
+
+        """
+        if not self.ignore_empty:
+            return attribute_dict
+        return {label: value for label, value in attribute_dict.items()
+                if value != ''}
+
+    def _compare_rental(self, previous_attrs, previous_rooms,
+                        current_attrs, current_rooms):
+        """
+        Find the field-level changes of a rental
+
+        Parameters
+        ----------
+        previous_attrs : Dict
+            Previous unit attributes of rental.
+        previous_rooms : Dict
+            Previous room attributes of rental.
+        current_attrs : Dict
+            Current unit attributes of rental.
+        current_rooms : Dict
+            Current room attributes of rental.
+
+        Returns
+        -------
+        changes : List
+            Dictionaries of the table, room index, field, previous and current
+            value of each changed field.
+
+        """
+
+        changes = self._compare_fields(self._drop_empty(previous_attrs),
+                                       self._drop_empty(current_attrs),
+                                       'unit', '')
+
+        for room_index in {**previous_rooms, **current_rooms}:
+            changes.extend(self._compare_fields(previous_rooms.get(room_index, {}),
+                                                current_rooms.get(room_index, {}),
+                                                'room', room_index))
+
+        return changes
+
+    def _compare_fields(self, previous_fields, current_fields, table, room_index):
+        """
+        Find the changed fields between two dictionaries
+
+        Parameters
+        ----------
+        previous_fields : Dict
+            Previous fields.
+        current_fields : Dict
+            Current fields.
+        table : Str
+            Table of the fields, unit or room.
+        room_index : Str
+            Room index of room fields, empty for unit fields.
+
+        Returns
+        -------
+        changes : List
+            Dictionaries of the table, room index, field, previous and current
+            value of each changed field.
+
+        """
+
+        changes = []
+
+        for field in {**previous_fields, **current_fields}:
+            previous_value = previous_fields.get(field, '')
+            current_value = current_fields.get(field, '')
+            if previous_value != current_value:
+                changes.append({'Table': table,
+                                'Room Index': room_index,
+                                'Field': field,
+                                'Previous': previous_value,
+                                'Current': current_value})
+
+        return changes
+
+    def get_diff_summary(self):
+        """
+        Return the number of added, changed and removed rentals
+
+        Returns
+        -------
+        Dict
+            Number of added, changed and removed rentals.
+
+        """
+        return {status: len(rentals) for status, rentals in self.diff.items()}
+
+    def output_diff(self, directory, as_df=False):
+        """
+        Save the added, changed and removed rentals
+
+        Parameters
+        ----------
+        directory : Str
+            Directory of the output to be saved.
+        as_df : Bool, optional
+            Whether the files are saved as csv, with a row per field.
+            If as_df is False, save as json.
+            The default is False.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if not as_df:
+            for status, rentals in self.diff.items():
+                file_path = os.path.join(directory, f'MLS_diff_{status}.json')
+                with open(file_path, 'w', encoding='utf-8') as fp:
+                    json.dump(rentals, fp)
+            return
+
+        added_rows = []
+        for MLS_num, rental in self.diff['added'].items():
+            added = self._compare_rental({}, {}, rental['unit'], rental['rooms'])
+            added_rows.extend(self._to_change_rows(MLS_num, added))
+
+        changed_rows = []
+        for MLS_num, changes in self.diff['changed'].items():
+            changed_rows.extend(self._to_change_rows(MLS_num, changes))
+
+        self._write_csv(os.path.join(directory, 'MLS_diff_added.csv'),
+                        CHANGE_HEADER, added_rows)
+        self._write_csv(os.path.join(directory, 'MLS_diff_changed.csv'),
+                        CHANGE_HEADER, changed_rows)
+        self._write_csv(os.path.join(directory, 'MLS_diff_removed.csv'),
+                        ['MLS#'], [[MLS_num] for MLS_num in self.diff['removed']])
+
+    def _to_change_rows(self, MLS_num, changes):
+        """
+        Convert the field-level changes of a rental into csv rows
+
+        Parameters
+        ----------
+        MLS_num : Str
+            MLS number of the rental.
+        changes : List
+            Field-level changes of the rental.
+
+        Returns
+        -------
+        List
+            Rows of the field-level changes.
+
+        """
+        return [[MLS_num] + [change[column] for column in CHANGE_HEADER[1:]]
+                for change in changes]
+
+    def _write_csv(self, file_path, header, rows):
+        """
+        Write rows to a csv file
+
+        Parameters
+        ----------
+        file_path : Str
+            Path of the csv file.
+        header : List
+            Column names.
+        rows : List
+            Rows of values.
+
+        Returns
+        -------
+        None.
+
+        """
+        with open(file_path, 'w', newline='', encoding='utf-8') as fp:
+            writer = csv.writer(fp, lineterminator=os.linesep)
+            writer.writerow(header)
+            writer.writerows(rows)
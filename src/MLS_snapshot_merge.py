@@ -0,0 +1,518 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_Snapshot_Merge
+Description: External k-way merge of MLS Scraper outputs, the latest record of each MLS# wins
+"""
+
+import heapq
+import json
+import os
+import tempfile
+from datetime import datetime
+from itertools import chain, groupby
+from MLS_snapshot_diff import (MLS_Snapshot_Diff, UNIT_ATTRS_FILE_NAMES,
+                               ROOM_FILE_NAMES)
+from MLS_jsonl_writer import MLS_JSONL_Writer, JSONL_FILE_NAME
+from MLS_csv_writer import MLS_CSV_Writer
+from MLS_sqlite_sink import MLS_SQLite_Sink, SQLITE_FILE_NAME
+
+# Output formats of the merged rentals
+MERGE_FORMATS = ['json', 'csv', 'jsonl', 'sqlite']
+
+# Most sorted runs read at the same time by a merge, more runs are merged
+# in several passes
+DEFAULT_FAN_IN = 16
+
+# Rentals kept in memory before they are sorted and written as a run
+DEFAULT_RUN_SIZE = 20000
+
+# Date format of the Contract Date
+DATE_FORMAT = '%m/%d/%Y'
+
+# Leading column of the room table
+ROOM_INDEX_COLUMN = 'Room Index'
+
+
+def get_MLS_number(line):
+    """
+    Return the MLS# of a line of a run
+
+    Parameters
+    ----------
+    line : Str
+        Line of a rental.
+
+    Returns
+    -------
+    Str
+        MLS number of the rental.
+
+    """
+    return line[:line.index('\t')]
+
+
+def get_rank(line):
+    """
+    Return the rank of a line of a run among the lines of its MLS#, its
+    Contract Date, snapshot order and record order padded to fixed widths
+    so the text compares as the numbers
+
+    Parameters
+    ----------
+    line : Str
+        Line of a rental.
+
+    Returns
+    -------
+    Str
+        Rank of the line, the highest wins.
+
+    """
+    return line[:line.index('\t{')]
+
+
+def get_contract_day(attribute_dict):
+    """
+    Return the Contract Date of a rental as a day number
+
+    Parameters
+    ----------
+    attribute_dict : Dict
+        Unit attributes of rental.
+
+    Returns
+    -------
+    Int
+        Day number of the Contract Date, 0 if it is missing or not a date.
+
+    """
+
+    try:
+        return datetime.strptime(attribute_dict.get('Contract Date') or '',
+                                 DATE_FORMAT).toordinal()
+    except ValueError:
+        return 0
+
+
+"""
+Class: MLS_Snapshot_Merge
+"""
+
+
+class MLS_Snapshot_Merge:
+
+    def __init__(self, fan_in=DEFAULT_FAN_IN, run_size=DEFAULT_RUN_SIZE,
+                 temp_dir=None):
+        """
+        Initialize the merge of MLS Scraper outputs into one rental per MLS#.
+        The record with the latest Contract Date wins, then the record of
+        the latest snapshot, then the latest record of a snapshot.
+
+        Each snapshot is cut into runs of rentals sorted by MLS#, written to
+        temporary files, and the runs are merged fan_in at a time. Memory
+        holds a run being sorted or a line of each merged run, so it does
+        not grow with the number of snapshots.
+
+        Parameters
+        ----------
+        fan_in : Int, optional
+            Most runs merged at the same time.
+            The default is DEFAULT_FAN_IN.
+        run_size : Int, optional
+            Rentals kept in memory before they are written as a run.
+            The default is DEFAULT_RUN_SIZE.
+        temp_dir : Str, optional
+            Directory of the temporary runs, the system one if it is None.
+            The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if fan_in < 2:
+            raise ValueError('Fan-in of the merge must be at least 2')
+
+        self.fan_in = fan_in
+        self.run_size = run_size
+        self.temp_dir = temp_dir
+
+        # Labels of the unit and room attributes, in the order first seen
+        self.unit_labels = {}
+        self.room_labels = {}
+
+        # Number of snapshots, records read, runs written, merge passes
+        # and rentals merged
+        self.merge_status = {'snapshots': 0,
+                             'records': 0,
+                             'runs': 0,
+                             'passes': 0,
+                             'rentals': 0}
+
+    def iter_snapshot(self, directory):
+        """
+        Read the rentals of an output of MLS Scraper.
+        Json output is used if it exists, then csv, then json lines, which
+        are streamed line by line.
+
+        Parameters
+        ----------
+        directory : Str
+            Directory of the output.
+
+        Raises
+        ------
+        FileNotFoundError
+            If there is no output of MLS Scraper in the directory.
+
+        Yields
+        ------
+        MLS_num : Str
+            MLS number of the rental.
+        attribute_dict : Dict
+            Unit attributes of rental.
+        room_table : Dict
+            Room attributes of rental.
+
+        """
+
+        jsonl_path = os.path.join(directory, JSONL_FILE_NAME)
+
+        try:
+            MLS_dict = MLS_Snapshot_Diff().load_snapshot(directory)
+        except FileNotFoundError:
+            if not os.path.exists(jsonl_path):
+                raise
+            MLS_dict = None
+
+        if MLS_dict is not None:
+            room_dict = MLS_dict['MLS_room_dict']
+            for MLS_num, attribute_dict in MLS_dict['MLS_unit_attrs_dict'].items():
+                yield MLS_num, attribute_dict, room_dict.get(MLS_num, {})
+            return
+
+        with open(jsonl_path, encoding='utf-8') as fp:
+            for line in fp:
+                if line.strip():
+                    rental = json.loads(line)
+                    yield rental['MLS#'], rental['unit'], rental['rooms']
+
+    def _write_run(self, run_dir, lines):
+        """
+        Write lines of rentals sorted by MLS# as a run
+
+        Parameters
+        ----------
+        run_dir : Str
+            Directory of the temporary runs.
+        lines : Iterable
+            Lines of rentals sorted by MLS#.
+
+        Returns
+        -------
+        Str
+            Path of the run.
+
+        """
+
+        run_path = os.path.join(run_dir, f"run_{self.merge_status['runs']}.txt")
+        self.merge_status['runs'] += 1
+
+        with open(run_path, 'w', encoding='utf-8') as fp:
+            fp.writelines(lines)
+        return run_path
+
+    def _write_sorted_run(self, run_dir, lines):
+        """
+        Sort lines of rentals by MLS# and write them as a run, keeping the
+        winning record of each MLS#
+
+        Parameters
+        ----------
+        run_dir : Str
+            Directory of the temporary runs.
+        lines : List
+            Lines of rentals, sorted in place.
+
+        Returns
+        -------
+        Str
+            Path of the run.
+
+        """
+        lines.sort(key=get_MLS_number)
+        return self._write_run(run_dir, self._get_winners(lines))
+
+    def _get_winners(self, lines):
+        """
+        Keep the winning record of each MLS# of lines sorted by MLS#
+
+        A line is MLS#, Contract Date day number, snapshot order and record
+        order, separated by tabs, then the rental in json.
+
+        Parameters
+        ----------
+        lines : Iterable
+            Lines of rentals sorted by MLS#.
+
+        Yields
+        ------
+        line : Str
+            Line of the winning record of each MLS#.
+
+        """
+
+        for _, records in groupby(lines, key=get_MLS_number):
+            yield max(records, key=get_rank)
+
+    def _make_line(self, MLS_num, attribute_dict, room_table, snapshot_order,
+                   record_order):
+        """
+        Make the line of a rental in a run
+
+        Parameters
+        ----------
+        MLS_num : Str
+            MLS number of the rental.
+        attribute_dict : Dict
+            Unit attributes of rental.
+        room_table : Dict
+            Room attributes of rental.
+        snapshot_order : Int
+            Position of the snapshot in the merge.
+        record_order : Int
+            Position of the record in the snapshot.
+
+        Returns
+        -------
+        Str
+            Line of the rental.
+
+        """
+
+        for label in attribute_dict:
+            self.unit_labels.setdefault(label)
+        for room in room_table.values():
+            for label in room:
+                self.room_labels.setdefault(label)
+
+        return (f'{MLS_num}\t{get_contract_day(attribute_dict):07d}\t'
+                f'{snapshot_order:06d}\t{record_order:010d}\t'
+                + json.dumps({'unit': attribute_dict, 'rooms': room_table})
+                + '\n')
+
+    def _merge_runs(self, run_paths):
+        """
+        Merge sorted runs into the winning records in MLS# order
+
+        Parameters
+        ----------
+        run_paths : List
+            Paths of the runs, at most fan_in.
+
+        Yields
+        ------
+        line : Str
+            Line of the winning record of each MLS#.
+
+        """
+
+        files = [open(run_path, encoding='utf-8') for run_path in run_paths]
+        try:
+            yield from self._get_winners(heapq.merge(*files,
+                                                     key=get_MLS_number))
+        finally:
+            for fp in files:
+                fp.close()
+
+    def merge(self, snapshot_dirs):
+        """
+        Merge the outputs into the winning record of each MLS#
+
+        Parameters
+        ----------
+        snapshot_dirs : List
+            Directories of the outputs of MLS Scraper, oldest first.
+
+        Yields
+        ------
+        MLS_num : Str
+            MLS number of the rental, in order.
+        attribute_dict : Dict
+            Unit attributes of rental.
+        room_table : Dict
+            Room attributes of rental.
+
+        """
+
+        with tempfile.TemporaryDirectory(prefix='MLS_merge_',
+                                         dir=self.temp_dir) as run_dir:
+            run_paths = []
+
+            # Cut the snapshots into sorted runs
+            for snapshot_order, directory in enumerate(snapshot_dirs):
+                self.merge_status['snapshots'] += 1
+                lines = []
+                for record_order, rental in enumerate(self.iter_snapshot(directory)):
+                    self.merge_status['records'] += 1
+                    lines.append(self._make_line(*rental, snapshot_order,
+                                                 record_order))
+                    if len(lines) >= self.run_size:
+                        run_paths.append(self._write_sorted_run(run_dir, lines))
+                        lines = []
+                if lines:
+                    run_paths.append(self._write_sorted_run(run_dir, lines))
+
+            # Merge fan_in runs at a time until they can be merged at once
+            while len(run_paths) > self.fan_in:
+                self.merge_status['passes'] += 1
+                merged_paths = []
+                for start in range(0, len(run_paths), self.fan_in):
+                    group = run_paths[start:start + self.fan_in]
+                    if len(group) == 1:
+                        merged_paths.append(group[0])
+                        continue
+                    merged_paths.append(self._write_run(
+                        run_dir, self._merge_runs(group)))
+                    for run_path in group:
+                        os.remove(run_path)
+                run_paths = merged_paths
+
+            self.merge_status['passes'] += 1
+            for line in self._merge_runs(run_paths):
+                MLS_num = get_MLS_number(line)
+                rental = json.loads(line[line.index('\t{') + 1:])
+                self.merge_status['rentals'] += 1
+                yield MLS_num, rental['unit'], rental['rooms']
+
+    def output_rental_information(self, snapshot_dirs, directory,
+                                  file_format='json'):
+        """
+        Merge the outputs and save the merged rentals, written one at a time
+        in the same formats as the output of MLS Scraper
+
+        Parameters
+        ----------
+        snapshot_dirs : List
+            Directories of the outputs of MLS Scraper, oldest first.
+        directory : Str
+            Directory of the merged output.
+        file_format : Str, optional
+            Output format, one of MERGE_FORMATS. The default is 'json'.
+
+        Raises
+        ------
+        ValueError
+            If the output format is not supported.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if file_format not in MERGE_FORMATS:
+            raise ValueError(f'Format {file_format} is not supported, '
+                             f'choose from {MERGE_FORMATS}')
+
+        rentals = self.merge(snapshot_dirs)
+
+        if file_format == 'json':
+            self._write_json(rentals, directory)
+        elif file_format == 'csv':
+            self._write_csv(rentals, directory)
+        elif file_format == 'jsonl':
+            writer = MLS_JSONL_Writer(os.path.join(directory, JSONL_FILE_NAME))
+            try:
+                for rental in rentals:
+                    writer.write_rental(*rental)
+            finally:
+                writer.close()
+        else:
+            sink = MLS_SQLite_Sink(os.path.join(directory, SQLITE_FILE_NAME))
+            try:
+                sink.write_rentals(rentals)
+            finally:
+                sink.close()
+
+    def _write_json(self, rentals, directory):
+        """
+        Save the merged rentals as the json dictionaries of MLS Scraper,
+        written entry by entry
+
+        Parameters
+        ----------
+        rentals : Iterable
+            Tuples of MLS number, unit attributes and room attributes.
+        directory : Str
+            Directory of the merged output.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        unit_path = os.path.join(directory, UNIT_ATTRS_FILE_NAMES['json'] + '.json')
+        room_path = os.path.join(directory, ROOM_FILE_NAMES['json'] + '.json')
+
+        with open(unit_path, 'w') as unit_fp, open(room_path, 'w') as room_fp:
+            # Same separators as json.dump of the whole dictionary
+            separator = '{'
+            for MLS_num, attribute_dict, room_table in rentals:
+                key = json.dumps(MLS_num)
+                unit_fp.write(f'{separator}{key}: {json.dumps(attribute_dict)}')
+                room_fp.write(f'{separator}{key}: {json.dumps(room_table)}')
+                separator = ', '
+
+            closing = '}' if separator == ', ' else '{}'
+            unit_fp.write(closing)
+            room_fp.write(closing)
+
+    def _write_csv(self, rentals, directory):
+        """
+        Save the merged rentals as the csv tables of MLS Scraper,
+        written row by row
+
+        Parameters
+        ----------
+        rentals : Iterable
+            Tuples of MLS number, unit attributes and room attributes.
+        directory : Str
+            Directory of the merged output.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        # The labels are known once the runs are written, before the
+        # first merged rental
+        rentals = iter(rentals)
+        first = next(rentals, None)
+
+        unit_labels = list(self.unit_labels)
+        room_labels = [label for label in self.room_labels
+                       if label != ROOM_INDEX_COLUMN]
+
+        csv_writer = MLS_CSV_Writer()
+        unit_fp, unit_writer = csv_writer.open_table(
+            os.path.join(directory, UNIT_ATTRS_FILE_NAMES['csv'] + '.csv'),
+            unit_labels)
+        room_fp, room_writer = csv_writer.open_table(
+            os.path.join(directory, ROOM_FILE_NAMES['csv'] + '.csv'),
+            [ROOM_INDEX_COLUMN, *room_labels])
+
+        with unit_fp, room_fp:
+            if first is None:
+                return
+
+            for MLS_num, attribute_dict, room_table in chain([first], rentals):
+                unit_writer.writerow([MLS_num, *[attribute_dict.get(label) or ''
+                                                  for label in unit_labels]])
+                room_writer.writerows([MLS_num, room_index,
+                                       *[room.get(label) or ''
+                                         for label in room_labels]]
+                                      for room_index, room in room_table.items())
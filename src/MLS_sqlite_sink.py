@@ -0,0 +1,430 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_SQLite_Sink
+Description: Incremental SQLite database of scraped rentals keyed by MLS#
+"""
+
+import hashlib
+import sqlite3
+import string
+
+# File name of the database in the output directory
+SQLITE_FILE_NAME = 'MLS_rentals.sqlite'
+
+# Number of rentals written per transaction
+BATCH_SIZE = 5000
+
+# Page cache of the connection in kibibytes, as a negative number of pages
+CACHE_SIZE = -64 * 1024
+
+# Key of the tables
+MLS_COLUMN = 'MLS#'
+ROOM_INDEX_COLUMN = 'Room Index'
+
+# Digest of the unit and room attributes, unchanged rentals are not rewritten
+DIGEST_COLUMN = 'Scrape Digest'
+
+# Separator of the scraped strings hashed into the digest
+DIGEST_SEPARATOR = '\x1f'
+
+# SQLite compares column names ignoring the case of ASCII letters only
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+"""
+Columns created with the tables, other labels are added as they are found
+List Price is the number of List, computed by SQLite for the price index
+"""
+UNIT_COLUMNS_SQL = ('"MLS#" TEXT PRIMARY KEY, "Scrape Digest" TEXT, '
+                    '"City" TEXT, "Postal Code" TEXT, '
+                    '"List" TEXT, "List Price" REAL GENERATED ALWAYS AS '
+                    '(CAST(REPLACE(REPLACE("List", \'$\', \'\'), \',\', \'\') '
+                    'AS REAL)) VIRTUAL')
+ROOM_COLUMNS_SQL = ('"MLS#" TEXT NOT NULL REFERENCES units ("MLS#") '
+                    'ON DELETE CASCADE, "Room Index" TEXT NOT NULL, '
+                    'PRIMARY KEY ("MLS#", "Room Index")')
+INDEX_SQL = ['CREATE INDEX IF NOT EXISTS units_city ON units ("City")',
+             'CREATE INDEX IF NOT EXISTS units_postal_code '
+             'ON units ("Postal Code")',
+             'CREATE INDEX IF NOT EXISTS units_list_price ON units ("List Price")']
+
+"""
+Class: MLS_SQLite_Sink
+"""
+
+
+class MLS_SQLite_Sink:
+
+    def __init__(self, database_path):
+        """
+        Open or create the database of rentals.
+        Rentals are upserted by MLS#, so repeated runs update the same
+        database instead of rewriting it.
+
+        Parameters
+        ----------
+        database_path : Str
+            Path of the SQLite database.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.database_path = database_path
+        self.connection = sqlite3.connect(database_path, timeout=60)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.execute(f'PRAGMA cache_size = {CACHE_SIZE}')
+
+        with self.connection:
+            self.connection.execute(
+                f'CREATE TABLE IF NOT EXISTS units ({UNIT_COLUMNS_SQL})')
+            self.connection.execute(
+                f'CREATE TABLE IF NOT EXISTS rooms ({ROOM_COLUMNS_SQL}) '
+                'WITHOUT ROWID')
+            for index_sql in INDEX_SQL:
+                self.connection.execute(index_sql)
+
+        # Writable columns of the tables, List Price is computed by SQLite
+        self.columns = {table: [column for column in self._get_columns(table)
+                                if column != 'List Price']
+                        for table in ['units', 'rooms']}
+
+        # Digest of the rentals in the database
+        self.digests = dict(self.connection.execute(
+            'SELECT "MLS#", "Scrape Digest" FROM units'))
+
+        # Rentals not yet written by MLS#, a rental repeated replaces the
+        # previous one
+        self.batch = {}
+
+        # Number of rentals and rooms written, and unchanged rentals skipped
+        self.write_status = {'units': 0, 'rooms': 0, 'unchanged': 0}
+
+    def _get_columns(self, table):
+        """
+        Return the columns of a table in the database
+
+        Parameters
+        ----------
+        table : Str
+            Name of the table.
+
+        Returns
+        -------
+        List
+            Name of the columns.
+
+        """
+        return [row[1] for row in self.connection.execute(
+            f'PRAGMA table_xinfo({table})')]
+
+    def write_rentals(self, rentals):
+        """
+        Upsert rentals into the database in batches, a transaction per batch.
+        The rooms of a rental replace its rooms in the database, and rentals
+        unchanged since the last run are skipped.
+
+        Parameters
+        ----------
+        rentals : Iterable
+            Tuples of MLS number, unit attributes and room attributes.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        for rental in rentals:
+            self.write_rental(*rental)
+        self.flush()
+
+    def write_rental(self, MLS_num, attribute_dict, room_table):
+        """
+        Add a rental to the current batch, the batch is written once full
+
+        Parameters
+        ----------
+        MLS_num : Str
+            MLS number of the rental.
+        attribute_dict : Dict
+            Unit attributes of rental.
+        room_table : Dict
+            Room attributes of rental.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        digest = self._get_digest(attribute_dict, room_table)
+        if self.digests.get(MLS_num) == digest:
+            self.batch.pop(MLS_num, None)
+            self.write_status['unchanged'] += 1
+            return
+
+        self.batch[MLS_num] = (digest, attribute_dict, room_table)
+        if len(self.batch) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the current batch of rentals.
+        The batch is dropped even if its transaction fails, so the next
+        batches are still written.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if not self.batch:
+            return
+
+        try:
+            self._write_batch(self.batch)
+        finally:
+            self.batch = {}
+
+    def _write_batch(self, batch):
+        """
+        Upsert a batch of rentals in a single transaction.
+        The digests are recorded once the transaction is committed, and the
+        columns added are forgotten if it is rolled back.
+
+        Parameters
+        ----------
+        batch : Dict
+            Tuples of digest, unit attributes and room attributes by MLS number.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        unit_rows = []
+        room_rows = []
+        for MLS_num, (digest, attribute_dict, room_table) in batch.items():
+            unit_rows.append({**attribute_dict, MLS_COLUMN: MLS_num,
+                              DIGEST_COLUMN: digest})
+            for room_index, room_attrs in room_table.items():
+                room_rows.append({**room_attrs, MLS_COLUMN: MLS_num,
+                                  ROOM_INDEX_COLUMN: room_index})
+
+        columns = {table: list(table_columns)
+                   for table, table_columns in self.columns.items()}
+        try:
+            with self.connection:
+                # sqlite3 only opens a transaction before DML statements,
+                # ALTER TABLE would be committed on its own
+                self.connection.execute('BEGIN')
+                unit_rows = self._add_columns('units', unit_rows)
+                room_rows = self._add_columns('rooms', room_rows)
+
+                self._upsert_units(unit_rows)
+
+                self.connection.executemany(
+                    'DELETE FROM rooms WHERE "MLS#" = ?',
+                    [(MLS_num,) for MLS_num in batch])
+                self._insert_rows('rooms', room_rows)
+        except Exception:
+            # ALTER TABLE is rolled back with the transaction
+            self.columns = columns
+            raise
+
+        for MLS_num, (digest, _, _) in batch.items():
+            self.digests[MLS_num] = digest
+        self.write_status['units'] += len(unit_rows)
+        self.write_status['rooms'] += len(room_rows)
+
+    def _get_digest(self, attribute_dict, room_table):
+        """
+        Hash the unit and room attributes of a rental.
+        The scraped strings are joined instead of serialized as json,
+        which is a few times faster.
+
+        Parameters
+        ----------
+        attribute_dict : Dict
+            Unit attributes of rental.
+        room_table : Dict
+            Room attributes of rental.
+
+        Returns
+        -------
+        Str
+            Digest of the rental.
+
+        """
+
+        fields = [str(len(attribute_dict)), *attribute_dict,
+                  *attribute_dict.values()]
+        for room_index, room_attrs in room_table.items():
+            fields.extend([room_index, str(len(room_attrs)), *room_attrs,
+                           *room_attrs.values()])
+
+        return hashlib.blake2b(DIGEST_SEPARATOR.join(fields).encode(),
+                               digest_size=16).hexdigest()
+
+    def _add_columns(self, table, rows):
+        """
+        Add the labels not yet in a table as text columns.
+        Column names are case insensitive in SQLite, so a label differing
+        from a column only in case is stored in that column.
+
+        Parameters
+        ----------
+        table : Str
+            Name of the table.
+        rows : List
+            Dictionaries of the values of each label.
+
+        Returns
+        -------
+        List
+            Dictionaries of the values of each column.
+
+        """
+
+        known_columns = set(self.columns[table]) | {'List Price'}
+        folded_columns = {column.translate(ASCII_LOWER): column
+                          for column in known_columns}
+
+        table_rows = []
+        for row in rows:
+            if known_columns.issuperset(row):
+                table_rows.append(row)
+                continue
+
+            table_row = {}
+            for label, value in row.items():
+                folded_label = label.translate(ASCII_LOWER)
+                column = folded_columns.get(folded_label)
+                if column is None:
+                    self.connection.execute(
+                        f'ALTER TABLE {table} ADD COLUMN {self._quote(label)} TEXT')
+                    self.columns[table].append(label)
+                    known_columns.add(label)
+                    folded_columns[folded_label] = column = label
+                table_row[column] = value
+            table_rows.append(table_row)
+
+        return table_rows
+
+    def _upsert_units(self, rows):
+        """
+        Insert rentals, or update every column of the rentals already in
+        the table, labels a rental does not have any more become NULL
+
+        Parameters
+        ----------
+        rows : List
+            Dictionaries of the unit attributes of each rental.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        columns = self.columns['units']
+        updates = ', '.join(f'{self._quote(column)} = excluded.{self._quote(column)}'
+                            for column in columns if column != MLS_COLUMN)
+
+        self.connection.executemany(
+            f'INSERT INTO units ({self._quote_all(columns)}) '
+            f'VALUES ({", ".join("?" * len(columns))}) '
+            f'ON CONFLICT ("MLS#") DO UPDATE SET {updates}',
+            [list(map(row.get, columns)) for row in rows])
+
+    def _insert_rows(self, table, rows):
+        """
+        Insert rows into a table
+
+        Parameters
+        ----------
+        table : Str
+            Name of the table.
+        rows : List
+            Dictionaries of the values of each column.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        columns = self.columns[table]
+
+        self.connection.executemany(
+            f'INSERT INTO {table} ({self._quote_all(columns)}) '
+            f'VALUES ({", ".join("?" * len(columns))})',
+            [list(map(row.get, columns)) for row in rows])
+
+    def _quote(self, column):
+        """
+        Quote a label as a SQL identifier
+
+        Parameters
+        ----------
+        column : Str
+            Label of the column.
+
+        Returns
+        -------
+        Str
+            Quoted identifier.
+
+        """
+        return '"' + column.replace('"', '""') + '"'
+
+    def _quote_all(self, columns):
+        """
+        Quote labels as a list of SQL identifiers
+
+        Parameters
+        ----------
+        columns : List
+            Labels of the columns.
+
+        Returns
+        -------
+        Str
+            Comma separated quoted identifiers.
+
+        """
+        return ', '.join(self._quote(column) for column in columns)
+
+    def get_write_status(self):
+        """
+        Return the number of rentals and rooms written
+
+        Returns
+        -------
+        Dict
+            Number of rentals and rooms written.
+
+        """
+        return self.write_status
+
+    def close(self):
+        """
+        Write the remaining rentals and close the database
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.connection is None:
+            return
+
+        self.flush()
+        self.connection.close()
+        self.connection = None
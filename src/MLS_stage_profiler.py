@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+Name: MLS_Stage_Profiler
+Description: Wall time, CPU time and peak memory of the scraping stages
+"""
+
+import cProfile
+import heapq
+import json
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, peak memory is not measured
+    resource = None
+
+# Number of slowest rentals reported
+TOP_N_LISTINGS = 10
+
+# Bytes per megabyte of the peak memory
+MEGABYTE = 1024 * 1024
+
+
+def get_peak_rss():
+    """
+    Return the peak resident memory of the current process
+
+    Returns
+    -------
+    Float or None
+        Peak resident memory in megabytes, None if it is not available.
+
+    """
+
+    if resource is None:
+        return None
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    if sys.platform == 'darwin':
+        return peak_rss / MEGABYTE
+    return peak_rss / 1024
+
+
+"""
+Class: MLS_Stage_Profiler
+"""
+
+
+class MLS_Stage_Profiler:
+
+    def __init__(self, top_n=TOP_N_LISTINGS, profile=False):
+        """
+        Initialize the measurement of the scraping stages
+
+        Parameters
+        ----------
+        top_n : Int, optional
+            Number of slowest rentals kept.
+            The default is TOP_N_LISTINGS.
+        profile : Bool, optional
+            Whether the stages are also profiled by cProfile.
+            The default is False.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.top_n = top_n
+        self.cprofile = cProfile.Profile() if profile else None
+
+        # Wall time, CPU time and peak memory of each stage, in running order
+        self.stages = {}
+
+        # Extraction time of the succeeded rentals: count, total,
+        # and a min-heap of the slowest rentals as (time, MLS#)
+        self.listing_count = 0
+        self.listing_time = 0.0
+        self.slowest_listings = []
+
+        # Time spent on the failed rentals, kept apart from the slowest
+        self.failed_listing_count = 0
+        self.failed_listing_time = 0.0
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Measure a stage, e.g. with profiler.stage('read_html'): ...
+        A stage run several times adds up.
+
+        Parameters
+        ----------
+        name : Str
+            Name of the stage.
+
+        Yields
+        ------
+        None.
+
+        """
+
+        peak_rss_before = get_peak_rss()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+
+        if self.cprofile is not None:
+            self.cprofile.enable()
+        try:
+            yield
+        finally:
+            if self.cprofile is not None:
+                self.cprofile.disable()
+
+            metrics = self.stages.setdefault(
+                name, {'wall_time': 0.0, 'cpu_time': 0.0,
+                       'peak_rss_mb': None, 'peak_rss_growth_mb': None})
+            metrics['wall_time'] += time.perf_counter() - wall_start
+            metrics['cpu_time'] += time.process_time() - cpu_start
+
+            # Peak memory of the process once the stage is done,
+            # and how much the stage raised it
+            peak_rss = get_peak_rss()
+            if peak_rss is not None:
+                metrics['peak_rss_mb'] = peak_rss
+                metrics['peak_rss_growth_mb'] = (
+                    (metrics['peak_rss_growth_mb'] or 0.0)
+                    + peak_rss - peak_rss_before)
+
+    def record_listing(self, MLS_num, elapsed, succeeded=True):
+        """
+        Record the extraction time of a rental, only succeeded rentals are
+        ranked among the slowest
+
+        Parameters
+        ----------
+        MLS_num : Str
+            MLS number of the rental.
+        elapsed : Float
+            Extraction time in seconds.
+        succeeded : Bool, optional
+            Whether the rental information was found. The default is True.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if not succeeded:
+            self.failed_listing_count += 1
+            self.failed_listing_time += elapsed
+            return
+
+        self.listing_count += 1
+        self.listing_time += elapsed
+
+        if len(self.slowest_listings) < self.top_n:
+            heapq.heappush(self.slowest_listings, (elapsed, MLS_num))
+        elif elapsed > self.slowest_listings[0][0]:
+            heapq.heapreplace(self.slowest_listings, (elapsed, MLS_num))
+
+    def get_stage_metrics(self):
+        """
+        Return the wall time, CPU time and peak memory of each stage
+
+        Returns
+        -------
+        Dict
+            Metrics of each stage, in running order.
+
+        """
+        return self.stages
+
+    def get_slowest_listings(self):
+        """
+        Return the slowest rentals to extract, slowest first
+
+        Returns
+        -------
+        List
+            Tuples of MLS number and extraction time in seconds.
+
+        """
+        return [(MLS_num, elapsed) for elapsed, MLS_num
+                in sorted(self.slowest_listings, reverse=True)]
+
+    def get_failed_listings(self):
+        """
+        Return the number of failed rentals and the time spent on them
+
+        Returns
+        -------
+        Tuple
+            Number of failed rentals and their extraction time in seconds.
+
+        """
+        return self.failed_listing_count, self.failed_listing_time
+
+    def get_metrics(self, scraping_status, settings=None):
+        """
+        Return all the metrics of the run, e.g. to be collected by a job runner
+
+        Parameters
+        ----------
+        scraping_status : Dict
+            MLS numbers of the succeeded and failed rentals.
+        settings : Dict, optional
+            Settings of the run, e.g. input and engine.
+            The default is None.
+
+        Returns
+        -------
+        Dict
+            Metrics of the run.
+
+        """
+
+        rental_count = (len(scraping_status['success'])
+                        + len(scraping_status['failure']))
+        wall_time = sum(metrics['wall_time'] for metrics in self.stages.values())
+
+        stages = {name: {**metrics,
+                         'listings_per_second': self._get_throughput(
+                             rental_count, metrics['wall_time'])}
+                  for name, metrics in self.stages.items()}
+
+        return {'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'settings': settings or {},
+                'success': len(scraping_status['success']),
+                'failure': len(scraping_status['failure']),
+                'wall_time': wall_time,
+                'cpu_time': sum(metrics['cpu_time']
+                                for metrics in self.stages.values()),
+                'listings_per_second': self._get_throughput(rental_count,
+                                                            wall_time),
+                'peak_rss_mb': get_peak_rss(),
+                'stages': stages,
+                'extraction': {
+                    'timed_listings': self.listing_count,
+                    'total_time': self.listing_time,
+                    'mean_time': (self.listing_time / self.listing_count
+                                  if self.listing_count else None),
+                    'failed_listings': self.failed_listing_count,
+                    'failed_time': self.failed_listing_time,
+                    'slowest': [{'MLS#': MLS_num, 'time': elapsed}
+                                for MLS_num, elapsed
+                                in self.get_slowest_listings()]}}
+
+    def _get_throughput(self, rental_count, wall_time):
+        """
+        Return the number of rentals per second
+
+        Parameters
+        ----------
+        rental_count : Int
+            Number of rentals.
+        wall_time : Float
+            Wall time in seconds.
+
+        Returns
+        -------
+        Float or None
+            Rentals per second, None if no time was measured.
+
+        """
+        return rental_count / wall_time if wall_time else None
+
+    def output_metrics(self, file_path, scraping_status, settings=None):
+        """
+        Save the metrics of the run as json
+
+        Parameters
+        ----------
+        file_path : Str
+            Path of the json file.
+        scraping_status : Dict
+            MLS numbers of the succeeded and failed rentals.
+        settings : Dict, optional
+            Settings of the run, e.g. input and engine.
+            The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        with open(file_path, 'w') as fp:
+            json.dump(self.get_metrics(scraping_status, settings), fp, indent=2)
+
+    def output_profile(self, file_path):
+        """
+        Save the cProfile statistics of the stages, to be read with pstats
+
+        Parameters
+        ----------
+        file_path : Str
+            Path of the statistics file.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.cprofile.dump_stats(file_path)
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""
+Name: conftest
+Description: Shared fixtures of the tests, the modules are imported from src
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, 'src')
+SAMPLE_INPUT = os.path.join(ROOT_DIR, 'sample', 'input', 'Dummy_MLS_Website.html')
+SAMPLE_OUTPUT = os.path.join(ROOT_DIR, 'sample', 'output')
+
+sys.path.insert(0, SRC_DIR)
+
+
+@pytest.fixture(scope='session')
+def sample_input():
+    return SAMPLE_INPUT
+
+
+@pytest.fixture(scope='session')
+def sample_output():
+    return SAMPLE_OUTPUT
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Name: test_arrow_writer
+Description: Parquet and Arrow IPC outputs read back equal to the csv output
+"""
+
+import datetime
+import os
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+from MLS_arrow_writer import (ROOM_FILE_NAME, ROOM_TYPES, UNIT_ATTRS_FILE_NAME,
+                              UNIT_ATTRS_TYPES)
+from MLS_scraper_module import MLS_Scraper_Module
+
+TABLES = [(UNIT_ATTRS_FILE_NAME, 'MLS_unit_attrs_df.csv', UNIT_ATTRS_TYPES),
+          (ROOM_FILE_NAME, 'MLS_room_df.csv', ROOM_TYPES)]
+
+# pandas dtype of each declared type once read back
+DTYPES = {'int': 'Int64', 'float': 'Float64', 'date': 'object',
+          'category': 'category'}
+
+
+def read_table(file_path, file_format):
+    if file_format == 'parquet':
+        return pq.read_table(file_path).to_pandas()
+    with pa.memory_map(file_path) as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def convert(value, column_type):
+    """Convert a csv string the way its declared type reads it"""
+    if value == '':
+        return None
+    if column_type == 'int':
+        return sum(int(term) for term in value.split('+'))
+    if column_type == 'float':
+        return float(value)
+    if column_type == 'date':
+        return datetime.datetime.strptime(value, '%m/%d/%Y').date()
+    return value
+
+
+@pytest.fixture(scope='module')
+def output_dir(tmp_path_factory, sample_input):
+    directory = str(tmp_path_factory.mktemp('output'))
+    scraper = MLS_Scraper_Module()
+    scraper.read_html(sample_input)
+    scraper.get_all_rental()
+    scraper.output_rental_information(directory, as_df=True)
+    for file_format in ['parquet', 'arrow']:
+        scraper.output_rental_information(directory, file_format=file_format)
+    return directory
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'arrow'])
+@pytest.mark.parametrize('file_name, csv_name, column_types', TABLES)
+def test_round_trip_equals_csv(output_dir, file_format, file_name, csv_name,
+                               column_types):
+    csv_df = pd.read_csv(os.path.join(output_dir, csv_name), index_col=0,
+                         dtype=str, keep_default_na=False)
+    df = read_table(os.path.join(output_dir, f'{file_name}.{file_format}'),
+                    file_format)
+
+    assert list(df.columns) == list(csv_df.columns)
+    assert list(df.index) == list(csv_df.index)
+
+    for column in csv_df.columns:
+        column_type = column_types.get(column)
+        values = [None if pd.isna(value) else value for value in df[column]]
+
+        if column_type is None:
+            assert pd.api.types.is_string_dtype(df[column])
+            assert [value or '' for value in values] == list(csv_df[column])
+        else:
+            assert str(df[column].dtype) == DTYPES[column_type]
+            if column_type == 'category':
+                values = [value or None for value in values]
+            assert values == [convert(value, column_type)
+                              for value in csv_df[column]]
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Name: test_derived_metrics
+Description: Vectorized derived metrics of the sample agree with the metrics worked out rental by rental
+"""
+
+import math
+import os
+import re
+
+import pytest
+
+pytest.importorskip('pandas')
+
+from MLS_derived_metrics import (DERIVED_METRICS, DERIVED_METRICS_FILE_NAME,
+                                 BEDROOM_PATTERN)
+from MLS_scraper_module import MLS_Scraper_Module
+
+
+@pytest.fixture(scope='module')
+def scraper(sample_input):
+    scraper = MLS_Scraper_Module()
+    scraper.read_html(sample_input)
+    scraper.get_all_rental()
+    return scraper
+
+
+def _number(value):
+    try:
+        return float(value.replace('$', '').replace(',', ''))
+    except (AttributeError, ValueError):
+        return math.nan
+
+
+def _count(value):
+    try:
+        return sum(int(part) for part in value.split('+'))
+    except (AttributeError, ValueError):
+        return math.nan
+
+
+def _sqft(value):
+    bounds = [_number(bound) for bound in (value or '').split('-')]
+    if len(bounds) == 2:
+        return sum(bounds) / 2
+    return math.nan
+
+
+def _divide(numerator, denominator):
+    if denominator > 0:
+        return numerator / denominator
+    return math.nan
+
+
+def _expected_metrics(attribute_dict, room_table):
+    # The metrics of a single rental, from its scraped strings
+    areas = []
+    bedroom_areas = []
+    for room_attrs in room_table.values():
+        area = _number(room_attrs.get('Length')) * _number(room_attrs.get('Width'))
+        if math.isnan(area):
+            continue
+        areas.append(area)
+        if re.search(BEDROOM_PATTERN, room_attrs.get('Room', '')):
+            bedroom_areas.append(area)
+
+    total_area = sum(areas) if areas else math.nan
+    price = _number(attribute_dict.get('List'))
+    return {'Total Room Area': total_area,
+            'Measured Rooms': len(areas),
+            'Largest Bedroom Area': max(bedroom_areas, default=math.nan),
+            'Area per Room': _divide(total_area, len(areas)),
+            'Price per Sqft': _divide(price, _sqft(attribute_dict.get('Apx Sqft'))),
+            'Price per Bedroom': _divide(price,
+                                         _count(attribute_dict.get('Bedrooms')))}
+
+
+def test_metrics_of_sample(scraper):
+    MLS_dict = scraper.get_MLS_dict()
+    metrics_df = scraper.get_derived_metrics()
+
+    assert list(metrics_df.columns) == DERIVED_METRICS
+    assert list(metrics_df.index) == list(MLS_dict['MLS_unit_attrs_dict'])
+
+    for MLS_num, attribute_dict in MLS_dict['MLS_unit_attrs_dict'].items():
+        expected = _expected_metrics(attribute_dict,
+                                     MLS_dict['MLS_room_dict'][MLS_num])
+        metrics = metrics_df.loc[MLS_num]
+        for metric, value in expected.items():
+            if math.isnan(value):
+                assert math.isnan(metrics[metric]), (MLS_num, metric)
+            else:
+                assert metrics[metric] == pytest.approx(value), (MLS_num, metric)
+
+    # The sample has rentals with measured rooms and bedrooms
+    assert metrics_df['Area per Room'].notna().any()
+    assert metrics_df['Largest Bedroom Area'].notna().any()
+
+
+@pytest.mark.parametrize('file_format, file_name', [
+    ('csv', DERIVED_METRICS_FILE_NAME + '_df.csv'),
+    ('json', DERIVED_METRICS_FILE_NAME + '_dict.json')])
+def test_output_derived_metrics(scraper, file_format, file_name, tmp_path):
+    scraper.output_derived_metrics(str(tmp_path), file_format)
+    assert os.listdir(tmp_path) == [file_name]
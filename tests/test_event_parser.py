@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Name: test_event_parser
+Description: The soup and event engines reproduce the sample output
+"""
+
+import filecmp
+import os
+
+import pytest
+
+from MLS_scraper_module import MLS_Scraper_Module
+
+OUTPUT_FILES = {True: ['MLS_unit_attrs_df.csv', 'MLS_room_df.csv'],
+                False: ['MLS_unit_attrs_dict.json', 'MLS_room_dict.json']}
+
+
+@pytest.mark.parametrize('engine', ['soup', 'event'])
+@pytest.mark.parametrize('as_df', [True, False])
+def test_engine_matches_sample_output(engine, as_df, sample_input,
+                                      sample_output, tmp_path):
+    scraper = MLS_Scraper_Module(engine=engine)
+    scraper.read_html(sample_input)
+    scraper.get_all_rental()
+    scraper.output_rental_information(str(tmp_path), as_df)
+
+    for file_name in OUTPUT_FILES[as_df]:
+        assert filecmp.cmp(os.path.join(sample_output, file_name),
+                           os.path.join(tmp_path, file_name), shallow=False)
+
+
+def test_engines_agree_on_status(sample_input):
+    status = {}
+    for engine in ['soup', 'event']:
+        scraper = MLS_Scraper_Module(engine=engine)
+        scraper.read_html(sample_input)
+        scraper.get_all_rental()
+        status[engine] = scraper.get_rental_scraping_status()
+
+    assert status['soup'] == status['event']
+    assert len(status['event']['success']) == 7
+    assert len(status['event']['failure']) == 6
+
+
+def test_nested_value_span(sample_input, tmp_path):
+    # The value of a label holds a span of class value with the same text
+    with open(sample_input, encoding='utf-8') as fp:
+        html = fp.read()
+    html = html.replace('<label>For:</label><span class="value">Lease</span>',
+                        '<label>For:</label><div><span class="value">Lease'
+                        '</span> (restricted)</div>')
+    html_path = tmp_path / 'nested.html'
+    html_path.write_text(html, encoding='utf-8')
+
+    MLS_dict = {}
+    for engine in ['soup', 'event']:
+        scraper = MLS_Scraper_Module(engine=engine)
+        scraper.read_html(str(html_path))
+        scraper.get_all_rental()
+        MLS_dict[engine] = scraper.get_MLS_dict()
+
+    assert MLS_dict['event'] == MLS_dict['soup']
+    assert {attribute_dict['For'] for attribute_dict
+            in MLS_dict['event']['MLS_unit_attrs_dict'].values()} == {
+                'Lease (restricted)'}
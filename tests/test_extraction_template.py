@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Name: test_extraction_template
+Description: Templates read the rentals as the generic path and are learned again if they fail
+"""
+
+import filecmp
+import os
+
+import pytest
+
+from MLS_extraction_template import (MLS_Extraction_Template, LEARN_ATTEMPTS,
+                                     get_status_type)
+from MLS_report_generator import MLS_Report_Generator
+from MLS_scraper_module import MLS_Scraper_Module
+
+OUTPUT_FILES = ['MLS_unit_attrs_df.csv', 'MLS_room_df.csv']
+
+
+@pytest.fixture
+def scraper(sample_input):
+    scraper = MLS_Scraper_Module(template=True)
+    scraper.read_html(sample_input)
+    return scraper
+
+
+def _extract_all(scraper):
+    extractor = scraper.template_extractor
+    for MLS_info_section in scraper.MLS_info:
+        try:
+            extractor.extract(MLS_info_section, scraper.get_rental_information)
+        except (AttributeError, IndexError):
+            # Rentals the generic path cannot read
+            pass
+    return extractor
+
+
+def test_template_matches_sample_output(scraper, sample_output, tmp_path):
+    scraper.get_all_rental()
+    scraper.output_rental_information(str(tmp_path), as_df=True)
+
+    for file_name in OUTPUT_FILES:
+        assert filecmp.cmp(os.path.join(sample_output, file_name),
+                           os.path.join(tmp_path, file_name), shallow=False)
+
+
+def _ordered(MLS_dict):
+    # Dictionaries compare equal whatever the order of their keys
+    return {MLS_num: [(room_index, list(room_attrs.items()))
+                      for room_index, room_attrs in room_table.items()]
+            for MLS_num, room_table in MLS_dict['MLS_room_dict'].items()}, {
+        MLS_num: list(attribute_dict.items())
+        for MLS_num, attribute_dict in MLS_dict['MLS_unit_attrs_dict'].items()}
+
+
+def test_template_reads_generated_report(tmp_path):
+    # Rentals of the generated report share the layout of the sample, so
+    # most of them are read by a template, unlike the sample
+    html_path = str(tmp_path / 'report.html')
+    MLS_Report_Generator(seed=1).write_report(html_path, 40, empty_rate=0.1)
+
+    MLS_dict = {}
+    for template in [False, True]:
+        scraper = MLS_Scraper_Module(template=template)
+        scraper.read_html(html_path)
+        scraper.get_all_rental()
+        MLS_dict[template] = scraper.get_MLS_dict()
+
+    assert scraper.get_template_status()['hit'] > 30
+    assert _ordered(MLS_dict[True]) == _ordered(MLS_dict[False])
+
+
+def test_template_learned_again_after_failure(scraper, monkeypatch):
+    learn = MLS_Extraction_Template.learn.__func__
+    calls = []
+
+    def fail_first(cls, *args):
+        calls.append(args[0])
+        if len(calls) == 1:
+            raise IndexError('list index out of range')
+        return learn(cls, *args)
+
+    monkeypatch.setattr(MLS_Extraction_Template, 'learn',
+                        classmethod(fail_first))
+    extractor = _extract_all(scraper)
+
+    assert len(calls) == 2
+    assert get_status_type(calls[1]) in extractor.templates
+    assert None not in extractor.templates.values()
+
+
+def test_learn_attempts_are_bounded(scraper, monkeypatch):
+    calls = []
+
+    def always_fail(cls, *args):
+        calls.append(args[0])
+        raise IndexError('list index out of range')
+
+    monkeypatch.setattr(MLS_Extraction_Template, 'learn',
+                        classmethod(always_fail))
+    extractor = _extract_all(scraper)
+
+    assert extractor.templates == {}
+    status_types = {get_status_type(section) for section in calls}
+    for status_type in status_types:
+        assert extractor.learn_attempts[status_type] <= LEARN_ATTEMPTS
+    assert len(calls) == sum(extractor.learn_attempts.values())
+    assert max(extractor.learn_attempts.values()) == LEARN_ATTEMPTS
+
+
+def test_template_reading_another_order_is_dropped(scraper, monkeypatch):
+    apply = MLS_Extraction_Template.apply
+
+    def reverse_rooms(self, MLS_info_section):
+        attribute_dict, room_table = apply(self, MLS_info_section)
+        return attribute_dict, {room_index: dict(reversed(room_attrs.items()))
+                                for room_index, room_attrs in room_table.items()}
+
+    monkeypatch.setattr(MLS_Extraction_Template, 'apply', reverse_rooms)
+    extractor = _extract_all(scraper)
+
+    assert extractor.templates == {}
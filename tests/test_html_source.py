@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Name: test_html_source
+Description: Compressed and bundled inputs are told apart by their first bytes and decoded by their charset
+"""
+
+import codecs
+import gzip
+import zipfile
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import pytest
+
+from MLS_html_source import MLS_HTML_Source, sniff_charset
+from MLS_scraper_module import MLS_Scraper_Module
+
+HTML = ('<html><head><meta charset="{charset}"></head>'
+        '<body><p>Café à Montréal</p></body></html>')
+
+
+@pytest.mark.parametrize('head, charset', [
+    (codecs.BOM_UTF8 + b'<html>', 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE + '<html>'.encode('utf-16-le'), 'utf-16'),
+    (b'<meta charset="windows-1252">', 'cp1252'),
+    (b"<meta http-equiv='Content-Type' content='text/html; charset=ISO-8859-1'>",
+     'iso8859-1'),
+    (b'<meta charset="utf-16">', 'utf-8'),
+    (b'<meta charset="no-such-charset">', None),
+    (b'<html><body>', None)])
+def test_sniff_charset(head, charset):
+    assert sniff_charset(head) == charset
+
+
+def _write_gzip(path, html_bytes):
+    with gzip.open(path, 'wb') as fp:
+        fp.write(html_bytes)
+
+
+def _write_zip(path, html_bytes):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('files/', '')
+        archive.writestr('files/readme.txt', 'Not the report')
+        archive.writestr('files/Report.HTML', html_bytes)
+
+
+def _write_mhtml(path, html_bytes, charset):
+    message = MIMEMultipart('related')
+    message.attach(MIMEText(html_bytes.decode(charset), 'html', charset))
+    with open(path, 'wb') as fp:
+        fp.write(message.as_bytes())
+
+
+def _write_input(path, input_format, html_bytes, charset):
+    if input_format == 'gzip':
+        _write_gzip(path, html_bytes)
+    elif input_format == 'zip':
+        _write_zip(path, html_bytes)
+    elif input_format == 'mhtml':
+        _write_mhtml(path, html_bytes, charset)
+    else:
+        with open(path, 'wb') as fp:
+            fp.write(html_bytes)
+
+
+@pytest.mark.parametrize('input_format', ['html', 'gzip', 'zip', 'mhtml'])
+@pytest.mark.parametrize('charset', ['utf-8', 'cp1252'])
+def test_input_decoded_by_charset(input_format, charset, tmp_path):
+    html = HTML.format(charset=charset)
+    html_path = str(tmp_path / 'report.bin')
+    _write_input(html_path, input_format, html.encode(charset), charset)
+
+    source = MLS_HTML_Source(html_path)
+    with source.open() as fp:
+        assert fp.read() == html
+    assert source.input_format == input_format
+    assert source.charset == codecs.lookup(charset).name
+
+
+@pytest.mark.parametrize('input_format', ['gzip', 'zip', 'mhtml'])
+def test_sample_scraped_from_bundle(input_format, sample_input, tmp_path):
+    with open(sample_input, 'rb') as fp:
+        html_bytes = fp.read()
+    html_path = str(tmp_path / 'report.bin')
+    _write_input(html_path, input_format, html_bytes, 'utf-8')
+
+    MLS_dict = {}
+    for path in [sample_input, html_path]:
+        scraper = MLS_Scraper_Module()
+        scraper.read_html(path)
+        scraper.get_all_rental()
+        MLS_dict[path] = scraper.get_MLS_dict()
+
+    assert MLS_dict[html_path] == MLS_dict[sample_input]
+
+
+def test_zip_without_html(tmp_path):
+    html_path = str(tmp_path / 'report.zip')
+    with zipfile.ZipFile(html_path, 'w') as archive:
+        archive.writestr('readme.txt', 'Not the report')
+
+    with pytest.raises(ValueError):
+        MLS_HTML_Source(html_path).open()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Name: test_http_service
+Description: The HTTP service extracts a posted html as the scraper does, and rejects bad requests
+"""
+
+import asyncio
+import json
+import os
+
+import pytest
+
+from MLS_http_service import MLS_HTTP_Service, EXTRACT_PATH, HEALTH_PATH
+
+
+async def _request(port, method, path, content_length=None, body=b''):
+    # The body of a rejected request is not read by the service, so it is
+    # only sent with the requests to be extracted
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    head = f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n'
+    if content_length is not None:
+        head += 'Content-Type: text/html\r\n'
+        head += f'Content-Length: {content_length}\r\n'
+    writer.write(head.encode('latin-1') + b'\r\n' + body)
+    await writer.drain()
+
+    response = await reader.read()
+    writer.close()
+
+    status_line, _, rest = response.partition(b'\r\n')
+    return int(status_line.split()[1]), json.loads(rest.split(b'\r\n\r\n', 1)[1])
+
+
+def _serve(requests, **options):
+    # Start the service on a free port, send the requests and stop it
+
+    async def scenario():
+        service = MLS_HTTP_Service(port=0, workers=1, **options)
+        await service.start()
+        try:
+            return [await _request(service.port, *request)
+                    for request in requests]
+        finally:
+            await service.stop()
+
+    return asyncio.run(scenario())
+
+
+@pytest.fixture(scope='module')
+def html(sample_input):
+    with open(sample_input, 'rb') as fp:
+        return fp.read()
+
+
+def test_extract_matches_sample_output(html, sample_output):
+    (status, result), = _serve([('POST', EXTRACT_PATH, len(html), html)])
+
+    assert status == 200
+    for file_name in ['MLS_unit_attrs_dict', 'MLS_room_dict']:
+        with open(os.path.join(sample_output, file_name + '.json')) as fp:
+            assert result[file_name] == json.load(fp)
+    assert len(result['success']) == 7
+    assert len(result['failure']) == 6
+
+
+def test_bad_requests_are_rejected(html):
+    responses = _serve([('GET', HEALTH_PATH),
+                        ('GET', EXTRACT_PATH),
+                        ('POST', '/other', len(html)),
+                        ('POST', EXTRACT_PATH),
+                        ('POST', EXTRACT_PATH, len(html))],
+                       max_body_size=len(html) - 1)
+
+    assert [status for status, _ in responses] == [200, 405, 404, 411, 413]
+    assert responses[0][1]['status'] == 'ok'
+    for status, result in responses[1:]:
+        assert 'error' in result
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Name: test_jsonl_writer
+Description: Rentals streamed to json lines are on disk once flushed, before the file is closed
+"""
+
+import json
+
+import pytest
+
+from MLS_jsonl_writer import MLS_JSONL_Writer
+from MLS_scraper_module import MLS_Scraper_Module
+
+
+@pytest.fixture(scope='module')
+def rentals(sample_input):
+    scraper = MLS_Scraper_Module()
+    scraper.read_html(sample_input)
+    scraper.get_all_rental()
+    MLS_dict = scraper.get_MLS_dict()
+    return [(MLS_num, attribute_dict, MLS_dict['MLS_room_dict'][MLS_num])
+            for MLS_num, attribute_dict in MLS_dict['MLS_unit_attrs_dict'].items()]
+
+
+def _read_lines(file_path):
+    # Read by another file object, as after the program stopped
+    with open(file_path, encoding='utf-8') as fp:
+        return [json.loads(line) for line in fp]
+
+
+def _as_line(MLS_num, attribute_dict, room_table):
+    return {'MLS#': MLS_num, 'unit': attribute_dict, 'rooms': room_table}
+
+
+def test_lines_on_disk_before_close(rentals, tmp_path):
+    file_path = str(tmp_path / 'rentals.jsonl')
+    writer = MLS_JSONL_Writer(file_path, flush_every=3)
+    try:
+        for rental in rentals:
+            writer.write_rental(*rental)
+
+        # Whole batches are written as they fill up
+        flushed = len(rentals) // 3 * 3
+        assert _read_lines(file_path) == [_as_line(*rental)
+                                          for rental in rentals[:flushed]]
+
+        writer.flush()
+        assert _read_lines(file_path) == [_as_line(*rental)
+                                          for rental in rentals]
+    finally:
+        writer.close()
+
+    assert writer.get_rental_count() == len(rentals)
+
+
+def test_append_keeps_previous_lines(rentals, tmp_path):
+    file_path = str(tmp_path / 'rentals.jsonl')
+    for append in [False, True]:
+        writer = MLS_JSONL_Writer(file_path, append=append)
+        writer.write_rental(*rentals[0])
+        writer.close()
+
+    assert _read_lines(file_path) == [_as_line(*rentals[0])] * 2
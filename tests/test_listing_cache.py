@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Name: test_listing_cache
+Description: Cached rentals are looked up by their raw html and not parsed again
+"""
+
+import filecmp
+import os
+
+import pytest
+
+from MLS_scraper_module import MLS_Scraper_Module
+
+OUTPUT_FILES = ['MLS_unit_attrs_df.csv', 'MLS_room_df.csv']
+
+
+def _scrape(sample_input, cache_dir, engine):
+    scraper = MLS_Scraper_Module(engine=engine, cache_dir=cache_dir)
+    scraper.read_html(sample_input)
+    scraper.get_all_rental()
+    return scraper
+
+
+def test_no_cache_by_default(sample_input):
+    scraper = MLS_Scraper_Module(engine='event')
+    assert scraper.cache is None
+
+
+@pytest.mark.parametrize('engine', ['soup', 'event'])
+def test_cached_rentals_match_sample_output(engine, sample_input,
+                                            sample_output, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    first = _scrape(sample_input, cache_dir, engine)
+    first.close_cache()
+    assert first.get_cache_status()['hit'] == 0
+
+    second = _scrape(sample_input, cache_dir, engine)
+    second.output_rental_information(str(tmp_path), as_df=True)
+    second.close_cache()
+
+    # Only succeeded rentals are cached
+    assert second.get_cache_status()['hit'] == 7
+    assert (second.get_rental_scraping_status()
+            == first.get_rental_scraping_status())
+    for file_name in OUTPUT_FILES:
+        assert filecmp.cmp(os.path.join(sample_output, file_name),
+                           os.path.join(tmp_path, file_name), shallow=False)
+
+
+def test_event_engine_does_not_parse_cached_rentals(sample_input, tmp_path,
+                                                    monkeypatch):
+    cache_dir = str(tmp_path / 'cache')
+    _scrape(sample_input, cache_dir, 'event').close_cache()
+
+    parsed = []
+    parse_fragment = MLS_Scraper_Module._parse_listing_fragment
+
+    def counting_parse(self, fragment):
+        parsed.append(fragment)
+        return parse_fragment(self, fragment)
+
+    monkeypatch.setattr(MLS_Scraper_Module, '_parse_listing_fragment',
+                        counting_parse)
+    scraper = _scrape(sample_input, cache_dir, 'event')
+    scraper.close_cache()
+
+    assert len(parsed) == len(scraper.get_rental_scraping_status()['failure'])
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Name: test_listing_index
+Description: Single rentals looked up by the index match the full scrape
+"""
+
+import os
+import shutil
+
+import pytest
+
+import MLS_listing_index
+from MLS_listing_index import INDEX_FILE_SUFFIX
+from MLS_scraper_module import MLS_Scraper_Module
+
+
+@pytest.fixture
+def html_path(sample_input, tmp_path):
+    path = str(tmp_path / os.path.basename(sample_input))
+    shutil.copyfile(sample_input, path)
+    return path
+
+
+@pytest.fixture(scope='module')
+def MLS_dict(sample_input):
+    scraper = MLS_Scraper_Module()
+    scraper.read_html(sample_input)
+    scraper.get_all_rental()
+    return scraper.get_MLS_dict()
+
+
+def _assert_listings_match(html_path, MLS_dict):
+    scraper = MLS_Scraper_Module()
+    for MLS_num, attribute_dict in MLS_dict['MLS_unit_attrs_dict'].items():
+        rental = scraper.get_listing(html_path, MLS_num)
+        assert rental == (attribute_dict, MLS_dict['MLS_room_dict'][MLS_num])
+
+    assert scraper.get_listing(html_path, 'C0000000') is None
+
+
+def test_listing_matches_full_scrape(html_path, MLS_dict):
+    _assert_listings_match(html_path, MLS_dict)
+    assert os.path.exists(html_path + INDEX_FILE_SUFFIX)
+
+
+def test_index_kept_in_memory_if_it_cannot_be_saved(html_path, MLS_dict,
+                                                    monkeypatch):
+    def read_only(source, destination):
+        raise PermissionError(13, 'Permission denied', destination)
+
+    monkeypatch.setattr(MLS_listing_index.os, 'replace', read_only)
+    _assert_listings_match(html_path, MLS_dict)
+
+    assert not os.path.exists(html_path + INDEX_FILE_SUFFIX)
+    assert not os.path.exists(html_path + INDEX_FILE_SUFFIX + '.tmp')
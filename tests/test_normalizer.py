@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Name: test_normalizer
+Description: Normalization rules of the scraped strings, and of the sample output
+"""
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+from MLS_normalizer import MLS_Normalizer, UNIT_ATTRS_RULES, ROOM_RULES
+from MLS_scraper_module import MLS_Scraper_Module
+
+
+@pytest.fixture
+def normalizer():
+    return MLS_Normalizer()
+
+
+def _convert(normalizer, values, rule):
+    return normalizer.convert_column(pd.Series(values, dtype='object'), rule)
+
+
+def test_price(normalizer):
+    converted = _convert(normalizer, ['$2,500', ' $1,999.50 ', 'N/A', None],
+                         'price')
+    assert converted.tolist()[:2] == [2500.0, 1999.5]
+    assert converted.isna().tolist() == [False, False, True, True]
+
+
+def test_count(normalizer):
+    converted = _convert(normalizer, ['5', '3 + 1', 'many', None], 'count')
+    assert str(converted.dtype) == 'Int64'
+    assert converted.tolist()[:2] == [5, 4]
+    assert converted.isna().tolist() == [False, False, True, True]
+
+
+def test_date_and_boolean(normalizer):
+    dates = _convert(normalizer, ['10/17/2026', '17/10/2026'], 'date')
+    assert dates[0] == pd.Timestamp(2026, 10, 17)
+    assert pd.isna(dates[1])
+
+    flags = _convert(normalizer, ['Y', 'No', ' N ', 'Maybe'], 'boolean')
+    assert flags.tolist()[:3] == [True, False, False]
+    assert pd.isna(flags[3])
+
+
+def test_range_and_type_count(normalizer):
+    bounds = _convert(normalizer, ['700-799', '3000+', '<500', 'big'], 'range')
+    assert bounds['Low'].tolist()[:2] == [700, 3000]
+    assert bounds['High'].tolist()[0] == 799
+    assert pd.isna(bounds['High'][1])
+    assert pd.isna(bounds['Low'][2]) and bounds['High'][2] == 500
+    assert bounds.loc[3].isna().all()
+
+    parts = _convert(normalizer, ['Undergrnd / 1.0', 'None'], 'type_count')
+    assert parts['Type'][0] == 'Undergrnd'
+    assert parts['Spcs'][0] == 1.0
+    assert parts.loc[1].isna().all()
+
+
+def test_unsupported_rule(normalizer):
+    with pytest.raises(ValueError):
+        _convert(normalizer, ['1'], 'color')
+
+
+def test_sample_output_failures_are_counted(sample_input):
+    scraper = MLS_Scraper_Module()
+    scraper.read_html(sample_input)
+    scraper.get_all_rental()
+    MLS_output = scraper.output_rental_information(as_df=True)
+
+    normalizer = MLS_Normalizer()
+    normalized = normalizer.normalize_output(MLS_output)
+
+    unit_attrs_df = normalized['MLS_unit_attrs_df']
+    assert list(unit_attrs_df.index) == list(MLS_output['MLS_unit_attrs_df'].index)
+    assert 'Apx Sqft Low' in unit_attrs_df.columns
+    assert 'Apx Sqft' not in unit_attrs_df.columns
+    assert str(unit_attrs_df['List'].dtype) == 'Float64'
+    assert unit_attrs_df['List'].notna().all()
+
+    failure_count = normalizer.get_failure_count()
+    rules = {**UNIT_ATTRS_RULES, **ROOM_RULES}
+    assert set(failure_count) <= set(rules)
+    assert failure_count['List'] == 0
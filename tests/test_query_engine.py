@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Name: test_query_engine
+Description: Queries answered by the indexes, before and after they are saved
+"""
+
+import json
+
+import pytest
+
+from MLS_query_engine import MLS_Query_Engine, parse_number
+from MLS_scraper_module import MLS_Scraper_Module
+
+SIGNATURE = [('MLS_unit_attrs_dict', 'json', 100, 1)]
+
+
+@pytest.fixture(scope='module')
+def MLS_dict(sample_input):
+    scraper = MLS_Scraper_Module()
+    scraper.read_html(sample_input)
+    scraper.get_all_rental()
+    return scraper.get_MLS_dict()
+
+
+@pytest.fixture(scope='module')
+def engine(MLS_dict):
+    engine = MLS_Query_Engine()
+    engine.build(MLS_dict, SIGNATURE)
+    return engine
+
+
+def test_query_matches_scan(engine, MLS_dict):
+    unit_attrs_dict = MLS_dict['MLS_unit_attrs_dict']
+    expected = [MLS_num for MLS_num, attribute_dict in unit_attrs_dict.items()
+                if parse_number(attribute_dict.get('List'), 'price') <= 3000]
+    expected.sort(key=lambda MLS_num: parse_number(
+        unit_attrs_dict[MLS_num].get('List'), 'price'))
+
+    assert engine.query(['List<=3000'], order_by='List') == expected
+
+
+def test_room_condition(engine, MLS_dict):
+    expected = [MLS_num for MLS_num, room_table
+                in MLS_dict['MLS_room_dict'].items()
+                if any(room.get('Room') == 'Den' for room in room_table.values())]
+
+    assert sorted(engine.query(room_conditions=['Room=Den'])) == sorted(expected)
+
+
+def test_saved_index_answers_the_same(engine, tmp_path):
+    index_path = str(tmp_path / 'index.json')
+    engine.save(index_path)
+
+    # The index is plain json
+    with open(index_path, encoding='utf-8') as fp:
+        assert json.load(fp)['MLS_numbers'] == engine.MLS_numbers
+
+    loaded = MLS_Query_Engine()
+    assert loaded.load(index_path, SIGNATURE)
+    for conditions, room_conditions in [(['List<=3000'], []),
+                                        (['City=Toronto'], ['Room=Den']),
+                                        ([], [])]:
+        assert (loaded.query(conditions, room_conditions, order_by='DOM')
+                == engine.query(conditions, room_conditions, order_by='DOM'))
+
+
+def test_stale_or_invalid_index_is_not_loaded(engine, tmp_path):
+    index_path = str(tmp_path / 'index.json')
+    engine.save(index_path)
+    assert not MLS_Query_Engine().load(index_path, [('other', 'json', 1, 1)])
+
+    with open(index_path, 'wb') as fp:
+        fp.write(b'\x80\x05not json')
+    assert not MLS_Query_Engine().load(index_path, SIGNATURE)
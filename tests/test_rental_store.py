@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Name: test_rental_store
+Description: Rentals kept as compact records read back as scraped, through read-only views
+"""
+
+import pytest
+
+from MLS_rental_store import MLS_Rental_Store
+from MLS_scraper_module import MLS_Scraper_Module
+
+
+@pytest.fixture(scope='module')
+def scraper(sample_input):
+    scraper = MLS_Scraper_Module()
+    scraper.read_html(sample_input)
+    scraper.get_all_rental()
+    return scraper
+
+
+def _as_dict(MLS_view):
+    # Views of the rentals built again as dictionaries, in their order
+    return {'MLS_unit_attrs_dict': {
+                MLS_num: dict(attribute_dict) for MLS_num, attribute_dict
+                in MLS_view['MLS_unit_attrs_dict'].items()},
+            'MLS_room_dict': {
+                MLS_num: {room_index: dict(room_attrs)
+                          for room_index, room_attrs in room_table.items()}
+                for MLS_num, room_table in MLS_view['MLS_room_dict'].items()}}
+
+
+def test_view_matches_copy(scraper):
+    MLS_dict = scraper.get_MLS_dict()
+    MLS_view = scraper.MLS_dict
+
+    assert _as_dict(MLS_view) == MLS_dict
+    for part in MLS_dict:
+        assert list(MLS_view[part]) == list(MLS_dict[part])
+        assert len(MLS_view[part]) == len(MLS_dict[part])
+        for MLS_num, value in MLS_dict[part].items():
+            assert list(MLS_view[part][MLS_num]) == list(value)
+
+
+def test_view_is_read_only(scraper):
+    MLS_view = scraper.MLS_dict
+    MLS_num = next(iter(MLS_view['MLS_unit_attrs_dict']))
+    room_table = MLS_view['MLS_room_dict'][MLS_num]
+    room_index = next(iter(room_table))
+
+    with pytest.raises(TypeError):
+        MLS_view['MLS_unit_attrs_dict'] = {}
+    with pytest.raises(TypeError):
+        MLS_view['MLS_unit_attrs_dict'][MLS_num] = {}
+    with pytest.raises(TypeError):
+        MLS_view['MLS_unit_attrs_dict'][MLS_num]['List'] = '$1'
+    with pytest.raises(TypeError):
+        room_table[room_index] = {}
+    with pytest.raises(TypeError):
+        room_table[room_index]['Level'] = 'Main'
+
+
+def test_copy_does_not_change_store(scraper):
+    MLS_dict = scraper.get_MLS_dict()
+    MLS_num = next(iter(MLS_dict['MLS_unit_attrs_dict']))
+    MLS_dict['MLS_unit_attrs_dict'][MLS_num]['List'] = '$1'
+    MLS_dict['MLS_room_dict'].clear()
+
+    assert scraper.get_MLS_dict() != MLS_dict
+    assert scraper.MLS_dict['MLS_unit_attrs_dict'][MLS_num]['List'] != '$1'
+
+
+def test_store_shares_repeated_values():
+    store = MLS_Rental_Store()
+    rooms = {'1': {'Room': 'Living', 'Level': 'Main'}}
+    store['C1'] = ({'City': 'Toronto', 'List': '$1'}, rooms)
+    store['C2'] = ({'City': ''.join(['Tor', 'onto']), 'List': '$2'}, rooms)
+    store['C1'] = ({'City': 'Toronto', 'List': '$3'}, {})
+
+    assert list(store) == ['C1', 'C2']
+    assert store['C1'] == ({'City': 'Toronto', 'List': '$3'}, {})
+    assert store['C2'][1] == rooms
+    first, second = (store[MLS_num][0]['City'] for MLS_num in store)
+    assert first is second
+
+    del store['C1']
+    assert 'C1' not in store and len(store) == 1
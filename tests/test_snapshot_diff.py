@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Name: test_snapshot_diff
+Description: Diff of a scrape against a previous output, which is diffed against again
+"""
+
+import filecmp
+import json
+import os
+import sys
+
+import pytest
+
+from MLS_scraper import MLS_Scraper, arguement_parsing
+from MLS_snapshot_diff import MLS_Snapshot_Diff
+
+OUTPUT_FILES = {'-t': ['MLS_unit_attrs_df.csv', 'MLS_room_df.csv'],
+                '-nt': ['MLS_unit_attrs_dict.json', 'MLS_room_dict.json']}
+
+
+def _scrape(monkeypatch, *argv):
+    monkeypatch.setattr(sys, 'argv', ['MLS_scraper', *argv])
+    scraper = MLS_Scraper(arguement_parsing())
+    scraper.read_html()
+    scraper.get_all_rental()
+    scraper.output_rental_information()
+
+
+def _read_diff(directory):
+    diff = {}
+    for status in ['added', 'changed', 'removed']:
+        file_path = os.path.join(directory, f'MLS_diff_{status}.json')
+        with open(file_path, encoding='utf-8') as fp:
+            diff[status] = json.load(fp)
+    return diff
+
+
+@pytest.fixture
+def previous(sample_output, tmp_path):
+    MLS_dict = MLS_Snapshot_Diff().load_snapshot(sample_output)
+    unit_attrs_dict = MLS_dict['MLS_unit_attrs_dict']
+    room_dict = MLS_dict['MLS_room_dict']
+    added, changed = list(unit_attrs_dict)[:2]
+
+    # The first rental is new, the second changed, and a rental removed
+    del unit_attrs_dict[added], room_dict[added]
+    unit_attrs_dict[changed] = {**unit_attrs_dict[changed], 'List': '$1'}
+    unit_attrs_dict['C0000001'] = {'List': '$1,234'}
+    room_dict['C0000001'] = {}
+
+    directory = tmp_path / 'previous'
+    directory.mkdir()
+    for file_name, output in MLS_dict.items():
+        with open(directory / (file_name + '.json'), 'w',
+                  encoding='utf-8') as fp:
+            json.dump(output, fp)
+    return str(directory), added, changed, MLS_dict
+
+
+@pytest.mark.parametrize('table_option', ['-t', '-nt'])
+def test_diff_is_diffed_against_again(previous, sample_input, sample_output,
+                                      table_option, monkeypatch, tmp_path):
+    previous_path, added, changed, previous_MLS_dict = previous
+    current_path = str(tmp_path / 'current')
+    os.mkdir(current_path)
+
+    _scrape(monkeypatch, table_option, sample_input, current_path,
+            '--diff-against', previous_path)
+
+    # The full output is saved with the diff
+    for file_name in OUTPUT_FILES[table_option]:
+        assert filecmp.cmp(os.path.join(sample_output, file_name),
+                           os.path.join(current_path, file_name), shallow=False)
+
+    if table_option == '-nt':
+        current_MLS_dict = MLS_Snapshot_Diff().load_snapshot(current_path)
+        diff = _read_diff(current_path)
+        assert list(diff['added']) == [added]
+        assert list(diff['changed']) == [changed]
+        assert diff['changed'][changed] == [{
+            'Table': 'unit', 'Room Index': '', 'Field': 'List',
+            'Previous': '$1',
+            'Current': current_MLS_dict['MLS_unit_attrs_dict'][changed]['List']}]
+        assert diff['removed'] == ['C0000001']
+
+    # The output of the diff is itself a snapshot to diff against
+    next_path = str(tmp_path / 'next')
+    os.mkdir(next_path)
+    _scrape(monkeypatch, table_option, sample_input, next_path,
+            '--diff-against', current_path)
+
+    assert os.path.exists(os.path.join(next_path, OUTPUT_FILES[table_option][0]))
+    if table_option == '-nt':
+        assert _read_diff(next_path) == {'added': {}, 'changed': {},
+                                         'removed': []}
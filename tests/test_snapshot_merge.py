@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Name: test_snapshot_merge
+Description: The merge keeps the latest record of each MLS#, over several passes
+"""
+
+import json
+import os
+
+import pytest
+
+from MLS_snapshot_diff import MLS_Snapshot_Diff
+from MLS_snapshot_merge import MLS_Snapshot_Merge
+
+
+@pytest.fixture(scope='module')
+def MLS_dict(sample_output):
+    return MLS_Snapshot_Diff().load_snapshot(sample_output)
+
+
+def _save_snapshot(directory, unit_attrs_dict, room_dict):
+    os.makedirs(directory)
+    for file_name, output in [('MLS_unit_attrs_dict', unit_attrs_dict),
+                              ('MLS_room_dict', room_dict)]:
+        with open(os.path.join(directory, file_name + '.json'), 'w') as fp:
+            json.dump(output, fp)
+    return directory
+
+
+@pytest.fixture
+def snapshots(MLS_dict, tmp_path):
+    unit_attrs_dict = MLS_dict['MLS_unit_attrs_dict']
+    room_dict = MLS_dict['MLS_room_dict']
+    MLS_numbers = list(unit_attrs_dict)
+
+    # Newer snapshot: a renewed contract, an older contract repeated late,
+    # and a new rental
+    renewed, outdated = MLS_numbers[0], MLS_numbers[1]
+    newer_units = {
+        renewed: {**unit_attrs_dict[renewed], 'List': '$9,999',
+                  'Contract Date': '1/12/2100'},
+        outdated: {**unit_attrs_dict[outdated], 'List': '$1',
+                   'Contract Date': '1/01/2000'},
+        'C0000001': {'List': '$1,234', 'Contract Date': '1/01/2099'}}
+    newer_rooms = {renewed: {}, outdated: room_dict[outdated], 'C0000001': {}}
+
+    older = _save_snapshot(str(tmp_path / 'older'), unit_attrs_dict, room_dict)
+    newer = _save_snapshot(str(tmp_path / 'newer'), newer_units, newer_rooms)
+    return older, newer, newer_units, newer_rooms
+
+
+@pytest.mark.parametrize('fan_in, run_size', [(16, 20000), (2, 2)])
+def test_latest_contract_wins(MLS_dict, snapshots, fan_in, run_size):
+    older, newer, newer_units, newer_rooms = snapshots
+    merger = MLS_Snapshot_Merge(fan_in, run_size)
+    merged = list(merger.merge([older, newer]))
+
+    MLS_numbers = [MLS_num for MLS_num, _, _ in merged]
+    assert MLS_numbers == sorted(set(MLS_dict['MLS_unit_attrs_dict'])
+                                 | set(newer_units))
+
+    expected_units = {**MLS_dict['MLS_unit_attrs_dict']}
+    expected_rooms = {**MLS_dict['MLS_room_dict']}
+    for MLS_num, attribute_dict in newer_units.items():
+        # The older contract repeated in the newer snapshot loses
+        if attribute_dict['Contract Date'] != '1/01/2000':
+            expected_units[MLS_num] = attribute_dict
+            expected_rooms[MLS_num] = newer_rooms[MLS_num]
+
+    for MLS_num, attribute_dict, room_table in merged:
+        assert attribute_dict == expected_units[MLS_num]
+        assert room_table == expected_rooms[MLS_num]
+
+    assert merger.merge_status['rentals'] == len(merged)
+    if run_size == 2:
+        assert merger.merge_status['passes'] > 1
+
+
+def test_merged_output_reads_back(MLS_dict, snapshots, tmp_path):
+    older = snapshots[0]
+    output = str(tmp_path / 'merged')
+    os.makedirs(output)
+
+    merger = MLS_Snapshot_Merge()
+    merger.output_rental_information([older, older], output, 'json')
+
+    assert MLS_Snapshot_Diff().load_snapshot(output) == MLS_dict
+
+
+def test_unsupported_format(snapshots, tmp_path):
+    with pytest.raises(ValueError):
+        MLS_Snapshot_Merge().output_rental_information(snapshots[:1],
+                                                       str(tmp_path), 'xml')
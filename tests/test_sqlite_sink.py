@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Name: test_sqlite_sink
+Description: Rentals upserted into SQLite read back as scraped
+"""
+
+import sqlite3
+
+import pytest
+
+from MLS_scraper_module import MLS_Scraper_Module
+from MLS_sqlite_sink import (MLS_SQLite_Sink, MLS_COLUMN, ROOM_INDEX_COLUMN,
+                             DIGEST_COLUMN)
+
+
+@pytest.fixture(scope='module')
+def MLS_dict(sample_input):
+    scraper = MLS_Scraper_Module()
+    scraper.read_html(sample_input)
+    scraper.get_all_rental()
+    return scraper.get_MLS_dict()
+
+
+def _with_MLS_number(MLS_num, attribute_dict):
+    # The MLS# column holds the MLS number, also scraped as a label
+    return {**attribute_dict, MLS_COLUMN: MLS_num}
+
+
+def _iter_rentals(MLS_dict):
+    for MLS_num, attribute_dict in MLS_dict['MLS_unit_attrs_dict'].items():
+        yield MLS_num, attribute_dict, MLS_dict['MLS_room_dict'][MLS_num]
+
+
+def _write(database_path, rentals):
+    sink = MLS_SQLite_Sink(database_path)
+    try:
+        sink.write_rentals(rentals)
+    finally:
+        sink.close()
+    return sink.get_write_status()
+
+
+def _read_rows(database_path, table):
+    connection = sqlite3.connect(database_path)
+    connection.row_factory = sqlite3.Row
+    try:
+        return [{column: row[column] for column in row.keys()
+                 if row[column] is not None and column != 'List Price'}
+                for row in connection.execute(f'SELECT * FROM {table}')]
+    finally:
+        connection.close()
+
+
+def _read_MLS_dict(database_path):
+    unit_attrs_dict = {}
+    for row in _read_rows(database_path, 'units'):
+        row.pop(DIGEST_COLUMN)
+        unit_attrs_dict[row[MLS_COLUMN]] = row
+
+    room_dict = {MLS_num: {} for MLS_num in unit_attrs_dict}
+    for row in _read_rows(database_path, 'rooms'):
+        MLS_num = row.pop(MLS_COLUMN)
+        room_dict[MLS_num][row.pop(ROOM_INDEX_COLUMN)] = row
+
+    return {'MLS_unit_attrs_dict': unit_attrs_dict, 'MLS_room_dict': room_dict}
+
+
+def test_rentals_read_back(MLS_dict, tmp_path):
+    database_path = str(tmp_path / 'rentals.sqlite')
+    write_status = _write(database_path, _iter_rentals(MLS_dict))
+
+    assert write_status['units'] == len(MLS_dict['MLS_unit_attrs_dict'])
+    stored = _read_MLS_dict(database_path)
+    assert stored['MLS_unit_attrs_dict'] == {
+        MLS_num: _with_MLS_number(MLS_num, attribute_dict)
+        for MLS_num, attribute_dict in MLS_dict['MLS_unit_attrs_dict'].items()}
+    assert stored['MLS_room_dict'] == MLS_dict['MLS_room_dict']
+
+
+def test_unchanged_rentals_are_skipped(MLS_dict, tmp_path):
+    database_path = str(tmp_path / 'rentals.sqlite')
+    _write(database_path, _iter_rentals(MLS_dict))
+
+    write_status = _write(database_path, _iter_rentals(MLS_dict))
+    assert write_status == {'units': 0, 'rooms': 0,
+                            'unchanged': len(MLS_dict['MLS_unit_attrs_dict'])}
+
+
+def test_changed_rental_replaces_its_rooms(MLS_dict, tmp_path):
+    database_path = str(tmp_path / 'rentals.sqlite')
+    _write(database_path, _iter_rentals(MLS_dict))
+
+    MLS_num, attribute_dict, room_table = next(_iter_rentals(MLS_dict))
+    attribute_dict = {**attribute_dict, 'List': '$9,999'}
+    room_table = dict(list(room_table.items())[:1])
+    write_status = _write(database_path, [(MLS_num, attribute_dict, room_table)])
+
+    assert write_status['units'] == 1
+    stored = _read_MLS_dict(database_path)
+    assert (stored['MLS_unit_attrs_dict'][MLS_num]
+            == _with_MLS_number(MLS_num, attribute_dict))
+    assert stored['MLS_room_dict'][MLS_num] == room_table
+
+
+def test_failed_batch_is_dropped(MLS_dict, tmp_path):
+    database_path = str(tmp_path / 'rentals.sqlite')
+    rentals = list(_iter_rentals(MLS_dict))
+    MLS_num, attribute_dict, room_table = rentals[0]
+
+    sink = MLS_SQLite_Sink(database_path)
+    try:
+        # A room without MLS# fails the transaction adding a column
+        failed_dict = {**attribute_dict, 'Unbound': 'Y'}
+        with pytest.raises(sqlite3.IntegrityError):
+            sink.write_rentals([(MLS_num, failed_dict, room_table),
+                                (None, attribute_dict, {'1': {}})])
+
+        # The next batch is written, with the column and the rental failed
+        sink.write_rentals(rentals[1:] + [(MLS_num, failed_dict, room_table)])
+    finally:
+        sink.close()
+
+    assert sink.get_write_status()['units'] == len(rentals)
+    stored = _read_MLS_dict(database_path)
+    assert stored['MLS_unit_attrs_dict'][MLS_num]['Unbound'] == 'Y'
+    assert len(stored['MLS_unit_attrs_dict']) == len(rentals)
+
+
+def test_repeated_rental_in_batch(MLS_dict, tmp_path):
+    database_path = str(tmp_path / 'rentals.sqlite')
+    MLS_num, attribute_dict, room_table = next(_iter_rentals(MLS_dict))
+    write_status = _write(database_path, [
+        (MLS_num, {**attribute_dict, 'List': '$1'}, room_table),
+        (MLS_num, {**attribute_dict, 'List': '$2'}, room_table)])
+
+    assert write_status['units'] == 1
+    stored = _read_MLS_dict(database_path)
+    assert stored['MLS_unit_attrs_dict'][MLS_num]['List'] == '$2'
+    assert stored['MLS_room_dict'][MLS_num] == room_table
+
+
+def test_labels_differing_in_case(tmp_path):
+    database_path = str(tmp_path / 'rentals.sqlite')
+    _write(database_path, [('C1', {'List': '$1'}, {'1': {'Level': 'Main'}})])
+    _write(database_path, [('C2', {'list': '$2'}, {'1': {'level': '2nd'}})])
+
+    stored = _read_MLS_dict(database_path)
+    assert stored['MLS_unit_attrs_dict']['C2']['List'] == '$2'
+    assert stored['MLS_room_dict'] == {'C1': {'1': {'Level': 'Main'}},
+                                       'C2': {'1': {'Level': '2nd'}}}
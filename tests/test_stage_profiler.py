@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Name: test_stage_profiler
+Description: Only succeeded rentals are ranked among the slowest
+"""
+
+from MLS_scraper_module import MLS_Scraper_Module
+from MLS_stage_profiler import MLS_Stage_Profiler
+
+
+def test_failed_rentals_are_counted_apart():
+    profiler = MLS_Stage_Profiler(top_n=2)
+    profiler.record_listing('C1', 0.010)
+    profiler.record_listing('C2', 0.500, succeeded=False)
+    profiler.record_listing('C3', 0.030)
+    profiler.record_listing('C4', 0.020)
+
+    assert profiler.get_slowest_listings() == [('C3', 0.030), ('C4', 0.020)]
+    assert profiler.get_failed_listings() == (1, 0.500)
+
+    extraction = profiler.get_metrics({'success': ['C1', 'C3', 'C4'],
+                                       'failure': ['C2']})['extraction']
+    assert extraction['timed_listings'] == 3
+    assert extraction['failed_listings'] == 1
+
+
+def test_scraper_records_failed_rentals_apart(sample_input):
+    profiler = MLS_Stage_Profiler(top_n=20)
+    scraper = MLS_Scraper_Module()
+    scraper.set_profiler(profiler)
+    scraper.read_html(sample_input)
+    scraper.get_all_rental()
+
+    status = scraper.get_rental_scraping_status()
+    slowest = {MLS_num for MLS_num, elapsed in profiler.get_slowest_listings()}
+    assert slowest == set(status['success'])
+    assert profiler.get_failed_listings()[0] == len(status['failure'])